@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.fxsolver.parser import ExpressionParser
+from .runner import benchmark
+
+"""
+Benchmarks of ExpressionParser: compiling expressions (with and without the cache) and evaluating
+compiled expressions point by point and on arrays.
+"""
+
+EXPRESSIONS = {
+    "short": "x^2 + 2*x + 1",
+    "long": "sqrt(x^2 + 1) * log10(x + 20) / (x^3 - 2*x + 5) + (x - 1)^4 - 3*x^2 / (1 + x^2)",
+}
+
+
+def _compile(expression):
+    @benchmark(f"parser.compile[{expression}]")
+    def setup():
+        text = EXPRESSIONS[expression]
+
+        def run():
+            ExpressionParser.cache.clear()
+            ExpressionParser.convert_expr_to_function(text)
+        return run
+
+
+def _compile_cached():
+    @benchmark("parser.compile[cached]")
+    def setup():
+        text = EXPRESSIONS["long"]
+        ExpressionParser.convert_expr_to_function(text)
+        return lambda: ExpressionParser.convert_expr_to_function(text)
+
+
+def _evaluate(points):
+    @benchmark(f"parser.evaluate[per_point,n={points}]")
+    def per_point():
+        f = ExpressionParser.convert_expr_to_function(EXPRESSIONS["long"])
+        xs = np.linspace(-10, 10, points).tolist()
+        return lambda: [f(x) for x in xs]
+
+    @benchmark(f"parser.evaluate[array,n={points}]")
+    def array():
+        f = ExpressionParser.convert_expr_to_function(EXPRESSIONS["long"])
+        xs = np.linspace(-10, 10, points)
+        return lambda: f(xs)
+
+
+for _expression in EXPRESSIONS:
+    _compile(_expression)
+_compile_cached()
+_evaluate(1000)
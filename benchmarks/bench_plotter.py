@@ -0,0 +1,66 @@
+import os
+
+from src.fxsolver.parser import ExpressionParser
+from .runner import benchmark, SkipBenchmark
+
+"""
+Benchmarks of PlotterWidget.plot_functions on an offscreen Qt platform: a plot that changes the
+expressions (new legend and limits, so the whole figure is redrawn) and one that only moves the roots
+(the curves are blitted over the cached background).
+"""
+
+# The QApplication and the widget are kept for the whole run
+_state = {}
+
+
+def _plotter():
+    if "plotter" not in _state:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        try:
+            from PySide2.QtWidgets import QApplication
+            from src.widgets.plotter_widget import PlotterWidget
+        except ImportError as e:
+            raise SkipBenchmark(f"Qt is not available: {e}")
+        _state["app"] = QApplication.instance() or QApplication([])
+        plotter = PlotterWidget()
+        plotter.resize(800, 600)
+        plotter.show()
+        plotter.ensure_canvas()
+        _state["app"].processEvents()
+        _state["plotter"] = plotter
+    return _state["app"], _state["plotter"]
+
+
+@benchmark("plotter.plot_functions[redraw]")
+def redraw():
+    app, plotter = _plotter()
+    pairs = [("x^2", "x + 2", [(-1.0, 1.0), (2.0, 4.0)]), ("x^3", "x", [(-1.0, -1.0), (0.0, 0.0), (1.0, 1.0)])]
+    plots = [(ExpressionParser.convert_expr_to_function(f1), ExpressionParser.convert_expr_to_function(f2),
+              f1, f2, roots) for f1, f2, roots in pairs]
+    turn = [0]
+
+    def run():
+        f1, f2, f1_expr, f2_expr, roots = plots[turn[0] % 2]
+        turn[0] += 1
+        plotter.plot_functions(f1, f2, f1_expr, f2_expr, annotate=roots)
+        # Render now rather than on the next event loop tick
+        plotter.canvas.draw()
+        app.processEvents()
+    return run
+
+
+@benchmark("plotter.plot_functions[update]")
+def update():
+    app, plotter = _plotter()
+    f1 = ExpressionParser.convert_expr_to_function("x^2")
+    f2 = ExpressionParser.convert_expr_to_function("x + 2")
+    plotter.plot_functions(f1, f2, "x^2", "x + 2", annotate=[(-1.0, 1.0), (2.0, 4.0)])
+    plotter.canvas.draw()
+    roots = [[(-1.0, 1.0), (2.0, 4.0)], [(2.0, 4.0)]]
+    turn = [0]
+
+    def run():
+        plotter.plot_functions(f1, f2, "x^2", "x + 2", annotate=roots[turn[0] % 2])
+        turn[0] += 1
+        app.processEvents()
+    return run
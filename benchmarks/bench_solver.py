@@ -0,0 +1,123 @@
+import os
+import tempfile
+
+import numpy as np
+
+from src.fxsolver.parser import ExpressionParser
+from src.fxsolver.result_cache import ResultCache
+from src.fxsolver.solver import Difference, FxSolver
+from src.fxsolver.stats import SolveStats
+from .runner import benchmark
+
+"""
+Benchmarks of FxSolver.find_roots over sample counts, range widths, sampling strategies and root densities,
+and of the batched bracket refiners, which also report how many times they evaluate g (iterations) and on
+how many points in total (evaluations), of Newton's method with symbolic and finite-difference derivatives,
+of streaming the roots chunk by chunk, of repeating a solve that is in a ResultCache, and of a parameter sweep
+compared with solving each parameter value on its own.
+"""
+
+F1 = "sqrt(x^2 + 1) * log10(x + 20)"
+F2 = "2"
+
+
+def _find_roots(name, x_min=-10, x_max=10, steps=FxSolver.DEFAULT_STEPS, f1=None, f2=None, sampling="uniform"):
+    @benchmark(f"solver.find_roots[{name}]")
+    def setup():
+        g1 = f1 or ExpressionParser.convert_expr_to_function(F1)
+        g2 = f2 or ExpressionParser.convert_expr_to_function(F2)
+        return lambda: FxSolver.find_roots(g1, g2, x_min, x_max, steps, sampling=sampling)
+
+
+def _root_density(roots):
+    # sin(k x) has one root per pi / k; spread the requested number of roots over [-10, 10]
+    k = roots * np.pi / 20
+
+    def f1(x):
+        return np.sin(k * x + 0.5)
+
+    _find_roots(f"roots={roots}", f1=f1, f2=lambda x: np.zeros_like(x))
+
+
+def _refine(method, brackets=256):
+    @benchmark(f"solver.refine[{method},brackets={brackets}]")
+    def setup():
+        # One bracket around each root j * pi of sin(x), with the root off-centre
+        roots = np.arange(brackets) * np.pi
+        lefts, rights = roots - 0.004, roots + 0.006
+        calls = []
+
+        def g(x):
+            calls.append(np.size(x))
+            return np.sin(x)
+
+        refine = getattr(FxSolver, FxSolver.METHODS[method])
+        g_lefts, g_rights = np.sin(lefts), np.sin(rights)
+        refine(lefts, rights, g_lefts, g_rights, g)
+        counters = {"iterations": len(calls), "evaluations": int(sum(calls))}
+        return (lambda: refine(lefts, rights, g_lefts, g_rights, g)), counters
+
+
+def _newton(derivative, brackets=256):
+    @benchmark(f"solver.newton[{derivative},brackets={brackets}]")
+    def setup():
+        g = Difference(ExpressionParser.convert_expr_to_function(F1), ExpressionParser.convert_expr_to_function(F2))
+        if derivative == "finite":
+            g = (lambda difference: lambda x: difference(x))(g)
+        # Brackets of different widths around the root of F1 - F2 near 1.13
+        lefts, rights = 1.13 - np.linspace(0.01, 0.5, brackets), 1.13 + np.linspace(0.5, 0.01, brackets)
+        g_lefts, g_rights = g(lefts), g(rights)
+        with SolveStats() as stats:
+            FxSolver._newton(lefts, rights, g_lefts, g_rights, g)
+        counters = {"iterations": stats.counters["refine_iterations"], "evaluations": stats.counters["evaluations"]}
+        return (lambda: FxSolver._newton(lefts, rights, g_lefts, g_rights, g)), counters
+
+
+def _iter_roots(steps, chunk_size=FxSolver.SAMPLE_CHUNK):
+    @benchmark(f"solver.iter_roots[steps={steps},chunk_size={chunk_size}]")
+    def setup():
+        g1, g2 = ExpressionParser.convert_expr_to_function(F1), ExpressionParser.convert_expr_to_function(F2)
+        return lambda: list(FxSolver.iter_roots(g1, g2, steps=steps, chunk_size=chunk_size))
+
+
+def _cached(steps):
+    @benchmark(f"solver.find_roots[cached,steps={steps}]")
+    def setup():
+        g1, g2 = ExpressionParser.convert_expr_to_function(F1), ExpressionParser.convert_expr_to_function(F2)
+        # The directory lives as long as the benchmark callable
+        directory = tempfile.TemporaryDirectory()
+        cache = ResultCache(os.path.join(directory.name, "results.sqlite3"))
+        FxSolver.find_roots(g1, g2, steps=steps, cache=cache)
+        return lambda directory=directory: FxSolver.find_roots(g1, g2, steps=steps, cache=cache)
+
+
+def _sweep(points, mode):
+    @benchmark(f"solver.sweep[points={points},{mode}]")
+    def setup():
+        values = np.linspace(1, 20, points)
+        g2 = ExpressionParser.convert_expr_to_function(F2)
+        if mode == "loop":
+            expressions = [f"x^3 - {a!r}*x" for a in values]
+            return lambda: [FxSolver.find_roots(ExpressionParser.convert_expr_to_function(expression), g2,
+                                                polynomial=False, tangents=False) for expression in expressions]
+        g1 = ExpressionParser.convert_expr_to_function("x^3 - a*x", ("a",))
+        return lambda: FxSolver.sweep(g1, g2, {"a": values}, continuation=mode == "continuation")
+
+
+for _steps in (1000, 10000, 100000):
+    _find_roots(f"steps={_steps}", steps=_steps)
+for _width in (2, 20, 2000):
+    _find_roots(f"width={_width}", -_width / 2, _width / 2)
+for _sampling in ("adaptive", "interval"):
+    _find_roots(f"{_sampling},width=2000000", -1e6, 1e6, sampling=_sampling)
+for _roots in (1, 10, 100):
+    _root_density(_roots)
+for _method in FxSolver.METHODS:
+    _refine(_method)
+for _derivative in ("symbolic", "finite"):
+    _newton(_derivative)
+_cached(100000)
+_iter_roots(100000)
+_iter_roots(1000000)
+for _mode in ("batched", "continuation", "loop"):
+    _sweep(200, _mode)
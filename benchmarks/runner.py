@@ -0,0 +1,177 @@
+import argparse
+import importlib
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+
+"""
+A small benchmark runner for the hot paths of the parser, the solver and the plotter.
+Benchmarks are registered with the benchmark decorator in the bench_* modules of this package.
+Every benchmark is a setup function that prepares its inputs and returns the callable to time,
+optionally with a dict of counters (e.g. iterations or evaluations; lower is better) as (callable, counters).
+A setup function raises SkipBenchmark when it cannot run here (e.g. no Qt).
+Run from the repository root:
+    python -m benchmarks                                  # print the results as JSON
+    python -m benchmarks --save benchmarks/baseline.json  # store a new baseline
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.25
+With a baseline, benchmarks whose best time (the minimum over the repeats, which is the least
+affected by other load on the machine) grew by more than the threshold, or whose counters grew,
+are reported on stderr and the exit status is 1. Timings depend on the machine, so compare against
+a baseline recorded on the same machine.
+"""
+
+# Modules that register benchmarks, in run order
+MODULES = ("bench_parser", "bench_solver", "bench_plotter")
+# Registered benchmarks: name -> setup function
+BENCHMARKS = {}
+# Format version of the JSON results
+FORMAT_VERSION = 1
+# Default relative slowdown of the best time that counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+# Raised by a setup function when its benchmark cannot run in this environment.
+class SkipBenchmark(Exception):
+    pass
+
+
+# Registers a setup function as the benchmark called name.
+def benchmark(name):
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark: {name}")
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+"""
+Times a callable.
+Parameters:
+- run: Callable without arguments
+- repeat: Number of timed repeats
+- min_time: Smallest duration of one repeat in seconds; fast callables are called several times
+  per repeat (loops), chosen once by doubling until a repeat takes min_time
+- clock: Clock returning seconds
+Returns:
+- Dict with the min, median and mean time per call in seconds, the loops per repeat and the repeats
+"""
+def measure(run, repeat=5, min_time=0.05, clock=time.perf_counter):
+    loops = 1
+    while True:
+        start = clock()
+        for _ in range(loops):
+            run()
+        elapsed = clock() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = clock()
+        for _ in range(loops):
+            run()
+        times.append((clock() - start) / loops)
+    return {"min": min(times), "median": statistics.median(times), "mean": sum(times) / len(times),
+            "loops": loops, "repeat": repeat}
+
+
+"""
+Runs the registered benchmarks.
+Parameters:
+- pattern: Regular expression; only benchmarks whose name matches it (re.search) run (default: all)
+- repeat, min_time: See measure
+Returns:
+- Results dict (see FORMAT_VERSION): environment information and, per benchmark name, the timings
+  from measure plus "counters", or {"skipped": reason}
+"""
+def run_benchmarks(pattern=None, repeat=5, min_time=0.05):
+    for module in MODULES:
+        importlib.import_module(f"{__package__}.{module}")
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        try:
+            prepared = setup()
+        except SkipBenchmark as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        run, counters = prepared if isinstance(prepared, tuple) else (prepared, {})
+        results[name] = {**measure(run, repeat, min_time), "counters": counters}
+    return {"version": FORMAT_VERSION, "environment": environment(), "benchmarks": results}
+
+
+# Describes the machine and library versions the results were measured with.
+def environment():
+    import numpy
+    return {"python": platform.python_version(), "numpy": numpy.__version__,
+            "platform": platform.platform(), "processor": platform.machine()}
+
+
+"""
+Compares results with a baseline.
+Parameters:
+- results, baseline: Results dicts from run_benchmarks
+- threshold: Relative growth of the best (min) time above which a benchmark has regressed
+Returns:
+- List of (name, message) regressions; benchmarks missing from either side or skipped are ignored,
+  and every counter that grew counts as a regression
+"""
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    regressions = []
+    previous = baseline.get("benchmarks", {})
+    for name, current in results["benchmarks"].items():
+        before = previous.get(name)
+        if before is None or "skipped" in current or "skipped" in before:
+            continue
+        ratio = current["min"] / before["min"] if before["min"] > 0 else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append((name, f"best {before['min'] * 1e3:.3f} ms -> "
+                                      f"{current['min'] * 1e3:.3f} ms ({ratio:.2f}x)"))
+        for counter, value in current.get("counters", {}).items():
+            old = before.get("counters", {}).get(counter)
+            if old is not None and value > old:
+                regressions.append((name, f"{counter} {old} -> {value}"))
+    return regressions
+
+
+# Command line of the benchmark suite; returns the exit status.
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the fxsolver benchmarks.")
+    parser.add_argument("--filter", help="only run benchmarks whose name matches this regular expression")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per benchmark (default: %(default)s)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="smallest duration of one repeat in seconds (default: %(default)s)")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--save", help="also store the results as a baseline in this file")
+    parser.add_argument("--baseline", help="compare with the results stored in this file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    results = run_benchmarks(args.filter, args.repeat, args.min_time)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+    if args.save:
+        with open(args.save, "w") as output:
+            output.write(text + "\n")
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as source:
+        regressions = compare(results, json.load(source), args.threshold)
+    for name, message in regressions:
+        print(f"REGRESSION {name}: {message}", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).", file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,210 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+
+from .parser import ExpressionParser
+from .result_cache import ResultCache
+from .solver import FxSolver
+
+"""
+Command line interface of the solver, run with `python -m fxsolver` (from src/) or `python -m src.fxsolver`.
+It only imports the parser and the solver (never Qt or matplotlib), so it starts quickly and runs headless.
+Jobs are read from the arguments (one pair of expressions) or line by line from a file or stdin,
+either as CSV rows `f1,f2[,x_min,x_max[,steps]]` or as JSON objects with the keys of
+FxSolver.find_roots_batch ("f1", "f2", "x_min", "x_max", "steps").
+Results are written to stdout as NDJSON, one object per job in input order:
+{"index": 0, "f1": "x^2", "f2": "1", "roots": [{"x": -1.0, "y": 1.0, "multiplicity": 1}, ...]}
+or {"index": 0, "error": "..."} for a job that could not be solved.
+Input is processed in chunks of --chunk-size jobs, so memory use does not grow with the input.
+With --cache (or FXSOLVER_CACHE set), results are kept in a ResultCache file shared with the GUI,
+so jobs solved before are answered from it.
+With --stream, the roots of one pair of expressions are written as they are found (FxSolver.iter_roots),
+one object per root: {"x": -1.0, "y": 1.0, "multiplicity": 1}, so they can be piped on before a long solve ends.
+"""
+
+# Jobs solved together; bounds the memory use while keeping enough jobs per chunk for the workers
+CHUNK_SIZE = 1024
+FORMATS = ("auto", "csv", "jsonl")
+
+
+# Builds the argument parser of the command line.
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="fxsolver",
+        description="Find the x values where f1(x) = f2(x) and print them as NDJSON.")
+    parser.add_argument("f1", nargs="?", help="first expression (reads jobs from the input when omitted)")
+    parser.add_argument("f2", nargs="?", help="second expression")
+    parser.add_argument("--range", nargs=2, type=float, metavar=("X_MIN", "X_MAX"),
+                        default=FxSolver.DEFAULT_RANGE, help="default range of x (default: %(default)s)")
+    parser.add_argument("--steps", type=int, default=FxSolver.DEFAULT_STEPS,
+                        help="default number of samples over the range (default: %(default)s)")
+    parser.add_argument("--input", default="-", help="file with one job per line, - for stdin (default)")
+    parser.add_argument("--format", choices=FORMATS, default="auto",
+                        help="input format; auto reads lines starting with '{' as JSON and others as CSV")
+    parser.add_argument("--workers", type=int, default=None, help="number of parallel workers")
+    parser.add_argument("--executor", choices=sorted(FxSolver.EXECUTORS), default="process",
+                        help="pool used with --workers (default: %(default)s)")
+    parser.add_argument("--method", choices=sorted(FxSolver.METHODS), default="bisect",
+                        help="bracket refinement method (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="jobs read and solved at a time (default: %(default)s)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write the roots of the two expressions one per line as they are found")
+    parser.add_argument("--cache", metavar="PATH", default=os.environ.get(ResultCache.ENVIRONMENT_VARIABLE),
+                        help=f"file caching the results across runs (default: ${ResultCache.ENVIRONMENT_VARIABLE})")
+    return parser
+
+
+"""
+Runs the command line.
+Parameters:
+- argv: Arguments without the program name (default: sys.argv[1:])
+- stdin, stdout: Streams to read jobs from and write results to (default: sys.stdin, sys.stdout)
+Returns:
+- Exit status: 0 if every job was solved, 1 if any job failed, 2 for invalid arguments
+"""
+def main(argv=None, stdin=None, stdout=None):
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.f1 is None) != (args.f2 is None):
+        parser.error("give both expressions, or none to read jobs from the input")
+    if args.chunk_size < 1 or args.steps < 2:
+        parser.error("--chunk-size must be at least 1 and --steps at least 2")
+    if args.stream and args.f1 is None:
+        parser.error("--stream needs the two expressions as arguments")
+    defaults = (args.range[0], args.range[1], args.steps)
+
+    cache = ResultCache(args.cache) if args.cache else None
+    try:
+        if args.stream:
+            return stream_roots(args, stdout, cache)
+        if args.f1 is not None:
+            return solve_jobs([(args.f1, args.f2) + defaults], args, stdout, cache)
+        if args.input == "-":
+            return solve_jobs(read_jobs(stdin, args.format, defaults), args, stdout, cache)
+        try:
+            with open(args.input, newline="") as source:
+                return solve_jobs(read_jobs(source, args.format, defaults), args, stdout, cache)
+        except OSError as e:
+            parser.exit(2, f"fxsolver: cannot read {args.input}: {e.strerror}\n")
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+"""
+Reads jobs line by line.
+Parameters:
+- lines: Iterable of input lines
+- input_format: One of FORMATS
+- defaults: (x_min, x_max, steps) used for jobs that do not give them
+Returns:
+- Iterator of jobs for FxSolver.find_roots_batch, or of ValueError for lines that cannot be read
+  (so the error is reported at the line's index); blank lines and a CSV header row are skipped
+"""
+def read_jobs(lines, input_format, defaults):
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        if input_format == "jsonl" or (input_format == "auto" and line.startswith("{")):
+            yield _json_job(line, defaults)
+            continue
+        row = [cell.strip() for cell in next(csv.reader([line]))]
+        if number == 0 and row[:2] == ["f1", "f2"]:
+            continue
+        if len(row) == 2:
+            row += defaults
+        elif len(row) == 4:
+            row += defaults[2:]
+        yield tuple(row)
+
+
+# Converts one JSON line into a job dict with the defaults filled in.
+def _json_job(line, defaults):
+    try:
+        job = json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+    if not isinstance(job, dict):
+        return ValueError("Job must be a JSON object.")
+    if not all(isinstance(job.get(key, ""), str) for key in ("f1", "f2")):
+        return ValueError("Expressions must be strings.")
+    return {**dict(zip(("x_min", "x_max", "steps"), defaults)), **job}
+
+
+"""
+Solves jobs chunk by chunk and writes one NDJSON line per job, using the ResultCache cache if given.
+Returns:
+- Exit status: 0 if every job was solved, 1 otherwise
+"""
+def solve_jobs(jobs, args, stdout, cache=None):
+    status = 0
+    jobs = iter(jobs)
+    offset = 0
+    while True:
+        chunk = list(itertools.islice(jobs, args.chunk_size))
+        if not chunk:
+            return status
+        # Lines that could not be read are reported as they are; the others are solved together
+        solvable = [index for index, job in enumerate(chunk) if not isinstance(job, ValueError)]
+        results = {index: (None, job) for index, job in enumerate(chunk) if isinstance(job, ValueError)}
+        batch = FxSolver.find_roots_batch([chunk[index] for index in solvable], workers=args.workers,
+                                          executor=args.executor, method=args.method, cache=cache)
+        for result in batch:
+            results[solvable[result.index]] = (result.roots, result.error)
+        for index, job in enumerate(chunk):
+            roots, error = results[index]
+            if error is not None:
+                status = 1
+            stdout.write(format_result(offset + index, job, roots, error) + "\n")
+        stdout.flush()
+        offset += len(chunk)
+
+
+"""
+Writes the roots of the expressions in args one NDJSON line at a time, as FxSolver.iter_roots finds them.
+Returns:
+- Exit status: 0, or 1 (with an error line) if the expressions or the range are invalid
+"""
+def stream_roots(args, stdout, cache=None):
+    try:
+        f1 = ExpressionParser.convert_expr_to_function(args.f1)
+        f2 = ExpressionParser.convert_expr_to_function(args.f2)
+        roots = FxSolver.iter_roots(f1, f2, args.range[0], args.range[1], args.steps, method=args.method,
+                                    cache=cache)
+        for root in roots:
+            stdout.write(json.dumps(format_root(root)) + "\n")
+            stdout.flush()
+    except ValueError as e:
+        stdout.write(json.dumps({"error": str(e)}) + "\n")
+        return 1
+    return 0
+
+
+"""
+Formats the result of one job as a JSON line. Non-finite y values (f1 undefined at the root) become null.
+"""
+def format_result(index, job, roots, error):
+    record = {"index": index}
+    if isinstance(job, dict):
+        record.update((key, job[key]) for key in ("f1", "f2") if key in job)
+    elif isinstance(job, tuple) and len(job) >= 2:
+        record.update(f1=job[0], f2=job[1])
+    if error is not None:
+        record["error"] = str(error)
+    else:
+        record["roots"] = [format_root(root) for root in roots]
+    return json.dumps(record)
+
+
+# Formats a root as a dict; a non-finite y value (f1 undefined at the root) becomes None.
+def format_root(root):
+    return {"x": float(root[0]), "y": float(root[1]) if math.isfinite(root[1]) else None,
+            "multiplicity": getattr(root, "multiplicity", 1)}
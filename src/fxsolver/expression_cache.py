@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+"""
+A bounded, thread-safe LRU cache used by ExpressionParser to keep compiled expressions.
+It counts hits, misses and evictions so callers can check how effective the cache is.
+"""
+class ExpressionCache:
+    DEFAULT_MAX_SIZE = 256
+
+    # Initialize an empty cache holding at most max_size entries
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        if max_size < 0:
+            raise ValueError("Cache size must not be negative.")
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    """
+    Returns the cached value for key and marks it as most recently used,
+    or None (counted as a miss) if the key is not cached.
+    """
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    """
+    Stores a value as the most recently used entry, evicting the least recently used
+    entries when the cache is full.
+    """
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+
+    # Removes all entries and resets the counters.
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    # Maximum number of entries; lowering it evicts the least recently used entries right away.
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        if max_size < 0:
+            raise ValueError("Cache size must not be negative.")
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    # Returns a snapshot of the counters and the current size.
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self._max_size,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Drops least recently used entries until the cache fits (caller holds the lock).
+    def _evict(self):
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .solver import FxSolver
+from .stats import SolveStats
+
+"""
+An incremental sampler that keeps the samples of recently used functions on a fixed grid,
+so that repeated solves over overlapping ranges only evaluate the newly exposed part of the range.
+The grid points are x = (k + 1/2) * h for integers k, with h a power of two chosen from the range width,
+so the same x values come back whenever a range is moved or resized and h stays the same.
+The half-step offset keeps 0 and other round numbers, which are common roots, off the grid
+(a root on a sample is reported as an exact zero instead of being refined, see FxSolver._scan_for_roots).
+Samples are stored per function, so when only one of two expressions changes, the other one is reused.
+It is thread-safe, so it can be shared by solves running on worker threads.
+"""
+class IncrementalSampler:
+    # Number of functions whose samples are kept (least recently used are dropped first)
+    MAX_FUNCTIONS = 8
+    # Stored samples are trimmed back to the requested range when they grow beyond this many ranges
+    MAX_SPANS = 4
+
+    # Initialize an empty sampler aiming at about steps (at most 2 * steps) samples per range
+    def __init__(self, steps=FxSolver.DEFAULT_STEPS, max_functions=MAX_FUNCTIONS):
+        if steps < 2:
+            raise ValueError("Sampler needs at least 2 steps.")
+        self.steps = steps
+        self.max_functions = max_functions
+        self.evaluations = 0
+        self._segments = OrderedDict()
+        self._lock = threading.Lock()
+
+    """
+    Returns the grid spacing used for a range: the largest power of two that gives at least
+    steps samples over [x_min, x_max].
+    """
+    def step_for(self, x_min, x_max):
+        width = abs(x_max - x_min)
+        if width == 0 or not np.isfinite(width):
+            return 1.0
+        return 2.0 ** np.floor(np.log2(width / (self.steps - 1)))
+
+    """
+    Returns a description of the grid for FxSolver.cache_key: the grid over a range only depends on
+    steps, so roots found on it are cached apart from those of the solver's own grid.
+    """
+    def grid_key(self):
+        return ["incremental", int(self.steps)]
+
+    """
+    Samples f on the grid covering [x_min, x_max], reusing the samples already computed for f.
+    Parameters:
+    - f: Function to sample (callable); samples are keyed by the function object
+    - x_min, x_max: Range to cover
+    Returns:
+    - x_vals: Sorted array of grid points (k + 1/2) * h from the last one at or below min(x_min, x_max)
+      to the first one at or above max(x_min, x_max)
+    - values: Array of corresponding f(x) values
+    How it works:
+    1. Pick the spacing h with step_for and the index range [first, last] covering the range.
+    2. If f has samples at the same spacing that overlap or touch [first, last], evaluate f only
+       on the missing indices on either side and join them to the stored samples.
+    3. Otherwise (new function, different spacing, or a disjoint range) evaluate the whole range.
+    4. Store the joined samples (trimmed to the range if they grew too long) and return the slice.
+    """
+    def sample(self, f, x_min, x_max):
+        with SolveStats.phase("sampling"):
+            return self._sample(f, x_min, x_max)
+
+    # The body of sample, which times it as the "sampling" phase of a recording SolveStats.
+    def _sample(self, f, x_min, x_max):
+        left, right = min(x_min, x_max), max(x_min, x_max)
+        h = self.step_for(left, right)
+        first, last = int(np.floor(left / h - 0.5)), int(np.ceil(right / h - 0.5))
+        with self._lock:
+            segment = self._segments.get(f)
+            if segment is not None:
+                self._segments.move_to_end(f)
+        if segment is not None and segment[0] == h and segment[1] <= last + 1 and segment[2] >= first - 1:
+            _, stored_first, stored_last, values = segment
+            # Extend the stored samples to the left and to the right as needed
+            before = self._evaluate(f, h, first, stored_first - 1)
+            after = self._evaluate(f, h, stored_last + 1, last)
+            start = min(first, stored_first)
+            values = np.concatenate([before, values, after])
+            end = start + values.size - 1
+        else:
+            start, end = first, last
+            values = self._evaluate(f, h, first, last)
+        if values.size > self.MAX_SPANS * (last - first + 1):
+            values = values[first - start:last - start + 1]
+            start, end = first, last
+
+        with self._lock:
+            self._segments[f] = (h, start, end, values)
+            self._segments.move_to_end(f)
+            while len(self._segments) > self.max_functions:
+                self._segments.popitem(last=False)
+        return (np.arange(first, last + 1) + 0.5) * h, values[first - start:last - start + 1]
+
+    # Drops all stored samples and resets the evaluation counter.
+    def clear(self):
+        with self._lock:
+            self._segments.clear()
+            self.evaluations = 0
+
+    # Evaluates f on the grid points first..last (inclusive; empty if last < first).
+    def _evaluate(self, f, h, first, last):
+        if last < first:
+            return np.empty(0)
+        x_vals = (np.arange(first, last + 1) + 0.5) * h
+        with self._lock:
+            self.evaluations += x_vals.size
+        return FxSolver._evaluate(f, x_vals)
@@ -0,0 +1,181 @@
+import ast
+
+import numpy as np
+
+"""
+Interval arithmetic over the expression trees built by ExpressionParser, vectorized over many boxes:
+Interval.evaluate(node, lower, upper) bounds the values an expression takes for x in [lower, upper],
+for arrays of boxes at once. The bounds are guaranteed: every finite value the compiled expression returns
+for an x in a box lies inside the interval of that box, so a box whose interval excludes zero has no root.
+- Results of arithmetic are rounded outwards by a few ulps (ROUNDING), more than the rounding error
+  of the numpy operations, so floating-point rounding cannot narrow them.
+- sqrt and log10 are clipped to their domain; x ** p with a non-integer constant p to x >= 0.
+- A box where the expression is undefined everywhere (e.g. sqrt of negative values only) gets the empty
+  interval, NaN bounds. Bounds that cannot be narrowed (e.g. division by an interval containing 0) are infinite.
+Intervals are (lower, upper) pairs of arrays of the same shape.
+"""
+class Interval:
+    # Relative outward rounding of every computed bound
+    ROUNDING = 4 * np.finfo(float).eps
+
+    """
+    This method bounds an expression over boxes.
+    Parameters:
+    - node: Expression node (e.g. tree.body of a tree from ExpressionParser.parse_expression)
+    - lower, upper: Arrays of the box boundaries of x
+    - variable: Name of the variable (default: "x")
+    Returns:
+    - Tuple (lower, upper) of arrays bounding the expression over every box (NaN where it is empty)
+    """
+    @staticmethod
+    def evaluate(node, lower, upper, variable="x"):
+        lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+        with np.errstate(all="ignore"):
+            return Interval._evaluate(node, lower, upper, variable)
+
+    # Recursive helper of evaluate.
+    @staticmethod
+    def _evaluate(node, lower, upper, variable):
+        if isinstance(node, ast.Constant):
+            return np.full_like(lower, node.value), np.full_like(upper, node.value)
+        if isinstance(node, ast.Name):
+            if node.id != variable:
+                raise ValueError(f"Cannot bound the name: {node.id}")
+            return lower, upper
+        if isinstance(node, ast.UnaryOp):
+            operand = Interval._evaluate(node.operand, lower, upper, variable)
+            return Interval.negate(operand) if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.Call):
+            function = Interval.FUNCTIONS.get(node.func.id)
+            if function is None:
+                raise ValueError(f"Cannot bound the function: {node.func.id}")
+            return function(Interval._evaluate(node.args[0], lower, upper, variable))
+
+        left = Interval._evaluate(node.left, lower, upper, variable)
+        if isinstance(node.op, ast.Pow) and isinstance(node.right, ast.Constant):
+            return Interval.power_constant(left, node.right.value)
+        right = Interval._evaluate(node.right, lower, upper, variable)
+        return Interval.OPERATORS[type(node.op)](left, right)
+
+    # -[a, b] = [-b, -a]
+    @staticmethod
+    def negate(a):
+        return -a[1], -a[0]
+
+    # [a, b] + [c, d] = [a + c, b + d]
+    @staticmethod
+    def add(a, b):
+        return Interval._outward(a[0] + b[0], a[1] + b[1], Interval._empty(a, b))
+
+    # [a, b] - [c, d] = [a - d, b - c]
+    @staticmethod
+    def subtract(a, b):
+        return Interval._outward(a[0] - b[1], a[1] - b[0], Interval._empty(a, b))
+
+    # [a, b] * [c, d]: the smallest and largest product of the bounds (0 * inf counts as 0).
+    @staticmethod
+    def multiply(a, b):
+        products = np.stack([a[0] * b[0], a[0] * b[1], a[1] * b[0], a[1] * b[1]])
+        products[np.isnan(products)] = 0.0
+        return Interval._outward(products.min(axis=0), products.max(axis=0), Interval._empty(a, b))
+
+    """
+    [a, b] / [c, d]: the smallest and largest quotient of the bounds when the divisor excludes 0,
+    unbounded when it contains 0, and empty when it is exactly 0 (the quotient is never finite there).
+    """
+    @staticmethod
+    def divide(a, b):
+        lower, upper = Interval._extremes([a[0] / b[0], a[0] / b[1], a[1] / b[0], a[1] / b[1]])
+        crosses_zero = (b[0] <= 0.0) & (b[1] >= 0.0)
+        lower[crosses_zero], upper[crosses_zero] = -np.inf, np.inf
+        zero = (b[0] == 0.0) & (b[1] == 0.0)
+        return Interval._outward(lower, upper, Interval._empty(a, b) | zero)
+
+    """
+    [a, b] ** p for a constant exponent p, like numpy: p == 0 gives 1, integer powers are defined for
+    negative bases (even ones are not monotonic around 0), other powers only for bases >= 0, and
+    negative powers are reciprocals.
+    """
+    @staticmethod
+    def power_constant(a, p):
+        lower, upper = a
+        empty = np.isnan(lower)
+        if p == 0:
+            return np.ones_like(lower), np.ones_like(upper)
+        if p < 0:
+            return Interval.divide((np.ones_like(lower), np.ones_like(upper)), Interval.power_constant(a, -p))
+        if p != int(p):
+            # x ** p is NaN for x < 0
+            empty = empty | (upper < 0.0)
+            lower = np.maximum(lower, 0.0)
+            return Interval._outward(lower ** p, upper ** p, empty)
+        low, high = lower ** p, upper ** p
+        if int(p) % 2:
+            return Interval._outward(low, high, empty)
+        contains_zero = (lower <= 0.0) & (upper >= 0.0)
+        result_lower = np.where(contains_zero, 0.0, np.minimum(low, high))
+        return Interval._outward(result_lower, np.maximum(low, high), empty)
+
+    """
+    [a, b] ** [c, d] for an exponent that depends on x. With a base >= 0, x ** y = exp(y * ln(x)) takes its
+    extremes at the corners of the box (y * ln(x) is bilinear). A negative base is only defined at integer
+    exponents, so its interval is unbounded.
+    """
+    @staticmethod
+    def power(a, b):
+        base = np.maximum(a[0], 0.0)
+        lower, upper = Interval._extremes([base ** b[0], base ** b[1], a[1] ** b[0], a[1] ** b[1]])
+        negative = a[0] < 0.0
+        lower[negative], upper[negative] = -np.inf, np.inf
+        return Interval._outward(lower, upper, Interval._empty(a, b))
+
+    # sqrt([a, b]) = [sqrt(max(a, 0)), sqrt(b)], empty if b < 0
+    @staticmethod
+    def sqrt(a):
+        return Interval._outward(np.sqrt(np.maximum(a[0], 0.0)), np.sqrt(a[1]), np.isnan(a[0]) | (a[1] < 0.0))
+
+    # log10([a, b]) = [log10(a), log10(b)] with log10(a) = -inf for a <= 0, empty if b <= 0
+    @staticmethod
+    def log10(a):
+        lower = np.where(a[0] > 0.0, np.log10(np.maximum(a[0], np.finfo(float).tiny)), -np.inf)
+        return Interval._outward(lower, np.log10(a[1]), np.isnan(a[0]) | (a[1] <= 0.0))
+
+    # Whether any of the intervals is empty, per box.
+    @staticmethod
+    def _empty(*intervals):
+        return np.logical_or.reduce([np.isnan(interval[0]) for interval in intervals])
+
+    # The smallest and largest of some candidate bounds; undetermined (NaN) candidates make them infinite.
+    @staticmethod
+    def _extremes(candidates):
+        candidates = np.stack(candidates)
+        undetermined = np.isnan(candidates)
+        return (np.where(undetermined, -np.inf, candidates).min(axis=0),
+                np.where(undetermined, np.inf, candidates).max(axis=0))
+
+    """
+    Rounds an interval outwards by ROUNDING and makes it valid: undetermined bounds (NaN, e.g. from inf - inf)
+    become infinite, and the empty boxes get NaN bounds.
+    """
+    @staticmethod
+    def _outward(lower, upper, empty):
+        lower = lower - np.abs(lower) * Interval.ROUNDING
+        upper = upper + np.abs(upper) * Interval.ROUNDING
+        lower = np.where(np.isnan(lower), -np.inf, lower)
+        upper = np.where(np.isnan(upper), np.inf, upper)
+        lower[empty], upper[empty] = np.nan, np.nan
+        return lower, upper
+
+
+# Interval versions of the AST operators and allowed functions
+Interval.OPERATORS = {
+    ast.Add: Interval.add,
+    ast.Sub: Interval.subtract,
+    ast.Mult: Interval.multiply,
+    ast.Div: Interval.divide,
+    ast.Pow: Interval.power,
+}
+Interval.FUNCTIONS = {
+    "sqrt": Interval.sqrt,
+    "log10": Interval.log10,
+}
@@ -1,63 +1,432 @@
-import math
+import ast
+import keyword
 import re
 import numpy as np
+from numpy.polynomial import polynomial as P
+
+from .expression_cache import ExpressionCache
+from .interval import Interval
+from .stats import SolveStats
+from .symbolic import Symbolic
 
 """
 A simple parser to convert mathematical expressions in string format into callable functions.
 Supports basic arithmetic operations, exponentiation, and functions like sqrt and log10.
+Expressions are parsed and validated once, then compiled into a vectorized evaluator,
+so the returned function accepts both scalars and numpy arrays.
+The returned function also provides its symbolic derivative (see CompiledExpression.derivative).
+Expressions may use named parameters declared when converting them (e.g. "a*x^2 + b" with parameters
+("a", "b")), which the function takes as keyword arguments that broadcast against x.
+Compiled expressions are kept in a bounded LRU cache keyed by the normalized expression text
+(and the parameter names).
 """
 class ExpressionParser:
     # Regex to identify any characters not allowed in the expression after removing valid parts
     regexNotAllowed = r"[A-Za-z_]+"
 
-    # Allowed functions that can be used in the expressions
+    # Allowed functions that can be used in the expressions (numpy ufuncs, so they work on arrays)
     ALLOWED_FUNCTIONS = {
-        "sqrt": math.sqrt,
-        "log10": math.log10,
+        "sqrt": np.sqrt,
+        "log10": np.log10,
     }
 
+    # Name of the independent variable
+    VARIABLE = "x"
+    # Valid parameter names (other than VARIABLE, the function names and Python keywords); names starting
+    # with an underscore are reserved for the temporaries of compile_tree
+    PARAMETER_NAME = re.compile(r"[A-Za-z][A-Za-z0-9]*")
+
+    # AST node types that may appear in a parsed expression
+    ALLOWED_NODES = (
+        ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant, ast.Load,
+        ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.UAdd, ast.USub,
+    )
+
+    # Highest degree recognized by polynomial_coefficients (higher powers are sampled instead)
+    MAX_POLYNOMIAL_DEGREE = 32
+
+    # LRU cache of compiled expressions (resize with cache.max_size, inspect with cache.info())
+    cache = ExpressionCache()
+
+    # Characters that form a different token when written next to each other ("2 3" vs "23", "* *" vs "**")
+    WORD_CHARACTERS = re.compile(r"[\w.]")
+    OPERATOR_CHARACTERS = re.compile(r"[*/<>=!]")
+
     """
     Converts a mathematical expression in string format to a callable function of x.
+    The returned function accepts a scalar (returns a float) or a numpy array (returns an array),
+    and reports domain errors (division by zero, sqrt/log10 of invalid values) as NaN.
+    Expressions that only differ in whitespace share one cached compiled function.
+    With parameters (names, see PARAMETER_NAME), the expression may use them like x, and the function
+    takes their values as keyword arguments, e.g. f(x, a=2.0, b=[[1.0], [2.0]]) (see CompiledExpression).
+    With a SolveStats recording, the time is added to its "parse" phase.
     """
     @staticmethod
-    def convert_expr_to_function(expression: str):
+    def convert_expr_to_function(expression: str, parameters=()):
+        with SolveStats.phase("parse"):
+            return ExpressionParser._convert(expression, parameters)
+
+    # The body of convert_expr_to_function, which times it as the "parse" phase.
+    @staticmethod
+    def _convert(expression, parameters=()):
         # Basic validation
         if not expression or not isinstance(expression, str):
             raise ValueError("Expression must be a non-empty string.")
+        parameters = ExpressionParser.parameter_names(parameters)
+
+        # Replace '^' with '**' for exponentiation and drop insignificant whitespace
+        expression = ExpressionParser.normalize_expression(expression)
+        key = (expression, parameters) if parameters else expression
+        f = ExpressionParser.cache.get(key)
+        if f is not None:
+            SolveStats.count("parse_cache_hits")
+            return f
+        SolveStats.count("expressions_compiled")
 
-        # Replace '^' with '**' for exponentiation
-        expression = expression.strip().replace("^", "**")
         # Check for invalid characters in the expression
-        ExpressionParser.validate_expression(expression)
-
-        # Define the function that evaluates the expression
-        def f(x):
-            # Create a local dictionary of allowed functions and the variable x
-            local_subs = {"x": x, **ExpressionParser.ALLOWED_FUNCTIONS}
-            try:
-                # Safely evaluate the expression using eval with restricted built-ins
-                return eval(expression, {"__builtins__": {}}, local_subs)
-            except (ZeroDivisionError, ValueError):
-                return np.nan
-            except Exception as e:
-                raise ValueError(f"Error evaluating expression: {e}")
+        ExpressionParser.validate_expression(expression, parameters)
+
+        # Parse, validate and compile the expression once
+        try:
+            tree = ExpressionParser.parse_expression(expression, parameters)
+            f = CompiledExpression(expression, tree, parameters=parameters)
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e.msg}")
 
         try:
-            _ = f(0) # Test the function with a sample input to catch errors early
+            _ = f(0, **dict.fromkeys(parameters, 0.0)) # Test the function with a sample input to catch errors early
         except Exception as e:
             raise ValueError(f"Invalid expression: {e}")
+        ExpressionParser.cache.put(key, f)
         return f
 
+    """
+    This method checks parameter names and returns them as a tuple.
+    It raises a ValueError for names that are not valid (see PARAMETER_NAME) or given twice.
+    """
+    @staticmethod
+    def parameter_names(parameters):
+        if isinstance(parameters, str):
+            parameters = (parameters,)
+        parameters = tuple(parameters)
+        for name in parameters:
+            if (not isinstance(name, str) or not ExpressionParser.PARAMETER_NAME.fullmatch(name)
+                    or name == ExpressionParser.VARIABLE or name in ExpressionParser.ALLOWED_FUNCTIONS
+                    or keyword.iskeyword(name)):
+                raise ValueError(f"Invalid parameter name: {name!r}")
+        if len(set(parameters)) != len(parameters):
+            raise ValueError("Parameter names must be unique.")
+        return parameters
+
+    """
+    This method normalizes an expression string for caching: '^' becomes '**' and whitespace is removed,
+    except for a single space where removing it would join two tokens into a different one.
+    """
+    @staticmethod
+    def normalize_expression(expression: str):
+        expression = expression.strip().replace("^", "**")
+
+        def collapse(match):
+            before, after = match.string[match.start() - 1], match.string[match.end()]
+            for characters in (ExpressionParser.WORD_CHARACTERS, ExpressionParser.OPERATOR_CHARACTERS):
+                if characters.match(before) and characters.match(after):
+                    return " "
+            return ""
+
+        return re.sub(r"\s+", collapse, expression)
+
     """
     This method checks the expression for any invalid characters or patterns.
     It raises a ValueError if the expression is invalid.
+    Names in parameters (whole words only) are allowed besides x and the functions.
     """
     @staticmethod
-    def validate_expression(expression: str):
+    def validate_expression(expression: str, parameters=()):
         if not expression or not isinstance(expression, str) or expression.strip() == "":
             raise ValueError("Expression must be a non-empty string.")
-        expr_test = expression.replace("x", "").replace("log10", "").replace("sqrt", "")
+        expr_test = expression
+        if parameters:
+            expr_test = re.sub(r"[A-Za-z_]\w*", lambda name: "" if name.group(0) in parameters else name.group(0),
+                               expr_test)
+        expr_test = expr_test.replace("x", "").replace("log10", "").replace("sqrt", "")
         is_bad = re.search(ExpressionParser.regexNotAllowed, expr_test)
         # If any invalid characters are found, raise an error
         if is_bad:
             raise ValueError(f"Expression contains invalid characters: {is_bad.group(0)}")
+
+    """
+    This method parses the expression into an AST and checks every node against a whitelist.
+    Parameters:
+    - expression: Expression string (using '**' for exponentiation)
+    - parameters: Names allowed besides x (default: none)
+    Returns:
+    - ast.Expression tree with all numeric constants converted to floats
+    How it works:
+    1. Parse the string in 'eval' mode (raises SyntaxError on malformed input).
+    2. Reject any node type, name, call or constant that is not explicitly allowed.
+    3. Convert integer constants to floats so constant sub-expressions follow float semantics
+       and cannot build huge Python integers (e.g. 9**9**9).
+    """
+    @staticmethod
+    def parse_expression(expression: str, parameters=()):
+        tree = ast.parse(expression, mode="eval")
+        for node in ast.walk(tree):
+            if not isinstance(node, ExpressionParser.ALLOWED_NODES):
+                raise ValueError(f"Expression contains unsupported syntax: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and (isinstance(node.value, bool)
+                                                   or not isinstance(node.value, (int, float))):
+                raise ValueError(f"Expression contains unsupported constant: {node.value!r}")
+            if isinstance(node, ast.Call):
+                if (not isinstance(node.func, ast.Name)
+                        or node.func.id not in ExpressionParser.ALLOWED_FUNCTIONS
+                        or len(node.args) != 1 or node.keywords):
+                    raise ValueError("Expression contains an unsupported function call.")
+            if isinstance(node, ast.Name) and node.id != ExpressionParser.VARIABLE and node.id not in parameters:
+                if node.id not in ExpressionParser.ALLOWED_FUNCTIONS:
+                    raise ValueError(f"Expression contains invalid characters: {node.id}")
+        # Function names are only valid in call position
+        called = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id in ExpressionParser.ALLOWED_FUNCTIONS \
+                    and id(node) not in called:
+                raise ValueError(f"Function '{node.id}' must be called with one argument.")
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant):
+                node.value = float(node.value)
+        return tree
+
+    """
+    This method compiles validated expression trees into a plain Python function of x.
+    The allowed functions are bound in the function's globals once, so calling the
+    result does not rebuild any namespace.
+    Parameters:
+    - tree: Expression tree (from parse_expression)
+    - others: More expression trees evaluated by the same function, e.g. the tree of the derivative
+    - parameters: Names of the parameters, which become arguments after x (default: none)
+    Returns:
+    - Function of x (and the parameters) returning the value of tree, or with others a tuple of the values
+      of all trees
+    How it works:
+    1. Fold the constant sub-expressions of all trees (Symbolic.fold_constants).
+    2. Assign every sub-expression that occurs more than once, in any of the trees, to a local
+       variable (Symbolic.eliminate_common_subexpressions), so it is evaluated once per call.
+    3. Compile a function that runs these assignments and returns the value(s).
+    """
+    @staticmethod
+    def compile_tree(tree, *others, parameters=()):
+        bodies = [Symbolic.fold_constants(t.body, ExpressionParser.ALLOWED_FUNCTIONS) for t in (tree, *others)]
+        assignments, bodies = Symbolic.eliminate_common_subexpressions(bodies)
+        arguments = ", ".join((ExpressionParser.VARIABLE, *parameters))
+        function = ast.parse(f"def _expression({arguments}): pass").body[0]
+        function.body = [ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value)
+                         for name, value in assignments]
+        result = bodies[0] if not others else ast.Tuple(elts=bodies, ctx=ast.Load())
+        function.body.append(ast.Return(value=result))
+        module = ast.Module(body=[function], type_ignores=[])
+        ast.fix_missing_locations(module)
+        namespace = {"__builtins__": {}, **ExpressionParser.ALLOWED_FUNCTIONS}
+        exec(compile(module, "<expression>", "exec"), namespace)
+        return namespace["_expression"]
+
+    """
+    This method extracts the coefficients of an expression tree that is a polynomial in x.
+    Parameters:
+    - tree: Validated expression tree (from parse_expression)
+    Returns:
+    - Array of coefficients, lowest degree first (numpy.polynomial convention),
+      or None if the expression is not a polynomial of degree <= MAX_POLYNOMIAL_DEGREE
+    How it works:
+    1. Constants and x are degree-0 and degree-1 polynomials (parameters make it no polynomial in x).
+    2. +, - and * combine the polynomials of their operands.
+    3. Division is only allowed by a non-zero constant, powers only with a constant
+       non-negative integer exponent, and sqrt/log10 only of constants.
+    4. Anything else (x in a denominator, exponent or function argument) is not a polynomial.
+    """
+    @staticmethod
+    def polynomial_coefficients(tree):
+        try:
+            with np.errstate(all="ignore"):
+                coefficients = ExpressionParser._polynomial(tree.body)
+        except (ZeroDivisionError, OverflowError):
+            return None
+        if coefficients is None or not np.all(np.isfinite(coefficients)):
+            return None
+        return coefficients
+
+    # Recursive helper of polynomial_coefficients: returns coefficients or None.
+    @staticmethod
+    def _polynomial(node):
+        if isinstance(node, ast.Constant):
+            return np.array([node.value])
+        if isinstance(node, ast.Name):
+            return np.array([0.0, 1.0]) if node.id == ExpressionParser.VARIABLE else None
+        if isinstance(node, ast.UnaryOp):
+            operand = ExpressionParser._polynomial(node.operand)
+            if operand is None:
+                return None
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.Call):
+            argument = ExpressionParser._polynomial(node.args[0])
+            if argument is None or len(argument) != 1:
+                return None
+            return np.array([ExpressionParser.ALLOWED_FUNCTIONS[node.func.id](argument[0])])
+
+        left = ExpressionParser._polynomial(node.left)
+        right = ExpressionParser._polynomial(node.right)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, ast.Add):
+            result = P.polyadd(left, right)
+        elif isinstance(node.op, ast.Sub):
+            result = P.polysub(left, right)
+        elif isinstance(node.op, ast.Mult):
+            if len(left) + len(right) - 2 > ExpressionParser.MAX_POLYNOMIAL_DEGREE:
+                return None
+            result = P.polymul(left, right)
+        elif isinstance(node.op, ast.Div):
+            if len(right) != 1 or right[0] == 0:
+                return None
+            result = left / right[0]
+        else:
+            if len(right) != 1:
+                return None
+            exponent = right[0]
+            if len(left) == 1:
+                return np.array([left[0] ** exponent])
+            if exponent < 0 or exponent != int(exponent) \
+                    or (len(left) - 1) * exponent > ExpressionParser.MAX_POLYNOMIAL_DEGREE:
+                return None
+            result = P.polypow(left, int(exponent))
+        return P.polytrim(result) if len(result) > 1 else result
+
+
+"""
+A compiled expression returned by ExpressionParser.convert_expr_to_function.
+It is called like a function: f(x) with a scalar returns a float, f(x) with an array
+returns an array of the same shape in a single vectorized evaluation.
+Non-finite results (division by zero, invalid sqrt/log10 arguments, overflow) are NaN.
+An expression with parameters takes their values as keyword arguments, scalars or arrays that broadcast
+against x: f(xs, a=2.0) evaluates one curve, f(xs[None, :], a=values[:, None]) a grid with one row per value.
+derivative() returns f' as another CompiledExpression, built symbolically on first use, and
+with_derivative(x) evaluates f and f' together, computing their shared sub-expressions once.
+interval(lower, upper) bounds f over boxes of x with interval arithmetic (see Interval).
+Instances pickle by expression text, so they can be sent to worker processes.
+"""
+class CompiledExpression:
+    # Provides with_derivative (FxSolver uses the derivative instead of finite differences)
+    differentiable = True
+
+    def __init__(self, expression: str, tree, antiderivative=None, parameters=()):
+        self.expression = expression
+        self.tree = tree
+        # Names of the parameters, passed as keyword arguments after x
+        self.parameters = tuple(parameters)
+        self._function = ExpressionParser.compile_tree(tree, parameters=self.parameters)
+        self._polynomial = False
+        self._derivative = None
+        self._with_derivative = None
+        self._folded = None
+        # The expression this one is the derivative of, if any (for pickling)
+        self._antiderivative = antiderivative
+
+    def __call__(self, x, **parameters):
+        values = np.asarray(x, dtype=float)
+        arguments = self._arguments(parameters)
+        return CompiledExpression._result(CompiledExpression._run(self._function, values, *arguments),
+                                          values, *arguments)
+
+    # The derivative with respect to x (parameters are constants), as a CompiledExpression; built on first use.
+    def derivative(self):
+        if self._derivative is None:
+            body = Symbolic.fold_constants(self.tree.body, ExpressionParser.ALLOWED_FUNCTIONS)
+            body = Symbolic.differentiate(body, ExpressionParser.VARIABLE, self.parameters)
+            body = Symbolic.fold_constants(body, ExpressionParser.ALLOWED_FUNCTIONS)
+            self._derivative = CompiledExpression(Symbolic.to_source(body), ast.Expression(body=body), self,
+                                                  self.parameters)
+        return self._derivative
+
+    """
+    Evaluates the expression and its derivative at x in one call.
+    Returns:
+    - Tuple (f(x), f'(x)), both like the result of f(x)
+    Sub-expressions shared by f and f' (e.g. sqrt(u) in sqrt(u) and u' / (2 * sqrt(u))) are computed once.
+    """
+    def with_derivative(self, x, **parameters):
+        if self._with_derivative is None:
+            self._with_derivative = ExpressionParser.compile_tree(self.tree, self.derivative().tree,
+                                                                  parameters=self.parameters)
+        values = np.asarray(x, dtype=float)
+        arguments = self._arguments(parameters)
+        result = CompiledExpression._run(self._with_derivative, values, *arguments)
+        if not isinstance(result, tuple):
+            # A constant part of f' failed to evaluate; evaluate f on its own
+            return self(x, **parameters), self.derivative()(x, **parameters)
+        return (CompiledExpression._result(result[0], values, *arguments),
+                CompiledExpression._result(result[1], values, *arguments))
+
+    # Bounds of f(x) for x in every box [lower, upper] (arrays), see Interval.evaluate.
+    def interval(self, lower, upper):
+        if self._folded is None:
+            self._folded = Symbolic.fold_constants(self.tree.body, ExpressionParser.ALLOWED_FUNCTIONS)
+        return Interval.evaluate(self._folded, lower, upper, ExpressionParser.VARIABLE)
+
+    # The values of the parameters as arrays, in the order of self.parameters; all of them must be given.
+    def _arguments(self, parameters):
+        if not parameters and not self.parameters:
+            return ()
+        missing = [name for name in self.parameters if name not in parameters]
+        if missing:
+            raise ValueError(f"Missing values for parameters: {', '.join(missing)}")
+        unknown = [name for name in parameters if name not in self.parameters]
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+        return tuple(np.asarray(parameters[name], dtype=float) for name in self.parameters)
+
+    # Calls a compiled function; constant sub-expressions that fail to evaluate make the result NaN.
+    @staticmethod
+    def _run(function, values, *arguments):
+        try:
+            with np.errstate(all="ignore"):
+                return function(values, *arguments)
+        except (ZeroDivisionError, ValueError, OverflowError):
+            # Only constant sub-expressions evaluate with Python floats and can raise
+            return np.nan
+        except Exception as e:
+            raise ValueError(f"Error evaluating expression: {e}")
+
+    # Converts the value of a compiled function to a float or an array shaped like values (broadcast with the
+    # parameter arguments).
+    @staticmethod
+    def _result(result, values, *arguments):
+        if np.iscomplexobj(result):
+            result = np.nan
+        result = np.asarray(result, dtype=float)
+        shape = np.broadcast_shapes(values.shape, *(argument.shape for argument in arguments)) \
+            if arguments else values.shape
+        if result.shape != shape:
+            # Constant expressions (e.g. "5") do not depend on x
+            result = np.broadcast_to(result, shape)
+        if result is values or any(result is argument for argument in arguments) or not result.flags.writeable:
+            result = result.copy()
+        result[~np.isfinite(result)] = np.nan
+        if result.ndim == 0:
+            return float(result)
+        return result
+
+    # Polynomial coefficients in x (lowest degree first), or None; computed on first use.
+    def polynomial(self):
+        if self._polynomial is False:
+            self._polynomial = ExpressionParser.polynomial_coefficients(self.tree)
+        return self._polynomial
+
+    def __reduce__(self):
+        if self._antiderivative is not None:
+            return CompiledExpression.derivative, (self._antiderivative,)
+        if self.parameters:
+            return ExpressionParser.convert_expr_to_function, (self.expression, self.parameters)
+        return ExpressionParser.convert_expr_to_function, (self.expression,)
+
+    def __repr__(self):
+        if self.parameters:
+            return f"CompiledExpression({self.expression!r}, parameters={self.parameters!r})"
+        return f"CompiledExpression({self.expression!r})"
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+"""
+A persistent, size-bounded LRU cache of solve results in a SQLite file, shared by every process that
+opens the same path (the GUI, the command line and batch scripts), so repeating a solve is near-instant.
+Values are JSON-serializable (FxSolver stores roots as [x, y, multiplicity] lists) and keys are
+SHA-256 digests of JSON-serializable parts (see key; FxSolver.cache_key builds them from the normalized
+expressions, the range, the settings and FxSolver.VERSION).
+- The database runs in WAL mode, so readers never block each other or the writer, and writers wait
+  up to TIMEOUT seconds for each other; every insert and its eviction run in one transaction.
+- Entries remember when they were last used; beyond max_entries the least recently used are evicted.
+  A hit only notes the time in memory, and the noted times are written together with the next put,
+  eviction or close, or once TOUCH_BATCH hits are pending, so lookups rarely take the write lock.
+- A connection is only used by the process that opened it (it is reopened after a fork) and by one
+  thread at a time.
+- The cache is an optimization: database errors (a locked, full, corrupt or unwritable file) are counted in
+  errors and treated as misses instead of failing the solve.
+sqlite3 is only imported once a cache is used, to keep the import of the solver light.
+It is opt-in: set FXSOLVER_CACHE to the path of the database file (see from_environment),
+pass --cache to the command line, or pass a ResultCache to FxSolver.find_roots(..., cache=...).
+"""
+class ResultCache:
+    DEFAULT_MAX_ENTRIES = 10000
+    # Environment variable holding the path of the shared cache file
+    ENVIRONMENT_VARIABLE = "FXSOLVER_CACHE"
+    # Seconds to wait for another process that holds the write lock
+    TIMEOUT = 10.0
+    # Version of the table layout; files of another version are cleared when opened
+    FORMAT_VERSION = 1
+    # Number of hits whose time of use is kept in memory before get writes them itself
+    TOUCH_BATCH = 256
+
+    # Initialize a cache stored in the file at path (created if missing) holding at most max_entries results
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        if max_entries < 0:
+            raise ValueError("Cache size must not be negative.")
+        self.path = os.fspath(path)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        # Times of use of the hits not written yet, by key
+        self._touched = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    """
+    Returns a ResultCache for the path in the FXSOLVER_CACHE environment variable,
+    or None if it is not set (the cache is opt-in).
+    """
+    @staticmethod
+    def from_environment(environ=None):
+        path = (os.environ if environ is None else environ).get(ResultCache.ENVIRONMENT_VARIABLE)
+        return ResultCache(path) if path else None
+
+    # The key of a list of JSON-serializable parts (floats are written exactly, so equal inputs give equal keys).
+    @staticmethod
+    def key(*parts):
+        text = json.dumps(parts, separators=(",", ":"))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    """
+    Returns the cached value for key and marks it as most recently used,
+    or None (counted as a miss) if the key is not cached.
+    """
+    def get(self, key):
+        import sqlite3
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._touched[key] = time.time_ns()
+                    if len(self._touched) >= self.TOUCH_BATCH:
+                        with self._transaction(connection):
+                            self._flush(connection)
+            except (sqlite3.Error, OSError):
+                self.errors += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    """
+    Stores a value as the most recently used entry, evicting the least recently used
+    entries when the cache is full.
+    """
+    def put(self, key, value):
+        import sqlite3
+        text = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            try:
+                connection = self._connect()
+                with self._transaction(connection):
+                    self._flush(connection)
+                    connection.execute("INSERT OR REPLACE INTO results (key, value, used) VALUES (?, ?, ?)",
+                                       (key, text, time.time_ns()))
+                    self._evict(connection)
+            except (sqlite3.Error, OSError):
+                self.errors += 1
+
+    # Removes all entries (of every process sharing the file) and resets the counters.
+    def clear(self):
+        import sqlite3
+        with self._lock:
+            self._touched.clear()
+            try:
+                connection = self._connect()
+                with self._transaction(connection):
+                    connection.execute("DELETE FROM results")
+            except (sqlite3.Error, OSError):
+                self.errors += 1
+                return
+            self.hits = self.misses = self.evictions = self.errors = 0
+
+    # Maximum number of entries; lowering it evicts the least recently used entries right away.
+    @property
+    def max_entries(self):
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, max_entries):
+        if max_entries < 0:
+            raise ValueError("Cache size must not be negative.")
+        import sqlite3
+        with self._lock:
+            self._max_entries = max_entries
+            try:
+                connection = self._connect()
+                with self._transaction(connection):
+                    self._flush(connection)
+                    self._evict(connection)
+            except (sqlite3.Error, OSError):
+                self.errors += 1
+
+    # Returns a snapshot of the counters of this instance and the current size of the shared file.
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "size": len(self),
+            "max_entries": self._max_entries,
+        }
+
+    # Number of entries in the shared file (0 if it cannot be read).
+    def __len__(self):
+        import sqlite3
+        with self._lock:
+            try:
+                return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except (sqlite3.Error, OSError):
+                self.errors += 1
+                return 0
+
+    # Writes the pending times of use and closes the connection (the cache reopens it when used again).
+    def close(self):
+        import sqlite3
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                if self._touched:
+                    try:
+                        with self._transaction(self._connection):
+                            self._flush(self._connection)
+                    except sqlite3.Error:
+                        self.errors += 1
+                self._connection.close()
+            self._connection = None
+            self._touched.clear()
+
+    def __repr__(self):
+        return f"ResultCache({self.path!r}, max_entries={self._max_entries})"
+
+    """
+    Returns the connection of this process (caller holds the lock), opening it on first use and after
+    a fork: SQLite connections must not be shared between processes.
+    """
+    def _connect(self):
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        import sqlite3
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; writes that must be atomic use _transaction
+        connection = sqlite3.connect(self.path, timeout=self.TIMEOUT, isolation_level=None,
+                                     check_same_thread=False)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._transaction(connection):
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version != self.FORMAT_VERSION:
+                    connection.execute("DROP TABLE IF EXISTS results")
+                    connection.execute(f"PRAGMA user_version = {self.FORMAT_VERSION}")
+                connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                   "(key TEXT PRIMARY KEY, value TEXT NOT NULL, used INTEGER NOT NULL)")
+                connection.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        except sqlite3.Error:
+            connection.close()
+            raise
+        self._connection, self._pid = connection, os.getpid()
+        return connection
+
+    # Context manager running statements in one write transaction, taking the write lock up front.
+    @staticmethod
+    def _transaction(connection):
+        return _Transaction(connection)
+
+    # Writes the pending times of use of the hits (caller holds the lock, inside a transaction).
+    def _flush(self, connection):
+        if self._touched:
+            connection.executemany("UPDATE results SET used = MAX(used, ?) WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    # Drops least recently used entries until the cache fits (caller holds the lock, inside a transaction).
+    def _evict(self, connection):
+        cursor = connection.execute("DELETE FROM results WHERE key IN "
+                                    "(SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                                    (self._max_entries,))
+        self.evictions += max(cursor.rowcount, 0)
+
+
+# BEGIN IMMEDIATE ... COMMIT, or ROLLBACK on an exception (see ResultCache._transaction).
+class _Transaction:
+    __slots__ = ("connection",)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, *exc):
+        self.connection.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        return False
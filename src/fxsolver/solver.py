@@ -1,42 +1,1131 @@
+from collections import namedtuple
+
 import numpy as np
 
+from .interval import Interval
+from .parser import ExpressionParser
+from .result_cache import ResultCache
+from .stats import SolveStats
+
+# Result of one job of FxSolver.find_roots_batch: roots is None when error is set
+BatchResult = namedtuple("BatchResult", ["index", "roots", "error"])
+# Roots of FxSolver.sweep as a struct of arrays, ordered by parameter point: the roots of point i are
+# x[offsets[i]:offsets[i + 1]], rows holds the point of every root, and y = f1(x) at the root
+SweepResult = namedtuple("SweepResult", ["offsets", "rows", "x", "y", "multiplicity"])
+
+
+"""
+Raised by FxSolver.find_roots when its cancel token is set while the solve is running.
+"""
+class SolveCancelled(Exception):
+    pass
+
+
+"""
+An intersection point returned by FxSolver. It is a plain (x, y) tuple, so it unpacks and compares
+like one, with an extra multiplicity attribute: 2 marks a tangent (even-multiplicity) root where
+f1 - f2 touches zero without changing sign, 1 a root found from a sign change or an exact zero.
+The polynomial fast path reports the exact multiplicity of each root.
+"""
+class Root(tuple):
+    def __new__(cls, x, y, multiplicity=1):
+        root = super().__new__(cls, (x, y))
+        root.multiplicity = int(multiplicity)
+        return root
+
+    def __getnewargs__(self):
+        return self[0], self[1], self.multiplicity
+
+    @property
+    def x(self):
+        return self[0]
+
+    @property
+    def y(self):
+        return self[1]
+
+
+"""
+The difference g(x) = f1(x) - f2(x) whose roots FxSolver finds. When f1 and f2 both provide their
+symbolic derivatives (functions from ExpressionParser do), g is differentiable: with_derivative(x)
+evaluates g and g' together and derivative() returns g', which Newton's method, tangent detection and
+adaptive sampling use instead of finite differences. When both can be bounded with interval arithmetic
+(functions from ExpressionParser can), interval(lower, upper) bounds g over boxes for interval sampling.
+It pickles with f1 and f2 for worker processes.
+"""
+class Difference:
+    def __init__(self, f1, f2):
+        self.f1 = f1
+        self.f2 = f2
+        self.differentiable = all(getattr(f, "differentiable", False) for f in (f1, f2))
+        self.bounded = all(callable(getattr(f, "interval", None)) and not getattr(f, "parameters", ())
+                           for f in (f1, f2))
+
+    def __call__(self, x):
+        return self.f1(x) - self.f2(x)
+
+    # The derivative g' = f1' - f2' (only for differentiable differences).
+    def derivative(self):
+        return Difference(self.f1.derivative(), self.f2.derivative())
+
+    # Returns (g(x), g'(x)) (only for differentiable differences).
+    def with_derivative(self, x):
+        g1, d1 = self.f1.with_derivative(x)
+        g2, d2 = self.f2.with_derivative(x)
+        return g1 - g2, d1 - d2
+
+    # Bounds of g over the boxes [lower, upper] (only for bounded differences, see Interval).
+    def interval(self, lower, upper):
+        with np.errstate(all="ignore"):
+            return Interval.subtract(self.f1.interval(lower, upper), self.f2.interval(lower, upper))
+
+
+"""
+The difference g(x; p) = f1(x; p) - f2(x; p) of a parameter sweep (see FxSolver.sweep) at many parameter
+points: values maps every parameter name to an array with one value per point, and g(x, points) evaluates g
+at x with the parameters of the given point indices. x and points broadcast, so x of shape (1, n) and points
+of shape (m, 1) evaluate the (m, n) grid in one call. Functions from ExpressionParser receive the parameters
+they declare, other callables all of them as keyword arguments.
+"""
+class ParametricDifference:
+    def __init__(self, f1, f2, values):
+        self.f1 = f1
+        self.f2 = f2
+        self.values = values
+        self.differentiable = all(getattr(f, "differentiable", False) for f in (f1, f2))
+        self._names = [ParametricDifference._names(f, values) for f in (f1, f2)]
+
+    def __call__(self, x, points):
+        return self.f1(x, **self._select(0, points)) - self.f2(x, **self._select(1, points))
+
+    # Returns (g(x), g'(x)) with the derivative in x (only for differentiable differences).
+    def with_derivative(self, x, points):
+        g1, d1 = self.f1.with_derivative(x, **self._select(0, points))
+        g2, d2 = self.f2.with_derivative(x, **self._select(1, points))
+        return g1 - g2, d1 - d2
+
+    # f1(x) with the parameters of the given points.
+    def first(self, x, points):
+        return self.f1(x, **self._select(0, points))
+
+    # The keyword arguments of f1 (which=0) or f2 (which=1) for the given points.
+    def _select(self, which, points):
+        return {name: self.values[name][points] for name in self._names[which]}
+
+    # The parameters passed to f: the ones it declares, or all of them.
+    @staticmethod
+    def _names(f, values):
+        declared = getattr(f, "parameters", None)
+        if declared is None:
+            return tuple(values)
+        missing = [name for name in declared if name not in values]
+        if missing:
+            raise ValueError(f"Missing values for parameters: {', '.join(missing)}")
+        return tuple(declared)
+
 """
 A solver to find intersection points (roots) between two mathematical functions.
 """
 class FxSolver:
+    # Version of the results of the solver, part of the ResultCache keys: bump it when a change makes
+    # the solver find different roots for the same inputs, so results cached by older versions are not used
+    VERSION = 1
     NEAR_ZERO = 1e-9
+    MAX_ITERATIONS = 100
+    # Relative tolerance added to NEAR_ZERO so convergence is reachable for large |x|
+    RELATIVE_TOLERANCE = 4 * np.finfo(float).eps
+
+    # Root refinement methods selectable in find_roots, mapped to their batched implementations
+    METHODS = {
+        "bisect": "_bisection",
+        "brent": "_brent",
+        "illinois": "_illinois",
+        "newton": "_newton",
+    }
+
+    # Sampling strategies selectable in find_roots
+    SAMPLINGS = ("uniform", "adaptive", "interval")
+    # Adaptive sampling: size of the initial coarse grid, evaluation budget and smallest cell width
+    # (interval sampling uses the budget and the smallest width for its boxes)
+    ADAPTIVE_INITIAL_STEPS = 257
+    ADAPTIVE_BUDGET = 5000
+    ADAPTIVE_MIN_WIDTH = 1e-6
+    # Interval sampling: number of parts a box that may contain a root is split into (fewer levels of
+    # branch and bound, each bounding more boxes at once), and fewest samples in every remaining box
+    # as long as all boxes together stay within steps samples
+    INTERVAL_SPLIT = 16
+    INTERVAL_BOX_STEPS = 8
+
+    # Parallel solving: executors selectable in find_roots (class names in concurrent.futures,
+    # which is only imported once a pool is needed, to keep the import of this module light),
+    # chunks per worker for load balancing and the smallest number of sample pairs worth sending to a worker
+    EXECUTORS = {
+        "process": "ProcessPoolExecutor",
+        "thread": "ThreadPoolExecutor",
+    }
+    CHUNKS_PER_WORKER = 4
+    MIN_CHUNK_PAIRS = 10000
+    # Batch solving: defaults for jobs that only give expressions, and jobs per worker task
+    DEFAULT_RANGE = (-10, 10)
+    DEFAULT_STEPS = 5000
+    BATCH_TASK_SIZE = 64
+    # Polynomial fast path: tolerance on the imaginary part of eigenvalue roots, on the residual
+    # (relative to the size of the terms, also used for the derivatives at a multiple root),
+    # and the maximum number of Newton polishing steps
+    POLYNOMIAL_IMAG_TOLERANCE = 1e-3
+    POLYNOMIAL_RESIDUAL_TOLERANCE = 1e3 * np.finfo(float).eps
+    POLYNOMIAL_POLISH_STEPS = 8
+    # An eigenvalue is a simple root when its Newton correction is below this fraction of the distance
+    # to the nearest other eigenvalue (the eigenvalues of a multiple root are about as far apart as their
+    # Newton corrections)
+    POLYNOMIAL_SEPARATION = 1e-3
+    # Tangent detection: how close to zero the parabola through a local minimum of |g| must come
+    # (relative to the sampled value), and the largest |g| at the minimum accepted as touching zero,
+    # relative to the neighbouring samples or, for rounding error, in ulps of f1 and f2 there
+    TANGENT_RATIO = 0.5
+    TANGENT_TOLERANCE = 1e-9
+    TANGENT_ULPS = 32
+    # Cancellable solves: samples evaluated between two cancellation checks, and the share
+    # of the reported progress that covers sampling (the rest covers the scan)
+    SAMPLE_CHUNK = 65536
+    SAMPLING_PROGRESS = 0.9
+    # Parameter sweeps: samples of the (parameter point x sample) grid evaluated in one broadcast pass
+    SWEEP_BLOCK = 1 << 20
 
     """
     This method finds the intersection points (roots) between two functions f1 and f2
-    within the specified range [x_min, x_max] using a sampling and bisection method.
+    within the specified range [x_min, x_max] using a sampling and bracket refinement method.
     Parameters:
     - f1: First function (callable)
     - f2: Second function (callable)
     - x_min: Minimum x value of the range (default: -10)
     - x_max: Maximum x value of the range (default: 10)
     - steps: Number of sampling steps (default: 5000)
+    - method: Bracket refinement method, one of METHODS (default: "bisect")
+        - "bisect": plain bisection, gains one bit per iteration
+        - "brent": Brent's method (inverse quadratic interpolation with bisection fallback)
+        - "illinois": Illinois variant of regula falsi
+        - "newton": Newton's method safeguarded by bisection, using the symbolic derivatives of f1 and f2
+          when both provide one (functions from ExpressionParser do) and finite differences otherwise
+    - xtol: Absolute tolerance on the root position (default: NEAR_ZERO)
+    - rtol: Relative tolerance on the root position (default: RELATIVE_TOLERANCE)
+    - maxiter: Maximum number of refinement iterations per bracket (default: MAX_ITERATIONS)
+    - sampling: Sampling strategy, one of SAMPLINGS (default: "uniform")
+        - "uniform": steps evenly spaced samples
+        - "adaptive": coarse grid refined where a root may hide (steps is not used); with differentiable
+          functions the slopes from their symbolic derivatives also guide the refinement
+        - "interval": branch and bound with interval arithmetic discards the parts of the range that
+          provably contain no root, and only the remaining boxes are sampled (with at least the density of
+          steps uniform samples over the range, but never more than steps samples); needs functions from
+          ExpressionParser
+    - budget: Maximum number of g evaluations for adaptive sampling, and of interval evaluations (boxes)
+      for interval sampling (default: ADAPTIVE_BUDGET)
+    - min_width: Smallest cell width adaptive sampling subdivides to, and smallest box width interval
+      sampling splits to (default: ADAPTIVE_MIN_WIDTH)
+    - workers: Number of parallel workers for uniform sampling; None or 1 solves serially (default: None)
+    - executor: "process" or "thread" pool used when workers > 1 (default: "process").
+      Process workers receive f1 and f2 by pickling; functions from ExpressionParser are rebuilt
+      from their expression strings, other callables must be picklable.
+      Thread workers share the functions and scale because NumPy releases the GIL on large arrays.
+    - polynomial: Solve directly when f1 - f2 is a polynomial in x (default: True)
+    - tangents: Also report roots where f1 - f2 touches zero without a sign change (default: True)
+    - cancel: Cancel token with an is_set() method, e.g. threading.Event (default: None).
+      It is checked between chunks of work; once set, find_roots raises SolveCancelled.
+    - progress: Callable receiving the completed fraction of the solve, from 0 to 1 (default: None)
+    - samples: Precomputed samples on a sorted grid covering [x_min, x_max], either (x_vals, g_vals) of
+      f1 - f2 or (x_vals, f1_vals, f2_vals), e.g. from IncrementalSampler or an earlier solve (default: None).
+      Sampling is skipped (steps, sampling, budget, min_width and workers are not used)
+      and only roots inside [x_min, x_max] are reported.
+    - return_samples: Also return the samples of f1 and f2, e.g. for plotting them (default: False)
+    - stats: SolveStats to record phase timings and counters into (default: None, or the SolveStats
+      already recording on this thread)
+    - cache: ResultCache to look the roots up in before solving and to store them in afterwards
+      (default: None). Only functions from ExpressionParser are cached (see cache_key), and solves
+      given samples are neither looked up nor stored, as their roots depend on the samples.
     Returns:
-    - List of tuples representing the intersection points (x, y)
+    - List of Root tuples representing the intersection points (x, y);
+      root.multiplicity is 2 for tangent roots
+    - With return_samples, a tuple (roots, samples): samples is (x_vals, f1_vals, f2_vals) when the
+      solve sampled f1 and f2 on a uniform grid (or was given them), and None otherwise
+      (polynomial fast path, adaptive, interval or parallel solving, or a cached result)
     
     How it works:
+    0. If f1 and f2 are both polynomials (see ExpressionParser.polynomial_coefficients), the real roots
+       of f1 - f2 in the range are computed directly from the companion matrix eigenvalues.
+       This also finds roots without a sign change (e.g. double roots); the steps below are skipped.
     1. Define a new function g(x) = f1(x) - f2(x).
-    2. Sample g(x) over the range [x_min, x_max] with the specified number of steps.
-    3. Scan through the sampled values to detect sign changes, which indicate potential roots.
-    4. For each detected sign change, use the bisection method to find the root more accurately.
+    2. Sample g(x) over the range [x_min, x_max] with the specified number of steps,
+       or adaptively within the evaluation budget.
+    3. Scan through the sampled values to detect sign changes, which indicate potential roots,
+       and local minima of |g| that approach zero, which indicate tangent roots.
+    4. Refine all detected sign changes together with the selected method to find the roots more accurately,
+       and confirm tangent candidates by minimizing |g| around them.
     5. Return a list of (x, y) pairs where the functions intersect.
     6. If no intersections are found, an empty list is returned.
     """
     @staticmethod
-    def find_roots(f1, f2, x_min=-10, x_max=10, steps=5000):
+    def find_roots(f1, f2, x_min=-10, x_max=10, steps=5000, method="bisect",
+                   xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS,
+                   sampling="uniform", budget=ADAPTIVE_BUDGET, min_width=ADAPTIVE_MIN_WIDTH,
+                   workers=None, executor="process", polynomial=True, tangents=True,
+                   cancel=None, progress=None, samples=None, return_samples=False, stats=None, cache=None):
+        with SolveStats.recording(stats), SolveStats.phase("solve"):
+            key = None
+            if cache is not None and samples is None:
+                key = FxSolver.cache_key(f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter, sampling,
+                                         budget, min_width, polynomial, tangents)
+                roots = FxSolver.cached_roots(cache, key)
+                if roots is not None:
+                    FxSolver._checkpoint(cancel, progress, 1.0)
+                    return (roots, None) if return_samples else roots
+            result = FxSolver._find_roots(f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter, sampling,
+                                          budget, min_width, workers, executor, polynomial, tangents, cancel,
+                                          progress, samples, return_samples)
+            if key is not None:
+                FxSolver.cache_roots(cache, key, result[0] if return_samples else result)
+            return result
+
+    # The body of find_roots, which times it as the "solve" phase.
+    @staticmethod
+    def _find_roots(f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter, sampling, budget, min_width,
+                    workers, executor, polynomial, tangents, cancel, progress, samples, return_samples):
+        if method not in FxSolver.METHODS:
+            raise ValueError(f"Unknown root refinement method: {method}")
+        if sampling not in FxSolver.SAMPLINGS:
+            raise ValueError(f"Unknown sampling strategy: {sampling}")
+        if executor not in FxSolver.EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
+        FxSolver._checkpoint(cancel, progress, 0.0)
+        if polynomial:
+            coefficients = FxSolver._difference_polynomial(f1, f2)
+            if coefficients is not None:
+                with SolveStats.phase("polynomial"):
+                    roots = FxSolver._polynomial_roots(coefficients, f1, x_min, x_max)
+                FxSolver._checkpoint(cancel, progress, 1.0)
+                return (roots, None) if return_samples else roots
+        if samples is not None:
+            roots = FxSolver._find_roots_in_samples(f1, f2, x_min, x_max, samples, method, xtol, rtol, maxiter,
+                                                    tangents, cancel, progress)
+            return (roots, tuple(samples) if len(samples) == 3 else None) if return_samples else roots
+        if workers is not None and workers > 1:
+            if sampling != "uniform":
+                raise ValueError("Parallel solving requires uniform sampling.")
+            with SolveStats.phase("parallel"):
+                roots = FxSolver._find_roots_parallel(f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter,
+                                                      tangents, workers, executor, cancel, progress)
+            FxSolver._checkpoint(cancel, progress, 1.0)
+            return (roots, None) if return_samples else roots
+
         # Define the difference function g(x) = f1(x) - f2(x)
-        def g(x):
-            return f1(x) - f2(x)
+        g = Difference(f1, f2)
 
         # Sample g(x) over the specified range
-        x_vals, g_vals = FxSolver._sample_function(g, x_min, x_max, steps)
+        samples = None
+        if sampling == "adaptive":
+            x_vals, g_vals = FxSolver._sample_adaptive(g, x_min, x_max, budget, min_width, cancel, progress)
+        elif sampling == "interval":
+            if not g.bounded:
+                raise ValueError("Interval sampling requires functions from ExpressionParser.")
+            x_vals, g_vals = FxSolver._sample_interval(g, x_min, x_max, steps, budget, min_width, cancel, progress)
+        elif return_samples:
+            # Keep f1 and f2 separately, g follows from them without evaluating anything again
+            samples = FxSolver._sample_functions(f1, f2, x_min, x_max, steps, cancel, progress)
+            x_vals, g_vals = samples[0], samples[1] - samples[2]
+        else:
+            x_vals, g_vals = FxSolver._sample_function(g, x_min, x_max, steps, cancel, progress)
         # Scan for roots in the sampled values
-        roots = FxSolver._scan_for_roots(x_vals, g_vals, f1, g)
-        return roots  # list of (x, y) pairs
+        roots = FxSolver._scan_for_roots(x_vals, g_vals, f1, g, method, xtol, rtol, maxiter, tangents)
+        FxSolver._checkpoint(cancel, progress, 1.0)
+        return (roots, samples) if return_samples else roots  # list of (x, y) pairs
+
+    """
+    This helper method scans precomputed samples for find_roots(samples=...) and keeps the roots
+    inside [x_min, x_max] (the samples may extend past the range).
+    """
+    @staticmethod
+    def _find_roots_in_samples(f1, f2, x_min, x_max, samples, method, xtol, rtol, maxiter, tangents,
+                               cancel=None, progress=None):
+        g = Difference(f1, f2)
+        if len(samples) not in (2, 3):
+            raise ValueError("Samples must be (x_vals, g_vals) or (x_vals, f1_vals, f2_vals).")
+        arrays = [np.asarray(values, dtype=float) for values in samples]
+        if any(values.shape != arrays[0].shape for values in arrays) or arrays[0].ndim != 1:
+            raise ValueError("Samples must be one-dimensional arrays of the same length.")
+        x_vals = arrays[0]
+        g_vals = arrays[1] if len(arrays) == 2 else arrays[1] - arrays[2]
+        FxSolver._checkpoint(cancel, progress, FxSolver.SAMPLING_PROGRESS)
+        roots = FxSolver._scan_for_roots(x_vals, g_vals, f1, g, method, xtol, rtol, maxiter, tangents)
+        left, right = min(x_min, x_max), max(x_min, x_max)
+        roots = [root for root in roots if left <= root[0] <= right]
+        FxSolver._checkpoint(cancel, progress, 1.0)
+        return roots
+
+    """
+    This helper method is a cancellation point of find_roots: it raises SolveCancelled if the
+    cancel token is set, and otherwise reports the completed fraction to the progress callback.
+    """
+    @staticmethod
+    def _checkpoint(cancel, progress, fraction):
+        if cancel is not None and cancel.is_set():
+            raise SolveCancelled("Solve was cancelled.")
+        if progress is not None:
+            progress(fraction)
+
+    """
+    This method finds the same roots as find_roots with uniform sampling, but yields them as they are found,
+    walking the range in chunks so its memory use does not grow with steps.
+    Parameters:
+    - f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter, polynomial, tangents: Same as find_roots
+    - chunk_size: Number of sample pairs sampled and scanned at a time (default: SAMPLE_CHUNK)
+    - cancel, progress: Cancel token and progress callback (see find_roots); they are checked and
+      called after every chunk
+    - cache: ResultCache shared with find_roots (default: None); cached roots are yielded right away,
+      and the roots are stored once the iteration completes
+    Returns:
+    - Iterator of Root tuples in increasing order of x (the order of the range); a SolveStats recording
+      around the loop over it records the sampling and scanning of every chunk
+    How it works:
+    1. If f1 - f2 is a polynomial (and polynomial is set), yield its roots from the fast path of find_roots.
+    2. Split the steps - 1 pairs of consecutive samples of the uniform grid into chunks of chunk_size pairs.
+    3. Sample each chunk together with one neighbouring sample on each side, as parallel solving does,
+       carrying the samples it shares with the previous chunk over instead of evaluating them again.
+    4. Scan the chunk, keeping the roots of the pairs it owns, and yield them before sampling the next chunk.
+    """
+    @staticmethod
+    def iter_roots(f1, f2, x_min=-10, x_max=10, steps=5000, method="bisect",
+                   xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS,
+                   polynomial=True, tangents=True, chunk_size=SAMPLE_CHUNK, cancel=None, progress=None, cache=None):
+        if method not in FxSolver.METHODS:
+            raise ValueError(f"Unknown root refinement method: {method}")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1.")
+        settings = (method, xtol, rtol, maxiter, tangents)
+        return FxSolver._iter_roots(f1, f2, x_min, x_max, steps, settings, polynomial, chunk_size, cancel, progress,
+                                    cache)
+
+    """
+    This helper method is the generator behind iter_roots (kept separate so that arguments are validated
+    when iter_roots is called): it serves the roots from the cache or streams them from _stream_roots.
+    """
+    @staticmethod
+    def _iter_roots(f1, f2, x_min, x_max, steps, settings, polynomial, chunk_size, cancel, progress, cache):
+        key = None
+        if cache is not None:
+            method, xtol, rtol, maxiter, tangents = settings
+            key = FxSolver.cache_key(f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter,
+                                     polynomial=polynomial, tangents=tangents)
+            roots = FxSolver.cached_roots(cache, key)
+            if roots is not None:
+                FxSolver._checkpoint(cancel, progress, 1.0)
+                yield from roots
+                return
+        found = []
+        for root in FxSolver._stream_roots(f1, f2, x_min, x_max, steps, settings, polynomial, chunk_size,
+                                           cancel, progress):
+            if key is not None:
+                found.append(root)
+            yield root
+        FxSolver.cache_roots(cache, key, found)
+
+    # Solves chunk by chunk, yielding the roots of each chunk as soon as it is scanned (see iter_roots).
+    @staticmethod
+    def _stream_roots(f1, f2, x_min, x_max, steps, settings, polynomial, chunk_size, cancel, progress):
+        FxSolver._checkpoint(cancel, progress, 0.0)
+        if polynomial:
+            coefficients = FxSolver._difference_polynomial(f1, f2)
+            if coefficients is not None:
+                with SolveStats.phase("polynomial"):
+                    roots = FxSolver._polynomial_roots(coefficients, f1, x_min, x_max)
+                FxSolver._checkpoint(cancel, progress, 1.0)
+                yield from roots
+                return
+
+        g = Difference(f1, f2)
+        pairs = steps - 1
+        # Samples of the previous chunk, which start at index sampled of the grid
+        x_vals = g_vals = np.empty(0)
+        sampled = 0
+        for start in range(0, pairs, chunk_size):
+            stop = min(start + chunk_size, pairs)
+            first, end = max(start - 1, 0), min(stop + 2, steps)
+            with SolveStats.phase("sampling"):
+                new_x = FxSolver._grid(x_min, x_max, steps, sampled + x_vals.size, end)
+                x_vals = np.concatenate((x_vals[first - sampled:], new_x))
+                g_vals = np.concatenate((g_vals[first - sampled:], FxSolver._evaluate(g, new_x)))
+            sampled = first
+            roots = FxSolver._scan_for_roots(x_vals, g_vals, f1, g, *settings, pairs=(start - first, stop - 1 - first))
+            FxSolver._checkpoint(cancel, progress, stop / pairs)
+            yield from roots
+
+    """
+    This method solves a family of equations f1(x; p) = f2(x; p) for many values of its parameters p.
+    Parameters:
+    - f1, f2: Functions from ExpressionParser.convert_expr_to_function(expression, parameters), or callables
+      f(x, **parameters) that broadcast x against arrays of parameter values
+    - parameters: Dict of parameter name -> values; the values broadcast to one shape, and every element of it
+      (in C order) is one parameter point, so e.g. the arrays of np.meshgrid sweep a grid of two parameters
+    - x_min, x_max, steps: Range and number of samples of x for every point (see find_roots)
+    - xtol, rtol, maxiter: Refinement tolerances and iteration limit (see find_roots)
+    - continuation: Start the refinement of the roots from the roots of neighbouring parameter points
+      (default: False), see How it works
+    - cancel, progress: Cancel token and progress callback (see find_roots), checked and called after every
+      block of points
+    - stats: SolveStats to record into (see find_roots)
+    Returns:
+    - SweepResult of arrays: offsets (one more than there are points), rows, x, y and multiplicity
+      (sweeps report the roots at sign changes and exact zeros, so it is always 1; tangent roots need find_roots)
+    How it works:
+    1. Evaluate g(x; p) = f1(x; p) - f2(x; p) on the (point x sample) grid in blocks of SWEEP_BLOCK samples,
+       each with one broadcast call, and find the sign changes and exact zeros of every row of a block at once.
+    2. Refine the brackets with Newton's method safeguarded by bisection (_sweep_newton), using the symbolic
+       derivatives of functions from ExpressionParser and finite differences otherwise.
+    3. Without continuation, Newton starts every bracket at its secant (regula falsi) point, and all brackets
+       of a block are refined together.
+    4. With continuation, the points of a block are refined in waves of a binary subdivision, and a bracket
+       starts at the roots the neighbouring points solved before have in the same sample interval
+       (_sweep_continuation). Roots that move slowly with the parameters then need fewer Newton steps, which
+       saves evaluations of expensive functions on coarse grids; for expressions the batched refinement is
+       faster, since the waves refine fewer brackets per call.
+    """
+    @staticmethod
+    def sweep(f1, f2, parameters, x_min=-10, x_max=10, steps=5000, xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE,
+              maxiter=MAX_ITERATIONS, continuation=False, cancel=None, progress=None, stats=None):
+        with SolveStats.recording(stats), SolveStats.phase("sweep"):
+            return FxSolver._sweep(f1, f2, parameters, x_min, x_max, steps, xtol, rtol, maxiter, continuation,
+                                   cancel, progress)
+
+    # The body of sweep, which times it as the "sweep" phase.
+    @staticmethod
+    def _sweep(f1, f2, parameters, x_min, x_max, steps, xtol, rtol, maxiter, continuation, cancel, progress):
+        if steps < 2:
+            raise ValueError("A sweep needs at least 2 steps.")
+        g = ParametricDifference(f1, f2, FxSolver._sweep_values(parameters))
+        points = next(iter(g.values.values())).size
+        x_vals = FxSolver._grid(x_min, x_max, steps)
+        block = max(1, FxSolver.SWEEP_BLOCK // steps)
+        FxSolver._checkpoint(cancel, progress, 0.0)
+
+        found_rows, found_pairs, found_x = [], [], []
+        # Roots of the last point of the previous block per sample interval, for continuation
+        previous = None
+        for start in range(0, points, block):
+            rows = np.arange(start, min(start + block, points))
+            with SolveStats.phase("sampling"):
+                g_vals = g(x_vals[np.newaxis, :], rows[:, np.newaxis])
+                SolveStats.evaluated(g_vals.size)
+            with SolveStats.phase("scan"):
+                exact, brackets = FxSolver._sweep_brackets(x_vals, g_vals)
+            bracket_rows, bracket_pairs, lefts, rights, g_lefts, starts = brackets
+            bracket_rows = rows[bracket_rows]
+            exact_rows, exact_pairs, exact_x = exact
+            exact_rows = rows[exact_rows]
+            SolveStats.count("brackets", bracket_rows.size)
+
+            with SolveStats.phase("refine"):
+                if not continuation:
+                    bracket_x = FxSolver._sweep_newton(lefts, rights, g_lefts, starts, g, bracket_rows,
+                                                       xtol, rtol, maxiter)
+                else:
+                    bracket_x, previous = FxSolver._sweep_continuation(
+                        bracket_rows - start, bracket_pairs, lefts, rights, g_lefts, starts, g, bracket_rows,
+                        rows.size, steps - 1, previous, xtol, rtol, maxiter)
+            found_rows += [exact_rows, bracket_rows]
+            found_pairs += [exact_pairs, bracket_pairs]
+            found_x += [exact_x, bracket_x]
+            FxSolver._checkpoint(cancel, progress, (rows[-1] + 1) / points)
+
+        rows, pairs, x = (np.concatenate(arrays) for arrays in (found_rows, found_pairs, found_x))
+        order = np.lexsort((x, pairs, rows))
+        rows, x = rows[order], x[order]
+        y = g.first(x, rows) if x.size else np.empty(0)
+        SolveStats.evaluated(x.size)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=points))])
+        return SweepResult(offsets, rows, x, y, np.ones(x.size, dtype=int))
+
+    """
+    This helper method broadcasts the values of the parameters of a sweep to one shape and flattens them.
+    Returns:
+    - Dict of parameter name -> 1-D array with one value per parameter point
+    It raises a ValueError when there are no parameters or their values do not broadcast.
+    """
+    @staticmethod
+    def _sweep_values(parameters):
+        if not parameters:
+            raise ValueError("A sweep needs at least one parameter.")
+        try:
+            arrays = np.broadcast_arrays(*(np.asarray(values, dtype=float) for values in parameters.values()))
+        except ValueError:
+            raise ValueError("Parameter values must broadcast to one shape.")
+        if arrays[0].size == 0:
+            raise ValueError("A sweep needs at least one parameter point.")
+        return {name: np.ravel(array) for name, array in zip(parameters, arrays)}
+
+    """
+    This helper method finds the roots at samples and the sign-change brackets of every row of a grid
+    of g values at once, with the rules of _scan (pairs containing NaN are skipped, a run of exact zeros is
+    reported once, see _zero_runs).
+    Parameters:
+    - x_vals: Array of the n sample positions
+    - g_vals: (rows, n) array of g values
+    Returns:
+    - exact: (rows, pairs, x) arrays of the roots at samples
+    - brackets: (rows, pairs, lefts, rights, g_lefts, starts) arrays of the brackets, ordered by row and pair;
+      starts are the secant (regula falsi) points of the brackets
+    """
+    @staticmethod
+    def _sweep_brackets(x_vals, g_vals):
+        g_left, g_right = g_vals[:, :-1], g_vals[:, 1:]
+        valid = ~(np.isnan(g_left) | np.isnan(g_right))
+        left_zero, right_zero = FxSolver._zero_runs(g_vals, valid)
+        with np.errstate(over="ignore", under="ignore"):
+            crossing = valid & ~(left_zero | right_zero) & (g_left * g_right < 0.0)
+
+        exact_rows, exact_pairs = np.nonzero(left_zero | right_zero)
+        exact_x = np.where(left_zero[exact_rows, exact_pairs], x_vals[exact_pairs], x_vals[exact_pairs + 1])
+        rows, pairs = np.nonzero(crossing)
+        lefts, rights = x_vals[pairs], x_vals[pairs + 1]
+        g_lefts, g_rights = g_left[rows, pairs], g_right[rows, pairs]
+        with np.errstate(all="ignore"):
+            starts = lefts - g_lefts * (rights - lefts) / (g_rights - g_lefts)
+        # The secant point of a bracket with infinite ends is undefined; start at its middle instead
+        starts = np.where(np.isfinite(starts), starts, (lefts + rights) / 2)
+        return (exact_rows, exact_pairs, exact_x), (rows, pairs, lefts, rights, g_lefts, starts)
+
+    """
+    This helper method refines the brackets of a block of parameter points with continuation: the points are
+    refined in waves of a binary subdivision (the first point, then every 2^k-th point, down to every point),
+    and a bracket starts at the root of the neighbouring points solved before in the same sample interval
+    (their average when both neighbours have one) if there is one, and at its starting point otherwise.
+    The first point of the block continues from the last point of the previous block.
+    Parameters:
+    - rows: Point of every bracket within the block (0 to count - 1, ascending)
+    - pairs: Sample interval of every bracket
+    - lefts, rights, g_lefts, starts: Bracket ends, g at the left ends and starting points
+    - g, points: ParametricDifference and parameter point of every bracket (see _sweep_newton)
+    - count: Number of points in the block
+    - intervals: Number of sample intervals
+    - previous: Roots of the last point of the previous block per sample interval (NaN where there is none),
+      or None
+    - xtol, rtol, maxiter: See find_roots
+    Returns:
+    - Tuple (roots, last): the refined roots, and the roots of the last point per sample interval
+    """
+    @staticmethod
+    def _sweep_continuation(rows, pairs, lefts, rights, g_lefts, starts, g, points, count, intervals, previous,
+                            xtol, rtol, maxiter):
+        # solved[r + 1] holds the roots of point r, solved[0] those of the previous block
+        solved = np.full((count + 1, intervals), np.nan)
+        if previous is not None:
+            solved[0] = previous
+        roots = np.empty_like(lefts)
+        # Point r > 0 is refined in the wave of its lowest set bit h, between its neighbours r - h and r + h
+        lowest_bit = rows & -rows
+        stride = 1 << max(count - 1, 1).bit_length()
+        for h in [0] + [stride >> k for k in range(1, stride.bit_length())]:
+            wave = np.flatnonzero(lowest_bit == h)
+            if wave.size == 0:
+                continue
+            row, pair = rows[wave], pairs[wave]
+            lower = solved[row - max(h, 1) + 1, pair]
+            upper = solved[np.minimum(row + h, count - 1) + 1, pair] if h else np.full(wave.size, np.nan)
+            upper = np.where(row + h < count, upper, np.nan)
+            predictions = np.where(np.isnan(lower), upper, np.where(np.isnan(upper), lower, (lower + upper) / 2))
+            left, right = lefts[wave], rights[wave]
+            inside = (predictions > np.minimum(left, right)) & (predictions < np.maximum(left, right))
+            roots[wave] = FxSolver._sweep_newton(left, right, g_lefts[wave],
+                                                 np.where(inside, predictions, starts[wave]), g, points[wave],
+                                                 xtol, rtol, maxiter)
+            solved[row + 1, pair] = roots[wave]
+        return roots, solved[count]
+
+    """
+    This helper method refines brackets of a parameter sweep with Newton's method safeguarded by bisection,
+    like _newton, but from given starting points and with the parameters of each bracket's point.
+    Parameters:
+    - lefts, rights, g_lefts: Bracket ends and g at the left ends
+    - starts: Starting points inside the brackets
+    - g: ParametricDifference
+    - points: Parameter point of every bracket
+    - xtol, rtol, maxiter: See find_roots
+    Returns:
+    - Array of the refined roots
+    """
+    @staticmethod
+    def _sweep_newton(lefts, rights, g_lefts, starts, g, points, xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE,
+                      maxiter=MAX_ITERATIONS):
+        def evaluate(x, active):
+            SolveStats.evaluated(x.size)
+            return g(x, points[active])
+
+        def evaluate_with_derivative(x, active):
+            SolveStats.evaluated(x.size)
+            return g.with_derivative(x, points[active])
+
+        return FxSolver._safeguarded_newton(lefts, rights, g_lefts, evaluate,
+                                            evaluate_with_derivative if g.differentiable else None,
+                                            xtol, rtol, maxiter, starts)
+
+    """
+    This method solves many (f1, f2, range) jobs and yields the results as they finish.
+    Parameters:
+    - jobs: Iterable of jobs, each either a tuple (f1_expr, f2_expr[, x_min, x_max[, steps]])
+      or a dict with keys "f1", "f2" and optionally "x_min", "x_max", "steps"
+    - workers: Number of parallel workers; None or 1 solves in the calling thread (default: None)
+    - executor: "process" or "thread" pool used when workers > 1 (default: "process")
+    - method, xtol, rtol, maxiter: Bracket refinement settings (see find_roots)
+    - cache: ResultCache shared with find_roots (default: None); jobs found in it are yielded
+      right away and the others are stored once solved
+    Returns:
+    - Iterator of BatchResult(index, roots, error) in completion order, one per job;
+      index is the job's position in jobs, roots is the list find_roots would return,
+      and error holds the ValueError of a job whose expressions or range are invalid
+    How it works:
+    1. Compile every distinct expression string once, however many jobs use it, and yield the
+       jobs whose roots are cached.
+    2. Group the other jobs that share a sample grid (x_min, x_max, steps) and split the groups into
+       tasks of at most BATCH_TASK_SIZE jobs.
+    3. Each task builds its grid once and evaluates every distinct function on it once, so jobs
+       sharing an expression and a grid share its samples; then it scans each job
+       (polynomial jobs are solved directly, as in find_roots).
+    4. Run the tasks in the calling thread or in a pool, yielding results as tasks complete.
+    """
+    @staticmethod
+    def find_roots_batch(jobs, workers=None, executor="process", method="bisect",
+                         xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS, cache=None):
+        if method not in FxSolver.METHODS:
+            raise ValueError(f"Unknown root refinement method: {method}")
+        if executor not in FxSolver.EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
+        return FxSolver._iter_batch(jobs, workers, executor, (method, xtol, rtol, maxiter), cache)
+
+    """
+    This helper method is the generator behind find_roots_batch (kept separate so that
+    arguments are validated when find_roots_batch is called, not on the first result).
+    """
+    @staticmethod
+    def _iter_batch(jobs, workers, executor, settings, cache=None):
+        compiled = {}
+        groups = {}
+        # Cache keys of the jobs being solved, by index
+        keys = {}
+        for index, job in enumerate(jobs):
+            try:
+                f1_expr, f2_expr, x_min, x_max, steps = FxSolver._normalize_job(job)
+                f1 = FxSolver._compile_once(compiled, f1_expr)
+                f2 = FxSolver._compile_once(compiled, f2_expr)
+            except ValueError as e:
+                yield BatchResult(index, None, e)
+                continue
+            if cache is not None:
+                keys[index] = FxSolver.cache_key(f1, f2, x_min, x_max, steps, *settings)
+                roots = FxSolver.cached_roots(cache, keys[index])
+                if roots is not None:
+                    yield BatchResult(index, roots, None)
+                    continue
+            groups.setdefault((x_min, x_max, steps), []).append((index, f1, f2))
+
+        size = FxSolver.BATCH_TASK_SIZE
+        tasks = [(grid, members[i:i + size]) for grid, members in groups.items()
+                 for i in range(0, len(members), size)]
+        if workers is None or workers <= 1:
+            for grid, members in tasks:
+                for index, roots in FxSolver._solve_group(grid, members, settings):
+                    FxSolver.cache_roots(cache, keys.get(index), roots)
+                    yield BatchResult(index, roots, None)
+            return
+
+        from concurrent.futures import as_completed
+        with FxSolver._pool(executor, workers) as pool:
+            futures = [pool.submit(FxSolver._solve_group, grid, members, settings) for grid, members in tasks]
+            for future in as_completed(futures):
+                for index, roots in future.result():
+                    FxSolver.cache_roots(cache, keys.get(index), roots)
+                    yield BatchResult(index, roots, None)
+
+    """
+    This method builds the ResultCache key of a solve from the normalized expressions of f1 and f2,
+    the range, the settings of find_roots that change its result and VERSION. Settings the chosen
+    sampling does not use are left out, so e.g. uniform solves of find_roots and find_roots_batch
+    share their entries; workers and executor are left out as parallel solves find the same roots.
+    Roots found on samples passed in by the caller depend on their grid, so such solves must pass
+    grid, a JSON-serializable description of it (e.g. IncrementalSampler.grid_key()), to keep them
+    apart from solves on the solver's own grid.
+    Returns:
+    - Key string, or None unless both functions come from ExpressionParser without parameters (other
+      callables have no stable identity across processes)
+    """
+    @staticmethod
+    def cache_key(f1, f2, x_min=-10, x_max=10, steps=5000, method="bisect",
+                  xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS,
+                  sampling="uniform", budget=ADAPTIVE_BUDGET, min_width=ADAPTIVE_MIN_WIDTH,
+                  polynomial=True, tangents=True, grid=None):
+        expressions = [getattr(f, "expression", None) for f in (f1, f2)]
+        if not all(isinstance(expression, str) for expression in expressions) \
+                or any(getattr(f, "parameters", ()) for f in (f1, f2)):
+            return None
+        if sampling == "uniform":
+            budget = min_width = None
+        elif sampling == "adaptive":
+            steps = None
+        # Plain Python numbers, as numpy scalars are not JSON-serializable
+        steps, budget, maxiter = (None if value is None else int(value) for value in (steps, budget, maxiter))
+        min_width = None if min_width is None else float(min_width)
+        return ResultCache.key("find_roots", FxSolver.VERSION, *expressions, float(x_min), float(x_max),
+                               steps, method, float(xtol), float(rtol), maxiter, sampling, budget, min_width,
+                               bool(polynomial), bool(tangents), *(() if grid is None else (grid,)))
+
+    """
+    This method returns the roots cached under key as Root tuples, or None if they are not cached
+    (or cache or key is None). Hits and misses are counted as result_cache_hits and result_cache_misses.
+    """
+    @staticmethod
+    def cached_roots(cache, key):
+        if cache is None or key is None:
+            return None
+        records = cache.get(key)
+        SolveStats.count("result_cache_misses" if records is None else "result_cache_hits")
+        if records is None:
+            return None
+        return [Root(x, y, multiplicity) for x, y, multiplicity in records]
+
+    # Stores roots under key as [x, y, multiplicity] lists (does nothing if cache or key is None).
+    @staticmethod
+    def cache_roots(cache, key, roots):
+        if cache is None or key is None:
+            return
+        cache.put(key, [[float(root[0]), float(root[1]), int(getattr(root, "multiplicity", 1))] for root in roots])
+
+    """
+    This helper method converts a batch job into (f1_expr, f2_expr, x_min, x_max, steps),
+    filling in DEFAULT_RANGE and DEFAULT_STEPS. It raises a ValueError for malformed jobs.
+    """
+    @staticmethod
+    def _normalize_job(job):
+        if isinstance(job, dict):
+            if "f1" not in job or "f2" not in job:
+                raise ValueError("Job must provide both 'f1' and 'f2'.")
+            x_min = job.get("x_min", FxSolver.DEFAULT_RANGE[0])
+            x_max = job.get("x_max", FxSolver.DEFAULT_RANGE[1])
+            job = (job["f1"], job["f2"], x_min, x_max, job.get("steps", FxSolver.DEFAULT_STEPS))
+        job = tuple(job)
+        if len(job) == 2:
+            job = job + FxSolver.DEFAULT_RANGE
+        if len(job) == 4:
+            job = job + (FxSolver.DEFAULT_STEPS,)
+        if len(job) != 5:
+            raise ValueError("Job must be (f1, f2), (f1, f2, x_min, x_max) or (f1, f2, x_min, x_max, steps).")
+        f1_expr, f2_expr, x_min, x_max, steps = job
+        try:
+            x_min, x_max, steps = float(x_min), float(x_max), int(steps)
+        except (TypeError, ValueError):
+            raise ValueError("Job range and steps must be numbers.")
+        if steps < 2 or not np.isfinite(x_min) or not np.isfinite(x_max):
+            raise ValueError("Job needs a finite range and at least 2 steps.")
+        return f1_expr, f2_expr, x_min, x_max, steps
+
+    """
+    This helper method compiles an expression through a per-batch dictionary, so each distinct
+    string is parsed once; invalid expressions are remembered and raise the same ValueError again.
+    """
+    @staticmethod
+    def _compile_once(compiled, expression):
+        if expression not in compiled:
+            try:
+                compiled[expression] = ExpressionParser.convert_expr_to_function(expression)
+            except ValueError as e:
+                compiled[expression] = e
+        result = compiled[expression]
+        if isinstance(result, ValueError):
+            raise result
+        return result
+
+    """
+    This helper method solves a group of batch jobs that share one sample grid (runs inside a worker).
+    Parameters:
+    - grid: (x_min, x_max, steps) shared by all jobs of the group
+    - members: List of (index, f1, f2) jobs
+    - settings: (method, xtol, rtol, maxiter) bracket refinement settings
+    Returns:
+    - List of (index, roots) pairs
+    """
+    @staticmethod
+    def _solve_group(grid, members, settings):
+        x_vals = FxSolver._grid(*grid)
+        # Evaluate every distinct function once on the shared grid
+        samples = {}
+        for _, f1, f2 in members:
+            for f in (f1, f2):
+                if id(f) not in samples:
+                    samples[id(f)] = FxSolver._evaluate(f, x_vals)
+
+        results = []
+        for index, f1, f2 in members:
+            g = Difference(f1, f2)
+            coefficients = FxSolver._difference_polynomial(f1, f2)
+            if coefficients is not None:
+                results.append((index, FxSolver._polynomial_roots(coefficients, f1, *grid[:2])))
+                continue
+            g_vals = samples[id(f1)] - samples[id(f2)]
+            results.append((index, FxSolver._scan_for_roots(x_vals, g_vals, f1, g, *settings)))
+        return results
+
+    """
+    This helper method returns the polynomial coefficients of g(x) = f1(x) - f2(x), lowest degree first,
+    or None if either function is not a recognized polynomial or g is identically zero
+    (every x is a root, which is left to the sampling path).
+    """
+    @staticmethod
+    def _difference_polynomial(f1, f2):
+        p1 = f1.polynomial() if hasattr(f1, "polynomial") else None
+        p2 = f2.polynomial() if hasattr(f2, "polynomial") else None
+        if p1 is None or p2 is None:
+            return None
+        coefficients = np.polynomial.polynomial.polysub(p1, p2)
+        coefficients = np.trim_zeros(coefficients, "b")
+        return coefficients if coefficients.size else None
+
+    """
+    This helper method finds the real roots of a polynomial within [x_min, x_max].
+    Parameters:
+    - coefficients: Polynomial coefficients of g, lowest degree first
+    - f1: First function (callable), evaluated once at all roots
+    - x_min, x_max: Range in which roots are reported (in either order)
+    Returns:
+    - List of Root (x, y, multiplicity) tuples representing the intersection points, ordered from x_min
+      to x_max like the sampled roots
+    How it works:
+    1. Compute all complex roots as eigenvalues of the companion matrix (numpy.roots).
+    2. Group them into the roots of g with their multiplicities (_polynomial_clusters): the eigenvalues of
+       an m-fold root spread around it by about eps^(1/m), so they are merged by validating clusters
+       instead of by their distance.
+    3. Keep the nearly real roots whose real part makes g vanish up to rounding error.
+    4. Polish every root with Newton steps on the derivative of order m - 1, which has a simple root
+       where g has an m-fold one, keeping only improvements.
+    5. Keep the roots inside the range and evaluate f1 at all of them in one call.
+    """
+    @staticmethod
+    def _polynomial_roots(coefficients, f1, x_min, x_max):
+        if coefficients.size < 2:
+            return []
+        polynomial = np.polynomial.Polynomial(coefficients)
+        magnitude = np.polynomial.Polynomial(np.abs(coefficients))
+        centers, multiplicity = FxSolver._polynomial_clusters(polynomial, magnitude, np.roots(coefficients[::-1]))
+
+        real = centers.real
+        is_real = (np.abs(centers.imag) <= FxSolver.POLYNOMIAL_IMAG_TOLERANCE * np.maximum(1.0, np.abs(real))) \
+            & (np.abs(polynomial(real)) <= FxSolver.POLYNOMIAL_RESIDUAL_TOLERANCE * magnitude(np.abs(real)))
+        x, multiplicity = real[is_real], multiplicity[is_real]
+        for m in np.unique(multiplicity):
+            x[multiplicity == m] = FxSolver._polish(polynomial.deriv(m - 1), x[multiplicity == m])
+
+        order = np.argsort(x, kind="stable")
+        x, multiplicity = x[order], multiplicity[order]
+        lower, upper = min(x_min, x_max), max(x_min, x_max)
+        tolerance = FxSolver.NEAR_ZERO * np.maximum(1.0, np.abs(x))
+        in_range = (x >= lower - tolerance) & (x <= upper + tolerance)
+        x, multiplicity = np.clip(x[in_range], lower, upper), multiplicity[in_range]
+        if x_min > x_max:
+            x, multiplicity = x[::-1], multiplicity[::-1]
+        y = FxSolver._evaluate(f1, x)
+        return [Root(x, y, m) for x, y, m in zip(x, y, multiplicity)]
+
+    """
+    This helper method groups the eigenvalue roots of a polynomial into its roots and their multiplicities.
+    Parameters:
+    - polynomial: numpy Polynomial g
+    - magnitude: Polynomial with the absolute values of the coefficients of g, the size of its terms
+    - candidates: Array of the complex eigenvalue roots
+    Returns:
+    - Tuple (centers, multiplicity) of arrays: the (complex) roots and how many candidates each one merges
+    How it works:
+    1. Candidates whose Newton correction is tiny compared with the distance to the nearest other candidate
+       are simple roots (POLYNOMIAL_SEPARATION); the others are linked by their minimum spanning tree
+       (single linkage).
+    2. A group of m candidates whose center is nearly real is an m-fold root if, after polishing the center,
+       g and its first m - 1 derivatives vanish there up to rounding error (relative to the size of
+       their terms); any group of one candidate is a root.
+    3. Otherwise split the group at its longest link and check both parts, so a cluster that is one
+       multiple root is merged however far its candidates spread, and distinct close roots stay apart.
+    """
+    @staticmethod
+    def _polynomial_clusters(polynomial, magnitude, candidates):
+        with np.errstate(all="ignore"):
+            distances = np.abs(candidates[:, np.newaxis] - candidates[np.newaxis, :])
+            np.fill_diagonal(distances, np.inf)
+            correction = np.abs(polynomial(candidates) / polynomial.deriv()(candidates))
+            simple = correction <= FxSolver.POLYNOMIAL_SEPARATION * distances.min(axis=1)
+        centers, multiplicity = list(candidates[simple]), [1] * int(simple.sum())
+        clustered = candidates[~simple]
+        groups = [(np.arange(clustered.size), FxSolver._spanning_tree(clustered))] if clustered.size else []
+        while groups:
+            members, links = groups.pop()
+            center = clustered[members].mean()
+            m = members.size
+            if m > 1 and abs(center.imag) <= FxSolver.POLYNOMIAL_IMAG_TOLERANCE * max(1.0, abs(center.real)):
+                center = float(FxSolver._polish(polynomial.deriv(m - 1), center.real))
+                vanishes = all(abs(polynomial.deriv(k)(center)) <= FxSolver.POLYNOMIAL_RESIDUAL_TOLERANCE
+                               * magnitude.deriv(k)(abs(center)) for k in range(m))
+            else:
+                vanishes = m == 1
+            if vanishes:
+                centers.append(center)
+                multiplicity.append(m)
+                continue
+            # Split at the longest link; links are sorted by length
+            links = links[:-1]
+            component = FxSolver._components(members, links)
+            for label in np.unique(component):
+                part = members[component == label]
+                groups.append((part, links[np.isin(links[:, 0], part)]))
+        return np.array(centers, dtype=complex), np.array(multiplicity, dtype=int)
+
+    """
+    Returns the links of the minimum spanning tree of points in the complex plane (Prim's algorithm)
+    as an (n - 1, 2) array of point indices, sorted by length.
+    """
+    @staticmethod
+    def _spanning_tree(points):
+        n = points.size
+        if n < 2:
+            return np.empty((0, 2), dtype=int)
+        in_tree = np.zeros(n, dtype=bool)
+        in_tree[0] = True
+        distance = np.abs(points - points[0])
+        nearest = np.zeros(n, dtype=int)
+        links, lengths = [], []
+        for _ in range(n - 1):
+            j = int(np.argmin(np.where(in_tree, np.inf, distance)))
+            links.append((nearest[j], j))
+            lengths.append(distance[j])
+            in_tree[j] = True
+            closer = np.abs(points - points[j]) < distance
+            distance, nearest = np.where(closer, np.abs(points - points[j]), distance), np.where(closer, j, nearest)
+        return np.array(links, dtype=int)[np.argsort(lengths, kind="stable")]
+
+    # Labels the connected components of members joined by links (pairs of members).
+    @staticmethod
+    def _components(members, links):
+        label = {member: member for member in members.tolist()}
+        for a, b in links.tolist():
+            while label[a] != a:
+                a = label[a]
+            while label[b] != b:
+                b = label[b]
+            label[a] = b
+        for member in label:
+            root = member
+            while label[root] != root:
+                root = label[root]
+            label[member] = root
+        return np.array([label[member] for member in members.tolist()])
+
+    # Newton steps towards simple roots of polynomial from x, accepting a step only if it reduces |polynomial|.
+    @staticmethod
+    def _polish(polynomial, x):
+        derivative = polynomial.deriv()
+        with np.errstate(all="ignore"):
+            value = polynomial(x)
+            for _ in range(FxSolver.POLYNOMIAL_POLISH_STEPS):
+                x_new = x - value / derivative(x)
+                value_new = polynomial(x_new)
+                better = np.isfinite(x_new) & (np.abs(value_new) < np.abs(value))
+                if not np.any(better):
+                    break
+                x, value = np.where(better, x_new, x), np.where(better, value_new, value)
+        return x
+
+    """
+    This helper method solves a uniform sampling in parallel by partitioning the sample grid.
+    Parameters:
+    - f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter, tangents: Same as find_roots
+    - workers: Number of workers in the pool
+    - executor: Key of EXECUTORS selecting a process or thread pool
+    - cancel, progress: Cancel token and progress callback (see find_roots), checked as chunks complete
+    Returns:
+    - List of Root (x, y) tuples representing the intersection points, identical to the serial result
+    How it works:
+    1. Split the pairs of consecutive samples of the global grid into contiguous chunks
+       (CHUNKS_PER_WORKER per worker, each with at least MIN_CHUNK_PAIRS pairs).
+       Neighbouring chunks share their boundary sample but no pair, so every root is found
+       by exactly the chunk owning its pair and nothing is duplicated at chunk boundaries.
+    2. Every worker rebuilds its slice of the grid with _grid, samples and scans it (_solve_chunk).
+    3. Concatenate the chunk results in chunk order, which keeps the roots sorted.
+       If the solve is cancelled, chunks that have not started yet are dropped.
+    """
+    @staticmethod
+    def _find_roots_parallel(f1, f2, x_min, x_max, steps, method, xtol, rtol, maxiter, tangents, workers, executor,
+                             cancel=None, progress=None):
+        pairs = steps - 1
+        chunks = max(1, min(workers * FxSolver.CHUNKS_PER_WORKER, pairs // FxSolver.MIN_CHUNK_PAIRS))
+        bounds = np.linspace(0, pairs, chunks + 1).astype(int)
+        settings = (method, xtol, rtol, maxiter, tangents)
+        if chunks == 1:
+            return FxSolver._solve_chunk(f1, f2, x_min, x_max, steps, 0, pairs, settings)
+
+        from concurrent.futures import as_completed
+        with FxSolver._pool(executor, workers) as pool:
+            futures = [
+                pool.submit(FxSolver._solve_chunk, f1, f2, x_min, x_max, steps, start, stop, settings)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            try:
+                for done, _ in enumerate(as_completed(futures), 1):
+                    FxSolver._checkpoint(cancel, progress, done / len(futures))
+            except SolveCancelled:
+                for future in futures:
+                    future.cancel()
+                raise
+            return [root for future in futures for root in future.result()]
+
+    # Creates a pool of workers of the executor named by a key of EXECUTORS.
+    @staticmethod
+    def _pool(executor, workers):
+        import concurrent.futures
+        return getattr(concurrent.futures, FxSolver.EXECUTORS[executor])(max_workers=workers)
+
+    """
+    This helper method samples and scans one chunk of a uniform grid (runs inside a worker).
+    Parameters:
+    - f1, f2, x_min, x_max, steps: Same as find_roots
+    - start, stop: Pairs of consecutive samples [start, stop) of the global grid owned by the chunk
+    - settings: (method, xtol, rtol, maxiter, tangents) scan settings (see find_roots)
+    Returns:
+    - List of Root (x, y) tuples representing the intersection points found in the chunk
+    How it works:
+    1. Sample the owned pairs plus one neighbouring sample on each side (when it exists),
+       so tangent candidates on the chunk boundary still see both of their neighbours.
+    2. Scan all samples but report only roots belonging to the owned pairs.
+    """
+    @staticmethod
+    def _solve_chunk(f1, f2, x_min, x_max, steps, start, stop, settings):
+        g = Difference(f1, f2)
+        first = max(start - 1, 0)
+        x_vals = FxSolver._grid(x_min, x_max, steps, first, min(stop + 2, steps))
+        g_vals = FxSolver._evaluate(g, x_vals)
+        return FxSolver._scan_for_roots(x_vals, g_vals, f1, g, *settings,
+                                        pairs=(start - first, stop - 1 - first))
+
+    """
+    This helper method computes the samples start..stop-1 of np.linspace(left, right, steps)
+    without building the whole grid. The values are bit-identical to the matching slice of
+    np.linspace, so chunks of a grid line up exactly with the full grid.
+    """
+    @staticmethod
+    def _grid(left, right, steps, start=0, stop=None):
+        stop = steps if stop is None else stop
+        if steps == 1:
+            return np.full(stop - start, float(left))
+        delta = float(right) - float(left)
+        step = delta / (steps - 1)
+        x_vals = np.arange(start, stop, dtype=float)
+        if step == 0:
+            x_vals = x_vals / (steps - 1) * delta
+        else:
+            x_vals = x_vals * step
+        x_vals += left
+        if stop == steps and stop > start:
+            x_vals[-1] = right
+        return x_vals
 
     """
     This helper method samples the function g over a specified range [left, right]
@@ -46,102 +1135,844 @@ class FxSolver:
     - left: Left boundary of the range
     - right: Right boundary of the range
     - steps: Number of sampling steps
+    - cancel, progress: Cancel token and progress callback (see find_roots) (default: None)
     Returns:
     - x_vals: Array of x values
     - g_vals: Array of corresponding g(x) values
     How it works:
     1. Generate an array of x values evenly spaced between left and right.
-    2. Compute g(x) for each x value and store the results in g_vals
+    2. Compute g(x) for all x values in a single vectorized call and store the results in g_vals.
+       With a cancel token or progress callback, g is evaluated in chunks of SAMPLE_CHUNK
+       samples instead, with a cancellation point after every chunk.
     3. Return both x_vals and g_vals as numpy arrays.
     """
     @staticmethod
-    def _sample_function(g, left, right, steps):
-        # Generate x values and compute g(x) for each x
+    def _sample_function(g, left, right, steps, cancel=None, progress=None):
+        with SolveStats.phase("sampling"):
+            return FxSolver._sample_uniform(g, left, right, steps, cancel, progress)
+
+    # The body of _sample_function, which times it as the "sampling" phase.
+    @staticmethod
+    def _sample_uniform(g, left, right, steps, cancel, progress):
+        # Generate x values and compute g(x) for all of them at once
         x_vals = np.linspace(left, right, steps)
-        g_vals = np.array([g(x) for x in x_vals])
+        if cancel is None and progress is None:
+            return x_vals, FxSolver._evaluate(g, x_vals)
+        g_vals = np.empty_like(x_vals)
+        for start in range(0, steps, FxSolver.SAMPLE_CHUNK):
+            stop = min(start + FxSolver.SAMPLE_CHUNK, steps)
+            g_vals[start:stop] = FxSolver._evaluate(g, x_vals[start:stop])
+            FxSolver._checkpoint(cancel, progress, FxSolver.SAMPLING_PROGRESS * stop / steps)
+        return x_vals, g_vals
+
+    """
+    This helper method samples f1 and f2 on the same uniform grid as _sample_function,
+    splitting the reported progress between them.
+    Returns:
+    - Tuple (x_vals, f1_vals, f2_vals) of arrays
+    """
+    @staticmethod
+    def _sample_functions(f1, f2, left, right, steps, cancel=None, progress=None):
+        halves = (None, None)
+        if progress is not None:
+            halves = (lambda fraction: progress(fraction / 2),
+                      lambda fraction: progress((FxSolver.SAMPLING_PROGRESS + fraction) / 2))
+        x_vals, f1_vals = FxSolver._sample_function(f1, left, right, steps, cancel, halves[0])
+        _, f2_vals = FxSolver._sample_function(f2, left, right, steps, cancel, halves[1])
+        return x_vals, f1_vals, f2_vals
+
+    """
+    This helper method samples the function g adaptively over a specified range [left, right].
+    It starts from a coarse uniform grid and repeatedly subdivides only the cells where a root
+    could be hiding between two samples, so flat regions cost almost nothing while close pairs
+    of roots, tangencies and domain boundaries get dense samples.
+    Parameters:
+    - g: Function to sample (callable)
+    - left: Left boundary of the range
+    - right: Right boundary of the range
+    - budget: Maximum number of g evaluations
+    - min_width: Cells narrower than twice this width are not subdivided
+    - cancel, progress: Cancel token and progress callback (see find_roots), checked after every round
+    Returns:
+    - x_vals: Sorted array of x values
+    - g_vals: Array of corresponding g(x) values
+    How it works:
+    1. Sample g on ADAPTIVE_INITIAL_STEPS evenly spaced points (fewer if the budget is smaller).
+    2. Score every cell with _refinement_scores and pick the cells that need refinement.
+    3. Evaluate g at the midpoints of all picked cells in a single call and insert them in order.
+       When the budget cannot cover every picked cell, the most suspicious cells go first.
+    4. Repeat until no cell needs refinement or the budget is used up.
+    """
+    @staticmethod
+    def _sample_adaptive(g, left, right, budget=ADAPTIVE_BUDGET, min_width=ADAPTIVE_MIN_WIDTH,
+                         cancel=None, progress=None):
+        with SolveStats.phase("sampling"):
+            return FxSolver._refine_samples(g, left, right, budget, min_width, cancel, progress)
+
+    # The body of _sample_adaptive, which times it as the "sampling" phase.
+    @staticmethod
+    def _refine_samples(g, left, right, budget, min_width, cancel, progress):
+        steps = max(2, min(FxSolver.ADAPTIVE_INITIAL_STEPS, budget))
+        symbolic = FxSolver._differentiable(g)
+        if symbolic:
+            x_vals = FxSolver._grid(left, right, steps)
+            g_vals, d_vals = FxSolver._evaluate_with_derivative(g, x_vals)
+        else:
+            x_vals, g_vals = FxSolver._sample_function(g, left, right, steps)
+        evaluations = steps
+        while evaluations < budget:
+            FxSolver._checkpoint(cancel, progress, FxSolver.SAMPLING_PROGRESS * evaluations / budget)
+            scores = FxSolver._refinement_scores(x_vals, g_vals)
+            if symbolic:
+                scores = np.minimum(scores, FxSolver._slope_scores(x_vals, g_vals, d_vals))
+            scores[np.diff(x_vals) < 2 * min_width] = np.inf
+            cells = np.flatnonzero(scores <= 1.0)
+            if cells.size == 0:
+                break
+            if cells.size > budget - evaluations:
+                cells = np.sort(cells[np.argsort(scores[cells], kind="stable")[:budget - evaluations]])
+            # Evaluate all new midpoints at once and insert them after their left sample
+            mids = (x_vals[cells] + x_vals[cells + 1]) / 2
+            x_vals = np.insert(x_vals, cells + 1, mids)
+            if symbolic:
+                g_mids, d_mids = FxSolver._evaluate_with_derivative(g, mids)
+                d_vals = np.insert(d_vals, cells + 1, d_mids)
+            else:
+                g_mids = FxSolver._evaluate(g, mids)
+            g_vals = np.insert(g_vals, cells + 1, g_mids)
+            evaluations += cells.size
+        return x_vals, g_vals
+
+    """
+    This helper method samples g only where a root may be, isolating these parts of the range by branch
+    and bound with interval arithmetic.
+    Parameters:
+    - g: Bounded difference function (see Difference.interval)
+    - left, right: Range to sample
+    - steps: The boxes are sampled with at least the density of steps uniform samples over the range and
+      INTERVAL_BOX_STEPS samples per box, but with at most steps samples in total
+    - budget: Maximum number of interval evaluations (one per box)
+    - min_width: Boxes are not split into parts narrower than min_width
+    - cancel, progress: See find_roots
+    Returns:
+    - Tuple (x_vals, g_vals) of sorted samples; between two runs of boxes that are not adjacent,
+      a sample with a NaN value keeps the scan from pairing samples across the root-free gap
+    How it works:
+    1. Start with the whole range as one box, and bound g over all boxes of a level at once.
+    2. Discard every box whose bounds exclude zero, or that is empty (g is undefined in the whole box):
+       it provably contains no root.
+    3. Split the remaining boxes into INTERVAL_SPLIT parts and repeat, until the parts would be narrower
+       than min_width or bounding them all would exceed the budget.
+    4. Merge adjacent remaining boxes into runs and sample them uniformly. If that takes more than steps
+       samples, share steps samples out over the runs by width instead, or, if that is not finer than
+       uniform sampling, take the points of the uniform grid covering the runs.
+    """
+    @staticmethod
+    def _sample_interval(g, left, right, steps, budget=ADAPTIVE_BUDGET, min_width=ADAPTIVE_MIN_WIDTH,
+                         cancel=None, progress=None):
+        with SolveStats.phase("sampling"):
+            left, right = min(left, right), max(left, right)
+            with SolveStats.phase("interval"):
+                lefts, rights = FxSolver._isolate(g, left, right, budget, min_width, cancel, progress)
+            return FxSolver._sample_boxes(g, lefts, rights, left, right, steps)
+
+    # Steps 1-3 of _sample_interval: returns the sorted boxes (lefts, rights) that may contain a root.
+    @staticmethod
+    def _isolate(g, left, right, budget, min_width, cancel, progress):
+        lefts, rights = np.array([left], dtype=float), np.array([right], dtype=float)
+        kept_lefts, kept_rights = [], []
+        evaluations = 0
+        while lefts.size:
+            FxSolver._checkpoint(cancel, progress, FxSolver.SAMPLING_PROGRESS * evaluations / budget)
+            SolveStats.count("interval_evaluations", lefts.size)
+            lower, upper = g.interval(lefts, rights)
+            evaluations += lefts.size
+            # NaN bounds (empty boxes) compare as False and are discarded too
+            possible = (lower <= 0.0) & (upper >= 0.0)
+            lefts, rights = lefts[possible], rights[possible]
+            split = FxSolver.INTERVAL_SPLIT
+            wide = rights - lefts >= split * min_width
+            if split * np.count_nonzero(wide) > budget - evaluations:
+                wide[:] = False
+            kept_lefts.append(lefts[~wide])
+            kept_rights.append(rights[~wide])
+            # Parts of every wide box, sharing their boundaries exactly
+            edges = lefts[wide, None] + (rights[wide] - lefts[wide])[:, None] * (np.arange(split + 1) / split)
+            edges[:, -1] = rights[wide]
+            lefts, rights = edges[:, :-1].ravel(), edges[:, 1:].ravel()
+        lefts, rights = np.concatenate(kept_lefts), np.concatenate(kept_rights)
+        order = np.argsort(lefts, kind="stable")
+        return lefts[order], rights[order]
+
+    # Step 4 of _sample_interval: samples the sorted boxes with at most steps samples in total.
+    @staticmethod
+    def _sample_boxes(g, lefts, rights, left, right, steps):
+        if lefts.size == 0:
+            return np.empty(0), np.empty(0)
+        # Runs of adjacent boxes
+        starts = np.flatnonzero(np.concatenate([[True], lefts[1:] > rights[:-1]]))
+        run_lefts, run_rights = lefts[starts], rights[np.concatenate([starts[1:], [lefts.size]]) - 1]
+        widths = run_rights - run_lefts
+        spacing = (right - left) / max(steps - 1, 1)
+        counts = FxSolver.INTERVAL_BOX_STEPS * np.diff(np.concatenate([starts, [lefts.size]]))
+        if spacing > 0:
+            counts = np.maximum(counts, np.ceil(widths / spacing).astype(int))
+        spare = steps - 2 * starts.size
+        if np.sum(counts + 1) > steps and spare > 0 and np.sum(widths) < spare * spacing:
+            # Too many samples: share the ones beyond the two ends of every run out by width,
+            # which is still finer than the uniform grid
+            counts = 1 + np.floor(widths / np.sum(widths) * spare).astype(int)
+        if np.sum(counts + 1) <= steps:
+            grids = [FxSolver._grid(run_left, run_right, count + 1)
+                     for run_left, run_right, count in zip(run_lefts, run_rights, counts)]
+        else:
+            # Take the points of the uniform grid covering the runs, merging runs that share grid points
+            if spacing > 0:
+                firsts = np.clip(np.floor((run_lefts - left) / spacing), 0, steps - 1).astype(int)
+                lasts = np.clip(np.ceil((run_rights - left) / spacing), 0, steps - 1).astype(int)
+            else:
+                firsts, lasts = np.zeros(1, dtype=int), np.full(1, steps - 1)
+            merged = np.flatnonzero(np.concatenate([[True], firsts[1:] > lasts[:-1]]))
+            grids = [FxSolver._grid(left, right, steps, first, last + 1)
+                     for first, last in zip(firsts[merged], np.maximum.reduceat(lasts, merged))]
+        # A NaN sample between two grids keeps the scan from pairing samples across the root-free gap
+        pieces = []
+        for grid in grids:
+            if pieces:
+                pieces.append(np.array([(pieces[-1][-1] + grid[0]) / 2]))
+            pieces.append(grid)
+        x_vals = np.concatenate(pieces)
+        separators = np.zeros(x_vals.size, dtype=bool)
+        separators[np.cumsum([piece.size for piece in pieces])[:-1:2]] = True
+        g_vals = np.full(x_vals.size, np.nan)
+        g_vals[~separators] = FxSolver._evaluate(g, x_vals[~separators])
         return x_vals, g_vals
 
+    """
+    This helper method scores every cell between consecutive samples by how likely it is to
+    hide a root that the sign-change scan cannot see.
+    Parameters:
+    - x_vals: Sorted array of x values
+    - g_vals: Array of corresponding g(x) values
+    Returns:
+    - Array with one score per cell; cells scoring 1 or less need refinement, lower is more urgent
+    How it works:
+    1. Cells with a NaN on exactly one side contain a domain boundary and score 0.
+    2. For every interior sample, the bend is the distance between g and the straight line
+       through its two neighbours, i.e. how much curvature or slope change the samples show.
+    3. A cell whose two samples have the same sign scores min(|g|) / bend: when the curve bends
+       at least as much as it stays away from zero, two roots (or a tangency) may fit inside.
+    4. Cells that already show a sign change or an exact zero, and fully undefined cells, score inf.
+    """
+    @staticmethod
+    def _refinement_scores(x_vals, g_vals):
+        scores = np.full(x_vals.size - 1, np.inf)
+        if x_vals.size < 3:
+            return scores
+        with np.errstate(all="ignore"):
+            # Deviation of each interior sample from the line through its neighbours
+            weight = (x_vals[1:-1] - x_vals[:-2]) / (x_vals[2:] - x_vals[:-2])
+            line = g_vals[:-2] + (g_vals[2:] - g_vals[:-2]) * weight
+            bend = np.zeros_like(g_vals)
+            bend[1:-1] = np.nan_to_num(np.abs(g_vals[1:-1] - line), nan=0.0)
+            cell_bend = np.maximum(bend[:-1], bend[1:])
+
+            same_sign = g_vals[:-1] * g_vals[1:] > 0.0
+            nearest = np.minimum(np.abs(g_vals[:-1]), np.abs(g_vals[1:]))
+            scores[same_sign] = nearest[same_sign] / cell_bend[same_sign]
+        scores[np.isnan(g_vals[:-1]) != np.isnan(g_vals[1:])] = 0.0
+        return scores
+
+    """
+    This helper method scores the cells between consecutive samples like _refinement_scores, from the
+    slopes of g at the samples (for differentiable g, see Difference).
+    Parameters:
+    - x_vals: Sorted array of x values
+    - g_vals, d_vals: Arrays of the corresponding g(x) and g'(x) values
+    Returns:
+    - Array with one score per cell; cells scoring 1 or less need refinement, lower is more urgent
+    How it works:
+    1. In a cell whose two samples have the same sign and whose slopes both point towards zero
+       (g falls towards zero from both ends), the tangent lines at its two samples meet inside.
+    2. For a convex dip, the curve stays above these tangent lines, so where they meet bounds how close to
+       zero g can come. The score is min(|g|) / (min(|g|) - sign * value where they meet): at most 1 when
+       the tangent lines reach zero, i.e. when two roots (or a tangency) may fit inside.
+    3. All other cells score inf.
+    """
+    @staticmethod
+    def _slope_scores(x_vals, g_vals, d_vals):
+        scores = np.full(x_vals.size - 1, np.inf)
+        with np.errstate(all="ignore"):
+            x0, x1, g0, g1, d0, d1 = x_vals[:-1], x_vals[1:], g_vals[:-1], g_vals[1:], d_vals[:-1], d_vals[1:]
+            signs = np.sign(g0)
+            dip = (g0 * g1 > 0.0) & (signs * d0 < 0.0) & (signs * d1 > 0.0)
+            # Tangent lines g0 + d0 * (x - x0) and g1 + d1 * (x - x1) meet at x = meet
+            meet = (g1 - g0 + d0 * x0 - d1 * x1) / (d0 - d1)
+            lowest = signs * (g0 + d0 * (meet - x0))
+            nearest = np.minimum(np.abs(g0), np.abs(g1))
+            drop = nearest - lowest
+            dip &= drop > 0.0
+            scores[dip] = nearest[dip] / drop[dip]
+        return scores
+
+    """
+    This helper method evaluates a function over an array of x values.
+    Functions built by ExpressionParser are vectorized and are called once with the whole array;
+    scalar-only callables (e.g. written with the math module) fall back to one call per point.
+    Parameters:
+    - func: Function to evaluate (callable)
+    - x_vals: Array of x values
+    Returns:
+    - Array of func(x) values with the same shape as x_vals
+    """
+    @staticmethod
+    def _evaluate(func, x_vals):
+        SolveStats.evaluated(x_vals.size)
+        try:
+            values = np.asarray(func(x_vals), dtype=float)
+        except TypeError:
+            return np.array([func(x) for x in x_vals], dtype=float)
+        if values.shape != x_vals.shape:
+            values = np.broadcast_to(values, x_vals.shape).copy()
+        return values
+
+    """
+    This helper method evaluates a differentiable function (see Difference) and its derivative over
+    an array of x values in one call; the points count once towards the evaluations.
+    Returns:
+    - Tuple (func(x_vals), func'(x_vals)) of arrays with the same shape as x_vals
+    """
+    @staticmethod
+    def _evaluate_with_derivative(func, x_vals):
+        SolveStats.evaluated(x_vals.size)
+        SolveStats.count("derivative_evaluations", x_vals.size)
+        values, slopes = func.with_derivative(x_vals)
+        return (np.broadcast_to(values, x_vals.shape).astype(float),
+                np.broadcast_to(slopes, x_vals.shape).astype(float))
+
+    # Whether func provides its symbolic derivative (see Difference).
+    @staticmethod
+    def _differentiable(func):
+        return getattr(func, "differentiable", False)
+
     """
     This helper method scans through the sampled g values to detect roots
-    by looking for sign changes between consecutive samples.
+    by looking for sign changes between consecutive samples, and optionally for tangent roots.
     Parameters:
     - x_vals: Array of x values
     - g_vals: Array of corresponding g(x) values
     - f1: First function (callable)
     - g: Difference function g(x) = f1(x) - f2(x)
+    - method, xtol, rtol, maxiter: Bracket refinement settings (see find_roots)
+    - tangents: Also look for roots where g touches zero without changing sign (default: True)
+    - pairs: (first, last) range of sample pair indices to report roots for; the samples outside
+      it only serve as neighbours (default: None, all pairs)
     Returns:
-    - List of tuples representing the intersection points (x, y)
+    - List of Root (x, y) tuples representing the intersection points
     How it works:
-    1. Iterate through the g_vals array, checking pairs of consecutive values.
-    2. If a sign change is detected (g1 * g2 < 0), it indicates a root exists between those x values.
-    3. Use the bisection method to find the root more accurately.
-    4. If an exact root is found (g1 or g2 is zero), add it directly to the results.
-    5. Return a list of (x, y) pairs where the functions intersect.
-    6. If no intersections are found, an empty list is returned.
+    1. Build boolean masks over all pairs of consecutive samples at once, skipping pairs with a NaN value.
+    2. Every run of consecutive samples where g is exactly zero is one exact root at its first sample,
+       reported by the pair starting there, or by the pair ending there when that pair is skipped (_zero_runs).
+    3. If there is a sign change (g1 * g2 < 0), a root exists between those x values;
+       only these candidate brackets are refined, all together, with the selected method.
+    4. Around every tangent candidate from _tangent_candidates, find where g comes closest to zero
+       (_stationary_points if g is differentiable, else _golden_section). If it reaches zero (_touches_zero),
+       report a root with multiplicity 2; if it passes zero, the two simple roots on either side of that
+       point are refined like ordinary brackets.
+    5. Merge all roots back into sample order and evaluate f1 once for all of them.
+    6. Return a list of (x, y) pairs where the functions intersect.
+    7. If no intersections are found, an empty list is returned.
     """
     @staticmethod
-    def _scan_for_roots(x_vals, g_vals, f1, g):
-        # Initialize list to hold found roots
-        roots = []
-        # Scan through g_vals to find sign changes
-        for i in range(len(x_vals) - 1):
-            # Get consecutive g values
-            g1, g2 = g_vals[i], g_vals[i + 1]
-            # If either value is NaN, skip this interval
-            if np.isnan(g1) or np.isnan(g2):
-                continue
-            # If g1 or g2 is exactly zero, we found an exact root
-            if g1 == 0.0:  # exact root
-                roots.append((x_vals[i], f1(x_vals[i])))
-            elif g2 == 0.0:  # exact root
-                roots.append((x_vals[i + 1], f1(x_vals[i + 1])))
-            # if there is a sign change, there is a root in between
-            elif g1 * g2 < 0.0:
-                # Use bisection method to find the root more accurately
-                root = FxSolver._bisection(x_vals[i], x_vals[i + 1], g1, f1, g)
-                roots.append(root)
-        return roots
+    def _scan_for_roots(x_vals, g_vals, f1, g, method="bisect", xtol=NEAR_ZERO,
+                        rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS, tangents=True, pairs=None):
+        with SolveStats.phase("scan"):
+            return FxSolver._scan(x_vals, g_vals, f1, g, method, xtol, rtol, maxiter, tangents, pairs)
+
+    # The body of _scan_for_roots, which times it as the "scan" phase.
+    @staticmethod
+    def _scan(x_vals, g_vals, f1, g, method, xtol, rtol, maxiter, tangents, pairs):
+        first, last = (0, x_vals.size - 2) if pairs is None else pairs
+        owned = np.zeros(max(x_vals.size - 1, 0), dtype=bool)
+        owned[first:last + 1] = True
+
+        # Consecutive g values; pairs containing NaN are skipped
+        g_left, g_right = g_vals[:-1], g_vals[1:]
+        valid = ~(np.isnan(g_left) | np.isnan(g_right))
+        # Exact roots, one per run of zero samples
+        left_zero, right_zero = FxSolver._zero_runs(g_vals, valid)
+        left_zero, right_zero, valid = left_zero & owned, right_zero & owned, valid & owned
+        # Sign changes between samples that are not exact roots
+        with np.errstate(over="ignore", under="ignore"):
+            crossing = valid & ~(left_zero | right_zero) & (g_left * g_right < 0.0)
+
+        exact_idx = np.flatnonzero(left_zero | right_zero)
+        exact_x = np.where(left_zero[exact_idx], x_vals[exact_idx], x_vals[exact_idx + 1])
+
+        # Refine only the candidate brackets, all of them together
+        bracket_idx = np.flatnonzero(crossing)
+        SolveStats.count("brackets", bracket_idx.size)
+        refine = getattr(FxSolver, FxSolver.METHODS[method])
+        with SolveStats.phase("refine"):
+            bracket_x = refine(x_vals[bracket_idx], x_vals[bracket_idx + 1],
+                               g_left[bracket_idx], g_right[bracket_idx], g, xtol, rtol, maxiter)
+
+        # Minimize |g| between the neighbours of every tangent candidate
+        extra_x = np.empty(0)
+        extra_multiplicity = np.empty(0, dtype=int)
+        if tangents:
+            candidates = FxSolver._tangent_candidates(x_vals, g_vals)
+            SolveStats.count("tangent_candidates", candidates.size)
+            if candidates.size:
+                signs = np.sign(g_vals[candidates])
+                with SolveStats.phase("tangents"):
+                    if FxSolver._differentiable(g):
+                        x_best, g_best = FxSolver._stationary_points(x_vals[candidates - 1], x_vals[candidates + 1],
+                                                                     g, signs, xtol, rtol, maxiter)
+                    else:
+                        x_best, g_best = FxSolver._golden_section(x_vals[candidates - 1], x_vals[candidates + 1],
+                                                                  g, signs, xtol, maxiter)
+                touches = FxSolver._touches_zero(x_best, g_best, f1, g_vals[candidates - 1], g_vals[candidates + 1])
+                # A minimum past zero means two simple roots closer together than the sample spacing
+                split = ~touches & (g_best * signs < 0.0)
+                lefts = np.concatenate([x_vals[candidates[split] - 1], x_best[split]])
+                rights = np.concatenate([x_best[split], x_vals[candidates[split] + 1]])
+                g_lefts = np.concatenate([g_vals[candidates[split] - 1], g_best[split]])
+                g_rights = np.concatenate([g_best[split], g_vals[candidates[split] + 1]])
+                with SolveStats.phase("refine"):
+                    split_x = refine(lefts, rights, g_lefts, g_rights, g, xtol, rtol, maxiter)
+                extra_x = np.concatenate([x_best[touches], split_x])
+                extra_multiplicity = np.concatenate([np.full(np.count_nonzero(touches), 2),
+                                                     np.ones(split_x.size, dtype=int)])
+        # A root found between samples belongs to the pair it falls in
+        extra_idx = np.clip(np.searchsorted(x_vals, extra_x, side="right") - 1, 0, max(x_vals.size - 2, 0))
+        keep = owned[extra_idx] if owned.size else np.zeros(extra_idx.size, dtype=bool)
+        extra_idx, extra_x, extra_multiplicity = extra_idx[keep], extra_x[keep], extra_multiplicity[keep]
+
+        # Restore sample order (by pair, then by position inside the pair) and evaluate f1 once
+        root_idx = np.concatenate([exact_idx, bracket_idx, extra_idx])
+        root_x = np.concatenate([exact_x, bracket_x, extra_x])
+        order = np.lexsort((root_x, root_idx))
+        root_x = root_x[order]
+        multiplicity = np.concatenate([np.ones(exact_idx.size + bracket_idx.size, dtype=int),
+                                       extra_multiplicity])[order]
+        root_y = FxSolver._evaluate(f1, root_x)
+        return [Root(x, y, m) for x, y, m in zip(root_x, root_y, multiplicity)]
 
     """
-    This helper method uses the bisection method to find a root of the function g
-    within the interval [l, r] where g(l) and g(r) have opposite signs.
-    This function uses a divide-and-conquer approach to iteratively narrow down the interval
-    until it converges to a root or the interval is very small.
+    This helper method reports every run of consecutive samples where g is exactly zero once, at its first
+    sample, so a flat or underflowing g gives one root instead of one per sample. It only looks at the
+    sample before each pair, so a chunk of the grid with one neighbouring sample on each side decides
+    the same as the whole grid.
     Parameters:
-    - l: Left boundary of the interval
-    - r: Right boundary of the interval
-    - g1: Value of g at the left boundary (g(l))
-    - f1: First function (callable)
+    - g_vals: Array of g values (the last axis runs over the samples)
+    - valid: Boolean array over the pairs of consecutive samples, False for the pairs that are skipped
+    Returns:
+    - Tuple (left_zero, right_zero) of boolean arrays over the pairs: the pair starting at the first zero
+      of a run reports it, or the pair ending there when the pair starting there is skipped or missing
+    """
+    @staticmethod
+    def _zero_runs(g_vals, valid):
+        zero = g_vals == 0.0
+        first = zero.copy()
+        first[..., 1:] &= ~zero[..., :-1]
+        left_zero = valid & first[..., :-1]
+        following = np.zeros_like(valid)
+        following[..., :-1] = valid[..., 1:]
+        right_zero = valid & first[..., 1:] & ~following
+        return left_zero, right_zero
+
+    """
+    This helper method decides which minima of |g| found around tangent candidates reach zero.
+    The test is relative, so curves that stay a tiny but real distance away from zero are not roots:
+    |g| at the minimum must be below TANGENT_TOLERANCE times the neighbouring sampled values
+    (g vanishes up to the resolution of the parabola through them), or below TANGENT_ULPS ulps of
+    f1 and f2 at the minimum (g vanishes up to the rounding error of their difference).
+    Parameters:
+    - x_best, g_best: Arrays of the minima and the values of g there
+    - f1: First function (callable), evaluated at the minima; f2 = f1 - g
+    - g_lefts, g_rights: Arrays of the sampled g values on either side of every minimum
+    Returns:
+    - Boolean array, True where g touches zero
+    """
+    @staticmethod
+    def _touches_zero(x_best, g_best, f1, g_lefts, g_rights):
+        distance = np.abs(g_best)
+        local = np.maximum(np.abs(g_lefts), np.abs(g_rights))
+        touches = distance <= FxSolver.TANGENT_TOLERANCE * local
+        if np.all(touches):
+            return touches
+        y1 = FxSolver._evaluate(f1, x_best)
+        with np.errstate(invalid="ignore", over="ignore"):
+            rounding = FxSolver.TANGENT_ULPS * np.finfo(float).eps * (np.abs(y1) + np.abs(y1 - g_best))
+            return touches | (distance <= rounding)
+
+    """
+    This helper method finds samples where g may touch zero without changing sign (tangent or
+    even-multiplicity roots), using only the values that were already sampled.
+    Parameters:
+    - x_vals: Array of x values
+    - g_vals: Array of corresponding g(x) values
+    Returns:
+    - Array of indices of interior samples that are tangent candidates
+    How it works:
+    1. A candidate is a local minimum of |g| whose two neighbours have the same strict sign as it.
+    2. Fit the parabola through the sample and its two neighbours (works on non-uniform grids).
+    3. Keep the candidate if the parabola opens away from zero and its vertex comes within
+       TANGENT_RATIO of zero relative to the sampled value (or crosses it).
+    """
+    @staticmethod
+    def _tangent_candidates(x_vals, g_vals):
+        if x_vals.size < 3:
+            return np.empty(0, dtype=int)
+        x0, x1, x2 = x_vals[:-2], x_vals[1:-1], x_vals[2:]
+        g0, g1, g2 = g_vals[:-2], g_vals[1:-1], g_vals[2:]
+        with np.errstate(all="ignore"):
+            same_sign = (g0 * g1 > 0.0) & (g1 * g2 > 0.0)
+            local_min = (np.abs(g1) <= np.abs(g0)) & (np.abs(g1) < np.abs(g2))
+            # Parabola p(x) = g1 + slope * (x - x1) + curvature * (x - x1)^2 through the three samples
+            d01 = (g1 - g0) / (x1 - x0)
+            d12 = (g2 - g1) / (x2 - x1)
+            curvature = (d12 - d01) / (x2 - x0)
+            slope = d01 + curvature * (x1 - x0)
+            vertex = g1 - slope ** 2 / (4 * curvature)
+            towards_zero = curvature * g1 > 0.0
+            near_zero = vertex / g1 <= FxSolver.TANGENT_RATIO
+        return np.flatnonzero(same_sign & local_min & towards_zero & near_zero) + 1
+
+    """
+    This helper method finds where g comes closest to zero on many intervals at once, like _golden_section,
+    from the roots of the symbolic derivative g' instead of a derivative-free search.
+    Parameters:
+    - lefts, rights: Arrays of interval boundaries
+    - g: Differentiable function (see Difference)
+    - signs: Array of +1 or -1, one per interval: the sign of g near the interval
+    - xtol, rtol, maxiter: Refinement settings of the roots of g' (see _brent)
+    Returns:
+    - Tuple (x, g(x)) of arrays with the best point found in every interval
+    How it works:
+    1. Where sign * g' goes from negative at the left boundary to positive at the right one,
+       sign * g has a minimum inside: refine the root of g' with Brent's method, which needs far fewer
+       evaluations than golden-section search, and evaluate g there.
+    2. The other intervals (e.g. g' undefined at a boundary) fall back to _golden_section.
+    """
+    @staticmethod
+    def _stationary_points(lefts, rights, g, signs, xtol=NEAR_ZERO, rtol=RELATIVE_TOLERANCE,
+                           maxiter=MAX_ITERATIONS):
+        lefts, rights = np.asarray(lefts, dtype=float), np.asarray(rights, dtype=float)
+        _, slopes = FxSolver._evaluate_with_derivative(g, np.concatenate([lefts, rights]))
+        d_lefts, d_rights = slopes[:lefts.size], slopes[lefts.size:]
+        minimum = (signs * d_lefts < 0.0) & (signs * d_rights > 0.0)
+        x_best, g_best = np.empty_like(lefts), np.empty_like(lefts)
+        if np.any(minimum):
+            x_best[minimum] = FxSolver._brent(lefts[minimum], rights[minimum], d_lefts[minimum], d_rights[minimum],
+                                              g.derivative(), xtol, rtol, maxiter)
+            g_best[minimum] = FxSolver._evaluate(g, x_best[minimum])
+        if not np.all(minimum):
+            x_best[~minimum], g_best[~minimum] = FxSolver._golden_section(lefts[~minimum], rights[~minimum], g,
+                                                                          signs[~minimum], xtol, maxiter)
+        return x_best, g_best
+
+    """
+    This helper method minimizes sign * g on many intervals at once with golden-section search,
+    a derivative-free method that keeps a bracketing interval around the minimum.
+    With sign equal to the sign of g near the interval, this finds the point where g comes
+    closest to zero, or passes it.
+    Parameters:
+    - lefts, rights: Arrays of interval boundaries
+    - g: Function to minimize (callable)
+    - signs: Array of +1 or -1, one per interval
+    - xtol: Intervals stop shrinking once narrower than xtol
+    - maxiter: Maximum number of iterations
+    Returns:
+    - Tuple (x, g(x)) of arrays with the best point found in every interval
+    """
+    @staticmethod
+    def _golden_section(lefts, rights, g, signs, xtol=NEAR_ZERO, maxiter=MAX_ITERATIONS):
+        ratio = (np.sqrt(5.0) - 1) / 2
+        a = np.array(lefts, dtype=float)
+        b = np.array(rights, dtype=float)
+        c = b - ratio * (b - a)
+        d = a + ratio * (b - a)
+        fc = FxSolver._evaluate(g, c)
+        fd = FxSolver._evaluate(g, d)
+        active = np.arange(a.size)
+        for _ in range(maxiter):
+            act = active[np.abs(b[active] - a[active]) >= xtol]
+            if act.size == 0:
+                break
+            # NaN values compare as False, so the search moves away from undefined points
+            left = ~(signs[act] * fd[act] <= signs[act] * fc[act])
+            right_side = ~left
+            # Minimum in [a, d]: shift d to c and probe a new c
+            b[act[left]] = d[act[left]]
+            d[act[left]], fd[act[left]] = c[act[left]], fc[act[left]]
+            # Minimum in [c, b]: shift c to d and probe a new d
+            a[act[right_side]] = c[act[right_side]]
+            c[act[right_side]], fc[act[right_side]] = d[act[right_side]], fd[act[right_side]]
+            probe = np.where(left, b[act] - ratio * (b[act] - a[act]), a[act] + ratio * (b[act] - a[act]))
+            SolveStats.count("tangent_iterations")
+            g_probe = FxSolver._evaluate(g, probe)
+            c[act[left]], fc[act[left]] = probe[left], g_probe[left]
+            d[act[right_side]], fd[act[right_side]] = probe[right_side], g_probe[right_side]
+            active = act
+        use_c = ~(signs * fd <= signs * fc)
+        return np.where(use_c, c, d), np.where(use_c, fc, fd)
+
+    """
+    This helper method uses the bisection method to refine all root brackets at once.
+    Every bracket [l, r] must have g(l) and g(r) of opposite signs; all brackets that are still
+    active advance together, so each iteration costs one vectorized evaluation of g.
+    All refinement methods share this signature and return conventions.
+    Parameters:
+    - lefts: Array of left boundaries of the brackets
+    - rights: Array of right boundaries of the brackets
+    - g_lefts: Array of g values at the left boundaries (g(l))
+    - g_rights: Array of g values at the right boundaries (g(r))
     - g: Difference function g(x) = f1(x) - f2(x)
+    - xtol, rtol: A bracket has converged once its width is below xtol + rtol * |x|
+    - maxiter: Maximum number of iterations
     Returns:
-    - Tuple representing the intersection point (x, y)
+    - Array of root estimates, one per bracket
     How it works:
-    1. Iteratively narrow down the interval [l, r] by checking the sign of g at the midpoint.
-    2. If g(mid) is zero or the interval is very small, return the midpoint as the root.
+    1. Evaluate g at the midpoints of all active brackets in a single call.
+    2. A bracket is finished when g(mid) is zero or NaN, or the interval is very small;
+       its midpoint is recorded as the root and it drops out of the active set.
     3. If g(l) and g(mid) have opposite signs, the root lies in [l, mid], so update r to mid.
     4. Otherwise, the root lies in [mid, r], so update l to mid.
-    5. Repeat the process for a maximum of 100 iterations or until convergence.
-    6. Return the midpoint and the corresponding f1 value as the intersection point.
-    """
-    @staticmethod
-    def _bisection(l, r, g1, f1, g):
-        # Loop 100 times to narrow down the interval or until convergence
-        for _ in range(100):
-            # Calculate midpoint
-            mid = (l + r) / 2
-            # Evaluate g at midpoint
-            g_mid = g(mid)
-            # If g(mid) is NaN, break out of the loop
-            if np.isnan(g_mid):
+    5. Repeat for a maximum of maxiter iterations or until every bracket has converged.
+    6. Brackets still active at the end return their current midpoint.
+    """
+    @staticmethod
+    def _bisection(lefts, rights, g_lefts, g_rights, g, xtol=NEAR_ZERO,
+                   rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS):
+        l = np.array(lefts, dtype=float)
+        r = np.array(rights, dtype=float)
+        g_lefts = np.asarray(g_lefts, dtype=float)
+        roots = np.empty_like(l)
+        # Indices of brackets that have not converged yet
+        active = np.arange(l.size)
+        for _ in range(maxiter):
+            if active.size == 0:
                 break
-            # If g(mid) is zero or the interval is very small, return the midpoint as root
-            if g_mid == 0.0 or abs(r - l) < FxSolver.NEAR_ZERO:
-                return mid, f1(mid)
-            # If g(l) and g(mid) have opposite signs, root is in [l, mid]
-            if g1 * g_mid < 0.0:
-                r = mid
-            # Else root is in [mid, r]
+            # Evaluate g at all active midpoints at once
+            mid = (l[active] + r[active]) / 2
+            SolveStats.count("refine_iterations")
+            g_mid = FxSolver._evaluate(g, mid)
+            # Finished brackets: undefined or exact midpoint, or interval is very small
+            tol = xtol + rtol * np.abs(mid)
+            done = np.isnan(g_mid) | (g_mid == 0.0) | (np.abs(r[active] - l[active]) < tol)
+            roots[active[done]] = mid[done]
+            active, mid, g_mid = active[~done], mid[~done], g_mid[~done]
+            # Keep the half whose endpoints still have opposite signs
+            in_left = g_lefts[active] * g_mid < 0.0
+            r[active[in_left]] = mid[in_left]
+            l[active[~in_left]] = mid[~in_left]
+        roots[active] = (l[active] + r[active]) / 2
+        return roots
+
+    """
+    This helper method refines all root brackets at once with Brent's method.
+    It follows the classic brentq formulation: each step tries inverse quadratic interpolation
+    (or the secant step when only two points are known) and falls back to bisection whenever
+    the interpolated step is not short enough, so it never converges slower than bisection
+    and usually needs far fewer evaluations of g.
+    Parameters and return value are the same as for _bisection.
+    How it works:
+    1. Keep, for every bracket, the current estimate (cur), the previous one (pre) and the
+       opposite end of the bracket (blk), so the root always lies between cur and blk.
+    2. Swap cur and blk when blk has the smaller |g| so cur is always the best estimate.
+    3. A bracket has converged when g(cur) is zero or half the bracket is below the tolerance.
+    4. Otherwise take the interpolated step if it is accepted, else the bisection step,
+       evaluate g at the new estimates of all active brackets in a single call and repeat.
+    """
+    @staticmethod
+    def _brent(lefts, rights, g_lefts, g_rights, g, xtol=NEAR_ZERO,
+               rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS):
+        x_pre = np.array(lefts, dtype=float)
+        x_cur = np.array(rights, dtype=float)
+        f_pre = np.array(g_lefts, dtype=float)
+        f_cur = np.array(g_rights, dtype=float)
+        x_blk, f_blk = np.zeros_like(x_cur), np.zeros_like(x_cur)
+        s_pre, s_cur = np.zeros_like(x_cur), np.zeros_like(x_cur)
+        roots = x_cur.copy()
+        active = np.arange(x_cur.size)
+
+        for _ in range(maxiter + 1):
+            if active.size == 0:
+                break
+            # A sign change between pre and cur moves the far end of the bracket to pre
+            new_bracket = (f_pre != 0) & (f_cur != 0) & (np.signbit(f_pre) != np.signbit(f_cur))
+            x_blk = np.where(new_bracket, x_pre, x_blk)
+            f_blk = np.where(new_bracket, f_pre, f_blk)
+            s_pre = np.where(new_bracket, x_cur - x_pre, s_pre)
+            s_cur = np.where(new_bracket, x_cur - x_pre, s_cur)
+            # Keep the estimate with the smallest |g| in cur
+            swap = np.abs(f_blk) < np.abs(f_cur)
+            x_pre, x_cur, x_blk = np.where(swap, x_cur, x_pre), np.where(swap, x_blk, x_cur), np.where(swap, x_cur, x_blk)
+            f_pre, f_cur, f_blk = np.where(swap, f_cur, f_pre), np.where(swap, f_blk, f_cur), np.where(swap, f_cur, f_blk)
+
+            delta = (xtol + rtol * np.abs(x_cur)) / 2
+            s_bis = (x_blk - x_cur) / 2
+            done = (f_cur == 0) | np.isnan(f_cur) | (np.abs(s_bis) < delta)
+            roots[active[done]] = x_cur[done]
+            keep = ~done
+            active = active[keep]
+            x_pre, x_cur, x_blk = x_pre[keep], x_cur[keep], x_blk[keep]
+            f_pre, f_cur, f_blk = f_pre[keep], f_cur[keep], f_blk[keep]
+            s_pre, s_cur, s_bis, delta = s_pre[keep], s_cur[keep], s_bis[keep], delta[keep]
+            if active.size == 0:
+                break
+
+            with np.errstate(all="ignore"):
+                # Secant step when only two distinct points are known, else inverse quadratic step
+                s_secant = -f_cur * (x_cur - x_pre) / (f_cur - f_pre)
+                d_pre = (f_pre - f_cur) / (x_pre - x_cur)
+                d_blk = (f_blk - f_cur) / (x_blk - x_cur)
+                s_quadratic = -f_cur * (f_blk * d_blk - f_pre * d_pre) / (d_blk * d_pre * (f_blk - f_pre))
+                s_try = np.where(x_pre == x_blk, s_secant, s_quadratic)
+                interpolate = (np.abs(s_pre) > delta) & (np.abs(f_cur) < np.abs(f_pre))
+                accept = interpolate & (2 * np.abs(s_try) < np.minimum(np.abs(s_pre), 3 * np.abs(s_bis) - delta))
+            s_pre = np.where(accept, s_cur, s_bis)
+            s_cur = np.where(accept, s_try, s_bis)
+
+            # Take the step, but never smaller than the tolerance
+            x_pre, f_pre = x_cur, f_cur
+            x_cur = x_cur + np.where(np.abs(s_cur) > delta, s_cur, np.where(s_bis > 0, delta, -delta))
+            SolveStats.count("refine_iterations")
+            f_cur = FxSolver._evaluate(g, x_cur)
+            roots[active] = x_cur
+        return roots
+
+    """
+    This helper method refines all root brackets at once with the Illinois variant of regula falsi.
+    The false-position point of each bracket replaces one endpoint; when the same endpoint is kept
+    twice its g value is halved, which avoids the one-sided stagnation of plain regula falsi and
+    gives superlinear convergence.
+    Parameters and return value are the same as for _bisection.
+    How it works:
+    1. Compute the false-position point c of every active bracket [a, b] and evaluate g(c) in one call.
+    2. If g(c) and g(b) have opposite signs, b becomes the new a; otherwise g(a) is halved.
+    3. c becomes the new b.
+    4. A bracket has converged when g(c) is zero or NaN, or the bracket is below the tolerance.
+    """
+    @staticmethod
+    def _illinois(lefts, rights, g_lefts, g_rights, g, xtol=NEAR_ZERO,
+                  rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS):
+        a = np.array(lefts, dtype=float)
+        b = np.array(rights, dtype=float)
+        fa = np.array(g_lefts, dtype=float)
+        fb = np.array(g_rights, dtype=float)
+        roots = (a + b) / 2
+        active = np.arange(a.size)
+
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            with np.errstate(all="ignore"):
+                c = b - fb * (b - a) / (fb - fa)
+            # Fall back to the midpoint if the false-position point is not strictly inside the bracket
+            outside = ~np.isfinite(c) | (c <= np.minimum(a, b)) | (c >= np.maximum(a, b))
+            c = np.where(outside, (a + b) / 2, c)
+            SolveStats.count("refine_iterations")
+            fc = FxSolver._evaluate(g, c)
+
+            opposite = fc * fb < 0.0
+            a, fa = np.where(opposite, b, a), np.where(opposite, fb, fa / 2)
+            b, fb = c, fc
+
+            roots[active] = c
+            done = (fc == 0.0) | np.isnan(fc) | (np.abs(b - a) < xtol + rtol * np.abs(c))
+            keep = ~done
+            active, a, b, fa, fb = active[keep], a[keep], b[keep], fa[keep], fb[keep]
+        return roots
+
+    """
+    This helper method refines all root brackets at once with Newton's method safeguarded by bisection.
+    If g is differentiable (see Difference), g and its symbolic derivative are evaluated together in one call
+    per iteration; otherwise the derivative is estimated with a forward difference, which costs a second
+    evaluation of g per iteration and limits the accuracy of the steps. The bracket is kept up to date
+    so a Newton step that leaves it (or a flat derivative) is replaced by a bisection step, and
+    convergence is guaranteed.
+    Parameters and return value are the same as for _bisection.
+    How it works:
+    1. Start every bracket at its midpoint and evaluate g there.
+    2. Shrink the bracket to the side that still contains the sign change.
+    3. A bracket has converged when g(x) is zero or NaN, or the bracket is below the tolerance.
+    4. Otherwise take the Newton step x - g(x) / g'(x), or bisect if the step leaves the bracket.
+    5. A bracket has also converged when the step itself is below the tolerance.
+    """
+    @staticmethod
+    def _newton(lefts, rights, g_lefts, g_rights, g, xtol=NEAR_ZERO,
+                rtol=RELATIVE_TOLERANCE, maxiter=MAX_ITERATIONS):
+        def evaluate(x, active):
+            return FxSolver._evaluate(g, x)
+
+        def evaluate_with_derivative(x, active):
+            return FxSolver._evaluate_with_derivative(g, x)
+
+        return FxSolver._safeguarded_newton(lefts, rights, g_lefts, evaluate,
+                                            evaluate_with_derivative if FxSolver._differentiable(g) else None,
+                                            xtol, rtol, maxiter)
+
+    """
+    This helper method runs Newton's method safeguarded by bisection on all brackets at once (see _newton);
+    _newton and _sweep_newton only differ in how they evaluate g.
+    Parameters:
+    - lefts, rights, g_lefts: Bracket ends and g at the left ends
+    - evaluate: Callable (x, active) returning g at x, where active holds the index of the bracket of every x
+    - evaluate_with_derivative: Callable (x, active) returning g and its derivative at x, or None to estimate
+      the derivative with a forward difference
+    - xtol, rtol, maxiter: See find_roots
+    - starts: Starting points inside the brackets (default: None, the midpoints)
+    Returns:
+    - Array of the refined roots
+    """
+    @staticmethod
+    def _safeguarded_newton(lefts, rights, g_lefts, evaluate, evaluate_with_derivative, xtol, rtol, maxiter,
+                            starts=None):
+        a = np.array(lefts, dtype=float)
+        b = np.array(rights, dtype=float)
+        fa = np.array(g_lefts, dtype=float)
+        x = (a + b) / 2 if starts is None else np.array(starts, dtype=float)
+        roots = x.copy()
+        active = np.arange(x.size)
+        step_size = np.sqrt(np.finfo(float).eps)
+
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            SolveStats.count("refine_iterations")
+            if evaluate_with_derivative is not None:
+                fx, dfx = evaluate_with_derivative(x, active)
             else:
-                l = mid
-        # Return midpoint and corresponding f1 value as the intersection point
-        return (l + r) / 2, f1((l + r) / 2)
+                fx = evaluate(x, active)
+            # Shrink the bracket around x
+            same_as_a = np.signbit(fx) == np.signbit(fa)
+            a, fa = np.where(same_as_a, x, a), np.where(same_as_a, fx, fa)
+            b = np.where(same_as_a, b, x)
+
+            tol = xtol + rtol * np.abs(x)
+            roots[active] = x
+            done = (fx == 0.0) | np.isnan(fx) | (np.abs(b - a) < tol)
+            keep = ~done
+            active, a, b, fa, x, fx, tol = active[keep], a[keep], b[keep], fa[keep], x[keep], fx[keep], tol[keep]
+            if active.size == 0:
+                break
+
+            # Newton step with the given or a forward-difference derivative, safeguarded by bisection
+            with np.errstate(all="ignore"):
+                if evaluate_with_derivative is not None:
+                    slope = dfx[keep]
+                else:
+                    h = step_size * np.maximum(1.0, np.abs(x))
+                    slope = (evaluate(x + h, active) - fx) / h
+                x_new = x - fx / slope
+            outside = ~np.isfinite(x_new) | (x_new <= np.minimum(a, b)) | (x_new >= np.maximum(a, b))
+            x_new = np.where(outside, (a + b) / 2, x_new)
+
+            converged = np.abs(x_new - x) < tol
+            roots[active] = x_new
+            keep = ~converged
+            active, a, b, fa, x = active[keep], a[keep], b[keep], fa[keep], x_new[keep]
+        return roots
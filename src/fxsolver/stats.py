@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import nullcontext
+
+"""
+SolveStats collects opt-in instrumentation of a solve: how long each phase took (parsing, sampling,
+scanning, refinement, plotting, ...) measured with time.perf_counter_ns, and counters such as function
+evaluations, brackets and refinement iterations.
+Instrumentation is off unless a SolveStats is recording on the current thread; while none records on
+any thread, the instrumented code only pays for one class attribute check per instrumentation point:
+    stats = SolveStats()
+    with stats:
+        f1 = ExpressionParser.convert_expr_to_function("x^2")
+        roots = FxSolver.find_roots(f1, f2)          # or find_roots(f1, f2, stats=stats)
+    stats.phases["refine"].ns, stats.counters["refine_iterations"], stats.as_dict()
+Phase times include the phases nested in them (scan includes refine and tangents); a phase entered
+again while it is running (e.g. sampling inside adaptive sampling) is only timed once.
+Work done in the worker pools of parallel solving is timed as the "parallel" phase but not counted.
+"""
+class SolveStats:
+    # Order of the phases in summaries; phases not listed here follow in the order they were entered
+    PHASE_ORDER = ("parse", "solve", "polynomial", "sampling", "parallel", "scan", "refine", "tangents",
+                   "plot_sampling", "plot")
+    # Counters shown by summary, with their labels
+    SUMMARY_COUNTERS = (("evaluations", "evals"), ("brackets", "brackets"), ("refine_iterations", "iterations"))
+
+    # Recording SolveStats of each thread, innermost last, and how many are recording on all threads
+    _local = threading.local()
+    _recording = 0
+    _lock = threading.Lock()
+    # Shared do-nothing context manager of the disabled instrumentation
+    _disabled = nullcontext()
+
+    def __init__(self):
+        # Phase name -> Phase, and counter name -> int
+        self.phases = {}
+        self.counters = {}
+        self._running = []
+
+    # Starts recording on the current thread (can be nested and re-entered on other threads later).
+    def __enter__(self):
+        SolveStats._stack().append(self)
+        with SolveStats._lock:
+            SolveStats._recording += 1
+        return self
+
+    def __exit__(self, *exc):
+        SolveStats._stack().pop()
+        with SolveStats._lock:
+            SolveStats._recording -= 1
+        return False
+
+    # The SolveStats recording on the current thread, or None.
+    @staticmethod
+    def current():
+        if not SolveStats._recording:
+            return None
+        stack = getattr(SolveStats._local, "stack", None)
+        return stack[-1] if stack else None
+
+    # Context manager recording into stats on the current thread, or doing nothing if stats is None.
+    @staticmethod
+    def recording(stats):
+        return stats if stats is not None else SolveStats._disabled
+
+    # Adds amount to a counter of the recording SolveStats, if any.
+    @staticmethod
+    def count(name, amount=1):
+        stats = SolveStats.current()
+        if stats is not None:
+            stats.counters[name] = stats.counters.get(name, 0) + int(amount)
+
+    # Counts points evaluated by one vectorized call (also per innermost running phase).
+    @staticmethod
+    def evaluated(points):
+        stats = SolveStats.current()
+        if stats is not None:
+            stats.counters["evaluations"] = stats.counters.get("evaluations", 0) + int(points)
+            stats.counters["evaluation_calls"] = stats.counters.get("evaluation_calls", 0) + 1
+            if stats._running:
+                stats._running[-1].evaluations += int(points)
+
+    # Context manager timing a phase in the recording SolveStats, or doing nothing if none is recording.
+    @staticmethod
+    def phase(name):
+        if not SolveStats._recording:
+            return SolveStats._disabled
+        stats = SolveStats.current()
+        if stats is None:
+            return SolveStats._disabled
+        return _PhaseTimer(stats, name)
+
+    # Time of a phase in milliseconds (0 if it never ran).
+    def milliseconds(self, name):
+        phase = self.phases.get(name)
+        return phase.ns / 1e6 if phase is not None else 0.0
+
+    # The stats as plain dicts: {"phases": {name: {"ns", "count", "evaluations"}}, "counters": {...}}.
+    def as_dict(self):
+        return {"phases": {name: {"ns": phase.ns, "count": phase.count, "evaluations": phase.evaluations}
+                           for name, phase in self.phases.items()},
+                "counters": dict(self.counters)}
+
+    # One line for a status bar, e.g. "solve 3.1 ms | sampling 1.2 ms | ... | 5000 evals | 25 iterations".
+    def summary(self):
+        names = [name for name in self.PHASE_ORDER if name in self.phases]
+        names += [name for name in self.phases if name not in self.PHASE_ORDER]
+        parts = [f"{name} {self.milliseconds(name):.1f} ms" for name in names]
+        parts += [f"{self.counters[name]} {label}" for name, label in self.SUMMARY_COUNTERS if name in self.counters]
+        return " | ".join(parts)
+
+    def __repr__(self):
+        return f"SolveStats({self.summary()})"
+
+    # The thread-local stack of recording SolveStats.
+    @staticmethod
+    def _stack():
+        if not hasattr(SolveStats._local, "stack"):
+            SolveStats._local.stack = []
+        return SolveStats._local.stack
+
+
+"""
+Accumulated measurements of one phase: total time in nanoseconds, how often it ran, and how many points
+were evaluated while it was the innermost running phase.
+"""
+class Phase:
+    __slots__ = ("ns", "count", "evaluations")
+
+    def __init__(self):
+        self.ns = 0
+        self.count = 0
+        self.evaluations = 0
+
+    def __repr__(self):
+        return f"Phase(ns={self.ns}, count={self.count}, evaluations={self.evaluations})"
+
+
+# Times one run of a phase (see SolveStats.phase).
+class _PhaseTimer:
+    __slots__ = ("stats", "phase", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.phase = stats.phases.get(name)
+        if self.phase is None:
+            self.phase = stats.phases[name] = Phase()
+        self.start = None
+
+    def __enter__(self):
+        # A phase that is already running is not timed twice
+        if self.phase not in self.stats._running:
+            self.stats._running.append(self.phase)
+            self.start = time.perf_counter_ns()
+        return self.phase
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self.phase.ns += time.perf_counter_ns() - self.start
+            self.phase.count += 1
+            self.stats._running.pop()
+        return False
@@ -0,0 +1,346 @@
+import ast
+import math
+import operator
+from collections import Counter
+
+import numpy as np
+
+"""
+Symbolic operations on the expression trees built by ExpressionParser: ast trees over the variable x
+with + - * / **, unary + and - and calls of sqrt and log10. Trees are never modified, new nodes are returned.
+- differentiate builds the tree of the derivative with the sum, product, quotient, power and chain rules,
+  simplifying while it builds (0 * u, 1 * u, u + 0, u ** 1, operations on two constants, ...).
+  The derivative is only meaningful where the expression itself is defined.
+- fold_constants evaluates constant sub-expressions once, instead of on every call.
+- eliminate_common_subexpressions finds the sub-expressions that occur more than once in one or more trees,
+  so compiled code evaluates each of them once (e.g. sqrt(x + 1) in both f and f').
+- to_source writes a tree back as an expression string.
+"""
+class Symbolic:
+    # ln(10): the natural logarithm is written with log10 as ln(u) = log10(u) * LN10
+    LN10 = math.log(10.0)
+
+    # Python operators of the supported AST operator nodes
+    BINARY_OPERATORS = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: operator.mul,
+        ast.Div: operator.truediv,
+        ast.Pow: operator.pow,
+    }
+    UNARY_OPERATORS = {
+        ast.UAdd: operator.pos,
+        ast.USub: operator.neg,
+    }
+
+    # Operator precedence used by to_source (higher binds tighter)
+    PRECEDENCE = {ast.Add: 1, ast.Sub: 1, ast.Mult: 2, ast.Div: 2, ast.Pow: 4}
+    UNARY_PRECEDENCE = 3
+    ATOM_PRECEDENCE = 5
+
+    """
+    This method differentiates an expression tree with respect to the variable.
+    Parameters:
+    - node: Expression node (e.g. tree.body of a tree from ExpressionParser.parse_expression)
+    - variable: Name of the variable (default: "x")
+    - constants: Other names that do not depend on the variable, e.g. parameters (default: none)
+    Returns:
+    - Expression node of the derivative
+    How it works:
+    1. Constants and constant names differentiate to 0 and the variable to 1.
+    2. Sums, differences, products and quotients follow the sum, product and quotient rules.
+    3. u ** c with an exponent that does not depend on x gives c * u ** (c - 1) * u';
+       c ** v gives c ** v * ln(c) * v', and u ** v in general u ** v * (v' * ln(u) + v * u' / u).
+    4. sqrt(u) gives u' / (2 * sqrt(u)) and log10(u) gives u' / (u * ln(10)).
+    """
+    @staticmethod
+    def differentiate(node, variable="x", constants=()):
+        if isinstance(node, ast.Constant):
+            return Symbolic._constant(0.0)
+        if isinstance(node, ast.Name):
+            if node.id in constants:
+                return Symbolic._constant(0.0)
+            if node.id != variable:
+                raise ValueError(f"Cannot differentiate the name: {node.id}")
+            return Symbolic._constant(1.0)
+        if isinstance(node, ast.UnaryOp):
+            derivative = Symbolic.differentiate(node.operand, variable, constants)
+            return Symbolic._negate(derivative) if isinstance(node.op, ast.USub) else derivative
+        if isinstance(node, ast.Call):
+            argument = node.args[0]
+            derivative = Symbolic.differentiate(argument, variable, constants)
+            if Symbolic._is_constant(derivative, 0.0):
+                return derivative
+            if node.func.id == "sqrt":
+                return Symbolic._divide(derivative, Symbolic._multiply(Symbolic._constant(2.0), node))
+            if node.func.id == "log10":
+                return Symbolic._divide(derivative, Symbolic._multiply(argument, Symbolic._constant(Symbolic.LN10)))
+            raise ValueError(f"Cannot differentiate the function: {node.func.id}")
+        if not isinstance(node, ast.BinOp):
+            raise ValueError(f"Cannot differentiate: {type(node).__name__}")
+
+        u, v = node.left, node.right
+        du, dv = Symbolic.differentiate(u, variable, constants), Symbolic.differentiate(v, variable, constants)
+        if isinstance(node.op, ast.Add):
+            return Symbolic._add(du, dv)
+        if isinstance(node.op, ast.Sub):
+            return Symbolic._subtract(du, dv)
+        if isinstance(node.op, ast.Mult):
+            return Symbolic._add(Symbolic._multiply(du, v), Symbolic._multiply(u, dv))
+        if isinstance(node.op, ast.Div):
+            if Symbolic._is_constant(dv, 0.0):
+                return Symbolic._divide(du, v)
+            numerator = Symbolic._subtract(Symbolic._multiply(du, v), Symbolic._multiply(u, dv))
+            return Symbolic._divide(numerator, Symbolic._power(v, Symbolic._constant(2.0)))
+        if Symbolic._is_constant(dv, 0.0):
+            exponent = Symbolic._subtract(v, Symbolic._constant(1.0))
+            return Symbolic._multiply(Symbolic._multiply(v, Symbolic._power(u, exponent)), du)
+        if Symbolic._is_constant(du, 0.0):
+            return Symbolic._multiply(Symbolic._multiply(node, Symbolic._natural_log(u)), dv)
+        inner = Symbolic._add(Symbolic._multiply(dv, Symbolic._natural_log(u)),
+                              Symbolic._divide(Symbolic._multiply(v, du), u))
+        return Symbolic._multiply(node, inner)
+
+    """
+    This method replaces every constant sub-expression by its value.
+    Parameters:
+    - node: Expression node
+    - functions: Dict of the callable functions by name (e.g. ExpressionParser.ALLOWED_FUNCTIONS)
+    Returns:
+    - Expression node with constant sub-expressions folded
+    Sub-expressions whose value is not a finite float (division by zero, overflow, sqrt or log10 of
+    invalid values) are left as they are, so evaluating them still behaves as before folding.
+    """
+    @staticmethod
+    def fold_constants(node, functions):
+        node = Symbolic._map_children(node, lambda child: Symbolic.fold_constants(child, functions))
+        if isinstance(node, ast.BinOp) and Symbolic._is_constant(node.left) and Symbolic._is_constant(node.right):
+            value = Symbolic._fold(Symbolic.BINARY_OPERATORS[type(node.op)], node.left.value, node.right.value)
+        elif isinstance(node, ast.UnaryOp) and Symbolic._is_constant(node.operand):
+            value = Symbolic._fold(Symbolic.UNARY_OPERATORS[type(node.op)], node.operand.value)
+        elif isinstance(node, ast.Call) and Symbolic._is_constant(node.args[0]):
+            value = Symbolic._fold(functions[node.func.id], node.args[0].value)
+        else:
+            value = None
+        return node if value is None else Symbolic._constant(value)
+
+    """
+    This method finds the sub-expressions that occur more than once in a list of expression trees.
+    Parameters:
+    - nodes: List of expression nodes
+    Returns:
+    - Tuple (assignments, nodes): assignments is a list of (name, node) to evaluate in order, and nodes
+      the given expressions with every repeated sub-expression replaced by the name holding its value
+    How it works:
+    1. Count all sub-expressions (other than names and constants) of all trees by their structure;
+       the parts of a sub-expression only count at its first occurrence.
+    2. Rebuild the trees bottom-up; the first occurrence of a repeated sub-expression becomes an
+       assignment to a new name (after the assignments of its own repeated parts), later ones that name.
+    """
+    @staticmethod
+    def eliminate_common_subexpressions(nodes):
+        # Number every node by its structure, so equal sub-expressions get equal numbers
+        numbers, distinct = {}, {}
+        for node in nodes:
+            Symbolic._number(node, numbers, distinct)
+        counts = Counter()
+
+        def count(node):
+            if isinstance(node, (ast.Name, ast.Constant)):
+                return
+            number = numbers[id(node)]
+            counts[number] += 1
+            # The parts of a repeated sub-expression are only evaluated with its first occurrence
+            if counts[number] == 1:
+                for child in Symbolic._children(node):
+                    count(child)
+
+        for node in nodes:
+            count(node)
+        if all(occurrences < 2 for occurrences in counts.values()):
+            return [], list(nodes)
+        assignments = []
+        names = {}
+
+        def replace(node):
+            if isinstance(node, (ast.Name, ast.Constant)):
+                return node
+            number = numbers[id(node)]
+            if number in names:
+                return ast.Name(id=names[number], ctx=ast.Load())
+            rebuilt = Symbolic._map_children(node, replace)
+            if counts[number] < 2:
+                return rebuilt
+            names[number] = f"_t{len(assignments)}"
+            assignments.append((names[number], rebuilt))
+            return ast.Name(id=names[number], ctx=ast.Load())
+
+        return assignments, [replace(node) for node in nodes]
+
+    # Stores in numbers[id(node)] a number for every node below node; structurally equal nodes get
+    # the same number (distinct holds the numbers by structure). Returns the number of node.
+    @staticmethod
+    def _number(node, numbers, distinct):
+        if isinstance(node, ast.Constant):
+            key = ("constant", repr(node.value))
+        elif isinstance(node, ast.Name):
+            key = ("name", node.id)
+        else:
+            operation = type(node.op) if not isinstance(node, ast.Call) else node.func.id
+            key = (operation,) + tuple(Symbolic._number(child, numbers, distinct) for child in Symbolic._children(node))
+        numbers[id(node)] = distinct.setdefault(key, len(distinct))
+        return numbers[id(node)]
+
+    # Writes an expression node as an expression string, e.g. "3 * x ** 2".
+    @staticmethod
+    def to_source(node):
+        return Symbolic._source(node)[0]
+
+    # Recursive helper of to_source: returns (text, precedence).
+    @staticmethod
+    def _source(node):
+        if isinstance(node, ast.Constant):
+            value = node.value
+            text = str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+            return text, Symbolic.UNARY_PRECEDENCE if value < 0 else Symbolic.ATOM_PRECEDENCE
+        if isinstance(node, ast.Name):
+            return node.id, Symbolic.ATOM_PRECEDENCE
+        if isinstance(node, ast.Call):
+            return f"{node.func.id}({Symbolic.to_source(node.args[0])})", Symbolic.ATOM_PRECEDENCE
+        if isinstance(node, ast.UnaryOp):
+            operand, precedence = Symbolic._source(node.operand)
+            if precedence < Symbolic.UNARY_PRECEDENCE:
+                operand = f"({operand})"
+            return ("-" if isinstance(node.op, ast.USub) else "+") + operand, Symbolic.UNARY_PRECEDENCE
+
+        precedence = Symbolic.PRECEDENCE[type(node.op)]
+        (left, left_precedence), (right, right_precedence) = Symbolic._source(node.left), Symbolic._source(node.right)
+        # ** groups to the right and binds tighter than a unary minus on its left; the others group to the left
+        power = isinstance(node.op, ast.Pow)
+        if left_precedence < precedence or (power and left_precedence == precedence):
+            left = f"({left})"
+        if right_precedence < precedence or (not power and right_precedence == precedence
+                                             and isinstance(node.op, (ast.Sub, ast.Div))):
+            right = f"({right})"
+        symbol = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Pow: "**"}[type(node.op)]
+        return f"{left} {symbol} {right}", precedence
+
+    # The operands of a node (none for names and constants).
+    @staticmethod
+    def _children(node):
+        if isinstance(node, ast.BinOp):
+            return node.left, node.right
+        if isinstance(node, ast.UnaryOp):
+            return node.operand,
+        if isinstance(node, ast.Call):
+            return node.args
+        return ()
+
+    # Returns a node of the same type with function applied to its operands (names and constants unchanged).
+    @staticmethod
+    def _map_children(node, function):
+        if isinstance(node, ast.BinOp):
+            return ast.BinOp(left=function(node.left), op=node.op, right=function(node.right))
+        if isinstance(node, ast.UnaryOp):
+            return ast.UnaryOp(op=node.op, operand=function(node.operand))
+        if isinstance(node, ast.Call):
+            return ast.Call(func=node.func, args=[function(argument) for argument in node.args], keywords=[])
+        return node
+
+    # The value of function(*arguments) as a finite float, or None if it has no such value.
+    @staticmethod
+    def _fold(function, *arguments):
+        try:
+            with np.errstate(all="ignore"):
+                value = function(*arguments)
+        except (ArithmeticError, ValueError):
+            return None
+        if isinstance(value, complex) or not np.isfinite(value):
+            return None
+        return float(value)
+
+    @staticmethod
+    def _constant(value):
+        return ast.Constant(value=float(value))
+
+    # Whether node is a constant (with the given value, if any).
+    @staticmethod
+    def _is_constant(node, value=None):
+        return isinstance(node, ast.Constant) and (value is None or node.value == value)
+
+    # Builds left op right, folding two constants.
+    @staticmethod
+    def _binary(op, left, right):
+        if Symbolic._is_constant(left) and Symbolic._is_constant(right):
+            value = Symbolic._fold(Symbolic.BINARY_OPERATORS[type(op)], left.value, right.value)
+            if value is not None:
+                return Symbolic._constant(value)
+        return ast.BinOp(left=left, op=op, right=right)
+
+    @staticmethod
+    def _add(left, right):
+        if Symbolic._is_constant(left, 0.0):
+            return right
+        if Symbolic._is_constant(right, 0.0):
+            return left
+        if isinstance(right, ast.UnaryOp) and isinstance(right.op, ast.USub):
+            return Symbolic._subtract(left, right.operand)
+        return Symbolic._binary(ast.Add(), left, right)
+
+    @staticmethod
+    def _subtract(left, right):
+        if Symbolic._is_constant(right, 0.0):
+            return left
+        if Symbolic._is_constant(left, 0.0):
+            return Symbolic._negate(right)
+        return Symbolic._binary(ast.Sub(), left, right)
+
+    @staticmethod
+    def _multiply(left, right):
+        if Symbolic._is_constant(left, 0.0) or Symbolic._is_constant(right, 0.0):
+            return Symbolic._constant(0.0)
+        if Symbolic._is_constant(left, 1.0):
+            return right
+        if Symbolic._is_constant(right, 1.0):
+            return left
+        if Symbolic._is_constant(left, -1.0):
+            return Symbolic._negate(right)
+        if Symbolic._is_constant(right, -1.0):
+            return Symbolic._negate(left)
+        # c1 * (c2 * u) becomes (c1 * c2) * u
+        if Symbolic._is_constant(left) and isinstance(right, ast.BinOp) and isinstance(right.op, ast.Mult) \
+                and Symbolic._is_constant(right.left):
+            return Symbolic._multiply(Symbolic._binary(ast.Mult(), left, right.left), right.right)
+        return Symbolic._binary(ast.Mult(), left, right)
+
+    @staticmethod
+    def _divide(left, right):
+        if Symbolic._is_constant(left, 0.0):
+            return left
+        if Symbolic._is_constant(right, 1.0):
+            return left
+        return Symbolic._binary(ast.Div(), left, right)
+
+    @staticmethod
+    def _power(base, exponent):
+        if Symbolic._is_constant(exponent, 0.0):
+            return Symbolic._constant(1.0)
+        if Symbolic._is_constant(exponent, 1.0):
+            return base
+        return Symbolic._binary(ast.Pow(), base, exponent)
+
+    @staticmethod
+    def _negate(node):
+        if Symbolic._is_constant(node):
+            return Symbolic._constant(-node.value)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return node.operand
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult) and Symbolic._is_constant(node.left):
+            return Symbolic._multiply(Symbolic._constant(-node.left.value), node.right)
+        return ast.UnaryOp(op=ast.USub(), operand=node)
+
+    # ln(node), written as log10(node) * ln(10)
+    @staticmethod
+    def _natural_log(node):
+        logarithm = ast.Call(func=ast.Name(id="log10", ctx=ast.Load()), args=[node], keywords=[])
+        return Symbolic._multiply(logarithm, Symbolic._constant(Symbolic.LN10))
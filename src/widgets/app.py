@@ -1,18 +1,63 @@
 import sys
 
+from PySide2.QtCore import QEvent, QObject
 from PySide2.QtWidgets import QApplication
 
-from src.widgets.solver_ui import SolverUI
+from src.widgets.startup import StartupTimer
+
+# Command line option that prints how long the startup took (see StartupTimer) to stderr
+STARTUP_REPORT_OPTION = "--startup-report"
+
+
+"""
+Marks the first paint of the watched window on a StartupTimer, and prints the startup report once the
+window has been painted and the plot canvas is ready.
+"""
+class StartupReporter(QObject):
+    def __init__(self, timer, window):
+        super().__init__(window)
+        self.timer = timer
+        window.installEventFilter(self)
+        window.plotter.canvas_ready.connect(self.on_canvas_ready)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint and not self.timer.has_mark("first paint"):
+            self.timer.mark("first paint")
+            self.report_if_done()
+        return False
+
+    def on_canvas_ready(self):
+        self.timer.mark("plot canvas ready")
+        self.report_if_done()
+
+    def report_if_done(self):
+        if self.timer.has_mark("first paint") and self.timer.has_mark("plot canvas ready"):
+            self.timer.stop_imports()
+            print(self.timer.report(), file=sys.stderr)
+
 
 """
 Entry point for the application.
 Initializes the QApplication and displays the SolverUI then run the event loop.
+With --startup-report, the time to the first paint and to the ready plot canvas, and the time spent
+importing modules, are printed to stderr.
 """
 def main():
+    timer = None
+    if STARTUP_REPORT_OPTION in sys.argv:
+        timer = StartupTimer()
+        timer.record_imports()
     # Create the Qt Application
-    app = QApplication(sys.argv)
+    app = QApplication([argument for argument in sys.argv if argument != STARTUP_REPORT_OPTION])
+    # Imported here, so the report includes the widgets; Matplotlib is only imported once the window shows
+    from src.widgets.solver_ui import SolverUI
+    if timer is not None:
+        timer.mark("widgets imported")
     # Create and show the main window
     ui = SolverUI()
+    if timer is not None:
+        timer.mark("window created")
+        StartupReporter(timer, ui)
     ui.show()
     # Run the main Qt loop
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,136 @@
+import numpy as np
+
+"""
+Decimator reduces dense sample arrays to roughly the number of points that can be seen on screen
+(level of detail), so drawing cost depends on the canvas width instead of the number of samples.
+Two methods are available:
+- "minmax": keeps the first, last, lowest and highest sample of every pixel column, so spikes
+  and the vertical extent of the curve in each column look exactly as with all samples.
+- "lttb": Largest-Triangle-Three-Buckets, which keeps the visually most significant sample of
+  each bucket and gives smoother lines with fewer points.
+Both keep NaN gaps (the curve stays broken where the function is undefined) and can insert
+extra points, e.g. the annotated roots, so the curve passes exactly through them.
+"""
+class Decimator:
+    METHODS = ("minmax", "lttb")
+    # Arrays with at most this many samples per column are drawn as they are
+    MAX_SAMPLES_PER_COLUMN = 4
+
+    """
+    Reduces the samples (xs, ys) of a curve to about columns pixel columns.
+    Parameters:
+    - xs: Sorted array of x values
+    - ys: Array of corresponding y values (NaN where undefined)
+    - columns: Width of the plot in pixels
+    - method: One of METHODS (default: "minmax")
+    - keep: Optional sequence of (x, y) points that must appear in the result
+    Returns:
+    - Tuple (xs, ys) of the decimated arrays, sorted by x
+    """
+    @staticmethod
+    def decimate(xs, ys, columns, method="minmax", keep=None):
+        if method not in Decimator.METHODS:
+            raise ValueError(f"Unknown decimation method: {method}")
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        columns = max(int(columns), 1)
+        if xs.size > Decimator.MAX_SAMPLES_PER_COLUMN * columns:
+            if method == "minmax":
+                xs, ys = Decimator.min_max(xs, ys, columns)
+            else:
+                xs, ys = Decimator.lttb(xs, ys, 2 * columns)
+        return Decimator.insert_points(xs, ys, keep)
+
+    """
+    Min/max decimation over pixel columns.
+    How it works:
+    1. Assign every sample to a pixel column by its x value, and split columns at NaN samples
+       so that no group spans a gap.
+    2. From every group of finite samples keep the first, last, lowest and highest one
+       (all groups are reduced at once with ufunc.reduceat, since they are contiguous).
+    3. Keep the first NaN of every run of NaN samples, so the line stays broken there.
+    """
+    @staticmethod
+    def min_max(xs, ys, columns):
+        finite = np.isfinite(ys)
+        if not finite.any():
+            return xs[:1], ys[:1]
+        width = xs[-1] - xs[0]
+        if width > 0:
+            column = np.minimum(((xs - xs[0]) / width * columns).astype(np.int64), columns - 1)
+        else:
+            column = np.zeros(xs.size, dtype=np.int64)
+        segment = np.cumsum(~finite)
+        # Groups of finite samples sharing a column and a segment are contiguous (xs is sorted)
+        index = np.flatnonzero(finite)
+        key = column[index] * (segment[-1] + 1) + segment[index]
+        starts = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]]))
+        ends = np.concatenate([starts[1:], [index.size]])
+        values = ys[index]
+        group = np.repeat(np.arange(starts.size), ends - starts)
+        position = np.arange(index.size)
+        lowest = np.minimum.reduceat(values, starts)
+        highest = np.maximum.reduceat(values, starts)
+        first_low = np.minimum.reduceat(np.where(values == lowest[group], position, index.size), starts)
+        first_high = np.minimum.reduceat(np.where(values == highest[group], position, index.size), starts)
+
+        gaps = np.flatnonzero(~finite & np.concatenate([[True], finite[:-1]]))
+        selected = np.unique(np.concatenate([index[starts], index[ends - 1], index[first_low],
+                                             index[first_high], gaps]))
+        return xs[selected], ys[selected]
+
+    """
+    Largest-Triangle-Three-Buckets decimation to about threshold points.
+    Every run of finite samples between NaN gaps is decimated separately, with a share of the
+    points proportional to its length; the first NaN of every gap is kept.
+    """
+    @staticmethod
+    def lttb(xs, ys, threshold):
+        finite = np.isfinite(ys)
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], finite, [False]]).astype(np.int8)))
+        selected = [np.flatnonzero(~finite & np.concatenate([[True], finite[:-1]]))]
+        total = max(int(finite.sum()), 1)
+        for start, stop in zip(edges[::2], edges[1::2]):
+            points = max(3, int(round(threshold * (stop - start) / total)))
+            selected.append(start + Decimator._lttb_run(xs[start:stop], ys[start:stop], points))
+        selected = np.unique(np.concatenate(selected))
+        return xs[selected], ys[selected]
+
+    # LTTB on one run of finite samples; returns the indices of the kept samples.
+    @staticmethod
+    def _lttb_run(xs, ys, points):
+        if xs.size <= points:
+            return np.arange(xs.size)
+        # Bucket boundaries for the samples between the fixed first and last one
+        bounds = np.linspace(1, xs.size - 1, points - 1).astype(np.int64)
+        selected = np.empty(points, dtype=np.int64)
+        selected[0], selected[-1] = 0, xs.size - 1
+        previous = 0
+        for bucket in range(points - 2):
+            start, stop = bounds[bucket], max(bounds[bucket + 1], bounds[bucket] + 1)
+            # The third corner of the triangle is the average of the next bucket (or the last sample)
+            if bucket + 2 < points - 1:
+                following = slice(bounds[bucket + 1], max(bounds[bucket + 2], bounds[bucket + 1] + 1))
+                x_next, y_next = xs[following].mean(), ys[following].mean()
+            else:
+                x_next, y_next = xs[-1], ys[-1]
+            x_prev, y_prev = xs[previous], ys[previous]
+            area = np.abs((x_prev - x_next) * (ys[start:stop] - y_prev)
+                          - (x_prev - xs[start:stop]) * (y_next - y_prev))
+            previous = start + int(np.argmax(area))
+            selected[bucket + 1] = previous
+        return np.unique(selected)
+
+    """
+    Inserts (x, y) points into sorted sample arrays; points outside the x range of the samples
+    or with a non-finite coordinate are ignored.
+    """
+    @staticmethod
+    def insert_points(xs, ys, points):
+        if points is None or len(points) == 0 or xs.size == 0:
+            return xs, ys
+        points = np.asarray([(x, y) for x, y in points], dtype=float).reshape(-1, 2)
+        points = points[np.isfinite(points).all(axis=1)
+                        & (points[:, 0] >= xs[0]) & (points[:, 0] <= xs[-1])]
+        position = np.searchsorted(xs, points[:, 0])
+        return np.insert(xs, position, points[:, 0]), np.insert(ys, position, points[:, 1])
@@ -1,17 +1,27 @@
+from PySide2.QtCore import QTimer, Signal
 from PySide2.QtGui import Qt
 from PySide2.QtWidgets import (
-    QWidget, QLineEdit, QLabel, QGridLayout, QDoubleSpinBox, QHBoxLayout, QPushButton
+    QWidget, QLineEdit, QLabel, QGridLayout, QDoubleSpinBox, QHBoxLayout, QPushButton, QProgressBar, QCheckBox
 )
 
 """
 InputPanelWidget is a QWidget that provides input fields for two functions, range limits, and a span value.
-It includes "Solve" and "Clear" buttons to trigger actions.
+It includes "Solve" and "Clear" buttons to trigger actions, and a progress bar shown while a solve runs.
+In live mode, edits are debounced and then announced with the live_update_requested signal.
 It uses a grid layout for organized placement of components and applies custom styles for child components.
 """
 class InputPanelWidget(QWidget):
+    # Emitted in live mode once the inputs have not changed for DEBOUNCE_MS milliseconds
+    live_update_requested = Signal()
+    DEBOUNCE_MS = 60
+
     # Initialize the InputPanelWidget with optional parent
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.debounce_timer = None
+        self.status_label = None
+        self.live_checkbox = None
+        self.progress_bar = None
         self.clear_btn = None
         self.solve_btn = None
         self.span_label = None
@@ -63,6 +73,20 @@ class InputPanelWidget(QWidget):
         self.solve_btn = QPushButton('Solve')
         self.clear_btn = QPushButton('Clear')
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.hide()
+
+        self.live_checkbox = QCheckBox('Live')
+        self.live_checkbox.setToolTip('Solve while typing')
+        self.status_label = QLabel()
+        self.status_label.setObjectName('status')
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(InputPanelWidget.DEBOUNCE_MS)
+
 
     """
     Organizes the UI components into a grid layout for the InputPanelWidget.
@@ -81,7 +105,10 @@ class InputPanelWidget(QWidget):
         grid.addWidget(self.span_label, 2, 0)
         grid.addWidget(self.span, 2, 1)
         btn_layout = QHBoxLayout()
+        btn_layout.addWidget(self.progress_bar)
+        btn_layout.addWidget(self.status_label)
         btn_layout.addStretch()
+        btn_layout.addWidget(self.live_checkbox)
         btn_layout.addWidget(self.solve_btn)
         btn_layout.addWidget(self.clear_btn)
         grid.addLayout(btn_layout, 3, 0, 1, 4)
@@ -130,6 +157,26 @@ class InputPanelWidget(QWidget):
                 font-size: 15px;
                 color: #0451A5;
             }
+            QProgressBar {
+                background-color: #ffffff;
+                border-radius: 4px;
+                border: 1px solid #cccccc;
+                max-height: 8px;
+                min-width: 200px;
+            }
+            QProgressBar::chunk {
+                background-color: #007ACC;
+                border-radius: 4px;
+            }
+            QLabel#status {
+                font-weight: normal;
+                color: #555555;
+            }
+            QCheckBox {
+                font-weight: bold;
+                font-size: 15px;
+                color: #0451A5;
+            }
             QPushButton {
                 border-radius: 8px;
                 font-weight: bold;
@@ -155,9 +202,41 @@ class InputPanelWidget(QWidget):
 
 
     """
-    Connects signals to slots for the InputPanelWidget. Currently, no signals are connected.
-    This method can be expanded in the future to handle button clicks or input changes.
+    Connects signals to slots for the InputPanelWidget.
+    Every edit of the functions or the range restarts the debounce timer (in live mode only),
+    so a burst of keystrokes leads to a single live update.
     """
     def connect_signals(self):
-        pass
+        self.f1_input.textChanged.connect(self.schedule_live_update)
+        self.f2_input.textChanged.connect(self.schedule_live_update)
+        self.x_min.valueChanged.connect(self.schedule_live_update)
+        self.x_max.valueChanged.connect(self.schedule_live_update)
+        self.span.valueChanged.connect(self.schedule_live_update)
+        self.live_checkbox.toggled.connect(self.schedule_live_update)
+        self.debounce_timer.timeout.connect(self.live_update_requested.emit)
+
+    # Whether live mode is switched on.
+    def is_live(self):
+        return self.live_checkbox.isChecked()
+
+    # Restarts the debounce timer if live mode is on, and stops it otherwise.
+    def schedule_live_update(self, *_):
+        if self.is_live():
+            self.debounce_timer.start()
+        else:
+            self.debounce_timer.stop()
+
+    # Shows a short status message next to the buttons (an empty string clears it).
+    def set_status(self, text):
+        self.status_label.setText(text)
+
+    """
+    Shows the progress bar at the given completed fraction (0 to 1), or hides it when fraction is None.
+    """
+    def set_progress(self, fraction):
+        if fraction is None:
+            self.progress_bar.hide()
+            return
+        self.progress_bar.setValue(int(round(fraction * 100)))
+        self.progress_bar.show()
 
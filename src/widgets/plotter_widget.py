@@ -1,41 +1,140 @@
 import numpy as np
+from PySide2.QtCore import QThreadPool, QTimer, Signal
 from PySide2.QtGui import Qt
-from PySide2.QtWidgets import QWidget, QVBoxLayout
+from PySide2.QtWidgets import QWidget, QVBoxLayout, QSizePolicy
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+from src.fxsolver.stats import SolveStats
+from src.widgets.decimator import Decimator
+from src.widgets.resample_worker import ResampleWorker
+from src.widgets.tile_cache import TileCache
 
 """
 The PlotterWidget class is a QWidget that integrates a Matplotlib figure and canvas for plotting functions.
 It includes a navigation toolbar for interactive features like zooming and panning.
+When the plotted functions are known, the curves are re-sampled for the visible x range whenever it
+changes (pan, zoom, resize), at SAMPLES_PER_PIXEL samples per pixel, using a TileCache; while the samples
+of the current curves (e.g. the ones shared by the solve) cover the range, plus the axes margins,
+with at least MIN_SAMPLES_PER_PIXEL samples per pixel, they are only decimated again.
+Re-sampling runs on a ResampleWorker in a single-thread pool, RESAMPLE_DELAY_MS after the range stopped
+changing, and its samples are drawn when it reports back, unless the view or the plot changed since;
+meanwhile the current curves stay on screen.
+The curves, root markers and annotations are persistent animated artists: a new plot only updates
+their data and, while the axes limits and the legend stay the same, blits them over a cached
+background instead of redrawing the whole figure.
+Dense sample arrays are reduced with a Decimator to the width of the axes in pixels before they are drawn
+(method lod_method), keeping spikes, NaN gaps and the annotated roots.
+Importing Matplotlib takes longer than starting the rest of the application, so it is only imported,
+and the figure, canvas and toolbar created, once the widget has been painted for the first time
+(or on the first plot, if that comes earlier); canvas_ready is emitted then.
+Until then figure, canvas, ax and toolbar are None.
 """
 class PlotterWidget(QWidget):
+    # Emitted once the Matplotlib figure, canvas and toolbar have been created
+    canvas_ready = Signal()
+
+    # Samples per horizontal pixel when the curves are re-sampled for the visible range,
+    # and the fewest samples per pixel of the current curves before they are re-sampled
+    SAMPLES_PER_PIXEL = 2
+    MIN_SAMPLES_PER_PIXEL = 1
+    # Number of samples of a freshly plotted range
+    PLOT_SAMPLES = 1000
+    # Milliseconds the visible range must stay unchanged before the curves are re-sampled
+    RESAMPLE_DELAY_MS = 50
+
     # Initialize the PlotterWidget with optional parent
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Plotted functions (for re-sampling), the samples (xs, (y1, y2)) of the lines before decimation,
+        # and their (x_min, x_max, spacing)
+        self.functions = None
+        self.samples = None
+        self.line_view = None
+        # Set while the view is fitted to new data, whose samples cover it already
+        self.autoscaling = False
+        self.tile_cache = TileCache()
+        # Re-sampling: the pool (one thread, which alone uses tile_cache), the generation number of the
+        # latest request, the workers that have not reported back yet, and the debounce timer
+        self.resample_pool = QThreadPool(self)
+        self.resample_pool.setMaxThreadCount(1)
+        self.resample_generation = 0
+        self.resample_workers = {}
+        self.resample_timer = QTimer(self)
+        self.resample_timer.setSingleShot(True)
+        self.resample_timer.setInterval(PlotterWidget.RESAMPLE_DELAY_MS)
+        self.resample_timer.timeout.connect(self.start_resample)
+        # Persistent artists, the legend labels they were last drawn with, and the cached background
+        # with the axes limits it was drawn with
+        self.lines = None
+        self.roots = None
+        self.annotations = []
+        self.legend_labels = None
+        self.background = None
+        self.background_limits = None
+        # Decimation method for dense curves (see Decimator.METHODS), and the roots every curve must keep
+        self.lod_method = "minmax"
+        self.root_points = []
         self.toolbar = None
         self.ax = None
         self.canvas = None
         self.figure = None
-        self.init_components()
+        # Creates the canvas on the event loop tick after the first paint
+        self.canvas_timer = QTimer(self)
+        self.canvas_timer.setSingleShot(True)
+        self.canvas_timer.setInterval(0)
+        self.canvas_timer.timeout.connect(self.ensure_canvas)
         self.init_layout()
         self.apply_styles()
+
+    # Creates the Matplotlib figure, canvas and toolbar unless they exist already (see init_components).
+    def ensure_canvas(self):
+        self.canvas_timer.stop()
+        if self.canvas is not None:
+            return
+        self.init_components()
+        self.layout().addWidget(self.toolbar)
+        self.layout().addWidget(self.canvas)
         self.connect_signals()
+        self.canvas_ready.emit()
+
+    # Whether the Matplotlib canvas has been created.
+    def is_canvas_ready(self):
+        return self.canvas is not None
+
+    # After the first paint (the window is on screen by then), creates the canvas on the next event loop tick.
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.canvas is None and not self.canvas_timer.isActive():
+            self.canvas_timer.start()
 
     # Initializes the UI components of the PlotterWidget, including the Matplotlib figure, canvas, and toolbar.
     def init_components(self):
+        # Matplotlib is imported here rather than with this module, see the class documentation
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.figure import Figure
+
         self.figure = Figure(figsize=(5, 4), dpi=100, tight_layout=True)
         self.canvas = FigureCanvas(self.figure)
         self.ax = self.figure.add_subplot(111)
         self.toolbar = NavigationToolbar(self.canvas, self)
+        self.init_artists()
 
-    # Sets up the layout of the PlotterWidget, arranging the toolbar and canvas vertically.
+    # Creates the static decorations and the persistent (animated) artists that plots update.
+    def init_artists(self):
+        self.ax.grid(True, alpha=0.3)
+        self.ax.set_xlabel("x")
+        self.ax.set_ylabel("y")
+        self.ax.set_title("PySolver Function Plotter")
+        self.lines = [self.ax.plot([], [], animated=True)[0] for _ in range(2)]
+        self.roots = self.ax.scatter([], [], s=60, zorder=5, animated=True)
+        self.ax.callbacks.connect("xlim_changed", self.on_xlim_changed)
+
+    # Sets up the layout of the PlotterWidget, which arranges the toolbar and canvas vertically once they exist.
+    # The widget takes the free space right away, so the window does not change its layout when they appear.
     def init_layout(self):
         layout = QVBoxLayout()
-        layout.addWidget(self.toolbar)
-        layout.addWidget(self.canvas)
         self.setLayout(layout)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
     # Applies custom styles to the PlotterWidget for consistent appearance.
     def apply_styles(self):
@@ -48,13 +147,26 @@ class PlotterWidget(QWidget):
             """
         )
 
-    # Connects signals to slots for interactive functionality (currently a placeholder).
+    # Connects signals to slots for interactive functionality: resizing the canvas re-samples the curves,
+    # and every full redraw refreshes the cached background.
     def connect_signals(self):
-        pass
+        self.canvas.mpl_connect("resize_event", lambda event: self.on_xlim_changed(self.ax))
+        self.canvas.mpl_connect("draw_event", self.on_draw)
 
     # Plots two functions on the axes, with options for centering, span, and annotations.
     def plot_functions(self, f1, f2, f1_expr: str = None, f2_expr: str = None, x_center=None, span=5.0, default_range=(-10, 10), annotate=None):
-        self.ax.clear()
+        xs, y1, y2 = PlotterWidget.sample_functions(f1, f2, x_center, span, default_range)
+        self.plot_samples(xs, y1, y2, f1_expr=f1_expr, f2_expr=f2_expr, annotate=annotate, functions=(f1, f2))
+
+    """
+    Evaluates both functions on the plotting grid and returns (xs, y1, y2).
+    It does not touch any widget, so it can run on a worker thread.
+    Samples (xs, y1, y2) that are already known, e.g. from FxSolver.find_roots(..., return_samples=True),
+    can be passed as samples: if they cover the plotted range with at least PLOT_SAMPLES points,
+    they are cut to the range (plus one sample on each side) instead of evaluating the functions again.
+    """
+    @staticmethod
+    def sample_functions(f1, f2, x_center=None, span=5.0, default_range=(-10, 10), samples=None):
         # Determine x range based on center and span or default range
         if x_center is not None and np.isfinite(x_center):
             x_min = x_center - span
@@ -62,39 +174,212 @@ class PlotterWidget(QWidget):
         else:
             x_min, x_max = default_range
 
+        if samples is not None:
+            xs, y1, y2 = samples
+            if len(xs) and xs[0] <= x_min and xs[-1] >= x_max:
+                start = max(np.searchsorted(xs, x_min) - 1, 0)
+                stop = min(np.searchsorted(xs, x_max, side="right") + 1, len(xs))
+                if stop - start >= PlotterWidget.PLOT_SAMPLES:
+                    return xs[start:stop], y1[start:stop], y2[start:stop]
+
         # Generate x values and compute corresponding y values for both functions.
-        xs = np.linspace(x_min, x_max, 1000)
-        y1 = np.array([f1(x) for x in xs], dtype=float)
-        y2 = np.array([f2(x) for x in xs], dtype=float)
+        with SolveStats.phase("plot_sampling"):
+            xs = np.linspace(x_min, x_max, PlotterWidget.PLOT_SAMPLES)
+            y1 = np.broadcast_to(np.asarray(f1(xs), dtype=float), xs.shape)
+            y2 = np.broadcast_to(np.asarray(f2(xs), dtype=float), xs.shape)
+            SolveStats.evaluated(xs.size)
+            SolveStats.evaluated(xs.size)
+        return xs, y1, y2
 
-        # Plot the functions with appropriate labels.
+    # Plots already sampled function values (see sample_functions) on the axes, with optional annotations.
+    # Passing the sampled functions as functions=(f1, f2) lets the curves follow pans and zooms.
+    # With a SolveStats recording, the time is added to its "plot" phase (a full redraw happens later, on idle).
+    def plot_samples(self, xs, y1, y2, f1_expr: str = None, f2_expr: str = None, annotate=None, functions=None):
+        with SolveStats.phase("plot"):
+            self.update_plot(xs, y1, y2, f1_expr, f2_expr, annotate, functions)
+
+    # The body of plot_samples, which times it as the "plot" phase.
+    def update_plot(self, xs, y1, y2, f1_expr, f2_expr, annotate, functions):
+        self.ensure_canvas()
+        # Samples of a reversed range run from right to left; decimation and re-sampling expect sorted x
+        if len(xs) > 1 and xs[0] > xs[-1]:
+            xs, y1, y2 = xs[::-1], y1[::-1], y2[::-1]
+        # Update the data of the persistent lines with appropriate labels.
         if (f1_expr is not None) and (f2_expr is not None):
-            self.ax.plot(xs, y1, label=f"$f_1(x) = {f1_expr.replace('*', '')}$")
-            self.ax.plot(xs, y2, label=f"$f_2(x) = {f2_expr.replace('*', '')}$")
+            labels = (f"$f_1(x) = {f1_expr.replace('*', '')}$", f"$f_2(x) = {f2_expr.replace('*', '')}$")
         else:
-            self.ax.plot(xs, y1, label="$f_1(x)")
-            self.ax.plot(xs, y2, label="$f_2(x)")
-
-        # Annotate intersection points if provided.
-        if annotate is not None and annotate[0] is not None:
-            for (xr, yr) in annotate:
-                if xr is not None and yr is not None and np.isfinite(xr) and np.isfinite(yr):
-                    self.ax.scatter([xr], [yr], s=60, zorder=5)
-                    self.ax.annotate(f"Solution\n(x={xr:.4g}, y={yr:.4g})",
-                                     xy=(xr, yr),
-                                     xytext=(10, 10),
-                                     textcoords="offset points",
-                                     bbox=dict(boxstyle="round,pad=0.3", fc="w", ec="0.5", alpha=0.9),
-                                     arrowprops=dict(arrowstyle="->", lw=1))
+            labels = ("$f_1(x)$", "$f_2(x)$")
+        self.set_roots(annotate)
+        for line, ys in zip(self.lines, (y1, y2)):
+            self.set_line_data(line, xs, ys)
+        self.functions = functions
+        self.set_samples(xs, (y1, y2))
+        self.cancel_resample()
 
-        self.ax.grid(True, alpha=0.3)
-        self.ax.legend(loc="best")
-        self.ax.set_xlabel("x")
-        self.ax.set_ylabel("y")
-        self.ax.set_title("PySolver Function Plotter")
-        self.canvas.draw_idle()
+        # The mathtext legend is only rebuilt when the expressions change.
+        redraw = self.background is None
+        if labels != self.legend_labels:
+            for line, label in zip(self.lines, labels):
+                line.set_label(label)
+            self.ax.legend(loc="best")
+            self.legend_labels = labels
+            redraw = True
+
+        # Fit the view to the new data, as a fresh plot would; new limits need a full redraw.
+        limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        self.ax.relim()
+        self.ax.set_autoscale_on(True)
+        self.autoscaling = True
+        try:
+            self.ax.autoscale_view()
+        finally:
+            self.autoscaling = False
+        redraw = redraw or limits != (self.ax.get_xlim(), self.ax.get_ylim())
+        if redraw:
+            self.canvas.draw_idle()
+        else:
+            self.blit()
+
+    # Shows markers and annotations for the given (x, y) intersection points (None or [] removes them).
+    def set_roots(self, roots):
+        for annotation in self.annotations:
+            annotation.remove()
+        points = [(xr, yr) for (xr, yr) in (roots or []) if xr is not None and yr is not None
+                  and np.isfinite(xr) and np.isfinite(yr)]
+        self.root_points = points
+        self.roots.set_offsets(np.array(points, dtype=float).reshape(-1, 2))
+        # One colour per root, continuing the colour cycle after the two lines
+        self.roots.set_color([f"C{(i + 2) % 10}" for i in range(len(points))])
+        self.annotations = [
+            self.ax.annotate(f"Solution\n(x={xr:.4g}, y={yr:.4g})",
+                             xy=(xr, yr),
+                             xytext=(10, 10),
+                             textcoords="offset points",
+                             bbox=dict(boxstyle="round,pad=0.3", fc="w", ec="0.5", alpha=0.9),
+                             arrowprops=dict(arrowstyle="->", lw=1),
+                             animated=True)
+            for xr, yr in points
+        ]
+
+    # Remembers the samples of the lines before decimation, and the range and spacing they cover.
+    def set_samples(self, xs, ys):
+        self.samples = (xs, ys) if len(xs) else None
+        self.line_view = (xs[0], xs[-1], (xs[-1] - xs[0]) / max(len(xs) - 1, 1)) if len(xs) else None
+
+    # Sets the data of a curve, decimated to the width of the axes in pixels and passing through the roots.
+    def set_line_data(self, line, xs, ys):
+        columns = max(1, int(self.ax.get_window_extent().width))
+        line.set_data(*Decimator.decimate(xs, ys, columns, self.lod_method, keep=self.root_points))
+
+    # Draws the animated artists over the cached background and shows only that region.
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.figure.bbox)
+
+    # Draws the animated artists (skipped by a normal figure draw) onto the canvas.
+    def draw_artists(self):
+        for artist in [*self.lines, self.roots, *self.annotations]:
+            self.ax.draw_artist(artist)
+
+    # After every full redraw, caches the background (everything but the animated artists) and draws them.
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.background_limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        self.draw_artists()
+
+    """
+    Updates the curves for the visible x range when it changes.
+    Called by Matplotlib while panning or zooming, before the canvas is redrawn, so only the line data
+    is updated here. The view fitted to new data by plot_samples is ignored. If the current samples cover
+    the range (up to the axes margins, which autoscaling adds around the data) with at least
+    MIN_SAMPLES_PER_PIXEL samples per pixel, they are only decimated again for the range; otherwise
+    re-sampling is scheduled (see start_resample).
+    """
+    def on_xlim_changed(self, ax):
+        if self.functions is None or self.autoscaling:
+            return
+        x_min, x_max = sorted(ax.get_xlim())
+        if not self.covers(x_min, x_max):
+            self.resample_timer.start()
+            return
+        self.resample_timer.stop()
+        xs, ys = self.samples
+        start = max(np.searchsorted(xs, x_min) - 1, 0)
+        stop = min(np.searchsorted(xs, x_max, side="right") + 1, len(xs))
+        for line, y in zip(self.lines, ys):
+            self.set_line_data(line, xs[start:stop], y[start:stop])
+
+    # Whether the current samples cover [x_min, x_max] (up to the axes margins) densely enough for the axes width.
+    def covers(self, x_min, x_max):
+        if self.line_view is None:
+            return False
+        view_min, view_max, view_spacing = self.line_view
+        margin = self.ax.margins()[0] * (view_max - view_min)
+        columns = max(1, int(self.ax.get_window_extent().width))
+        return view_min - margin <= x_min and view_max + margin >= x_max \
+            and view_spacing * columns * PlotterWidget.MIN_SAMPLES_PER_PIXEL <= x_max - x_min
+
+    # Samples the functions for the visible range on a ResampleWorker (after the debounce delay).
+    def start_resample(self):
+        if self.functions is None:
+            return
+        x_min, x_max = sorted(self.ax.get_xlim())
+        samples = max(1, int(self.ax.get_window_extent().width)) * PlotterWidget.SAMPLES_PER_PIXEL
+        self.resample_generation += 1
+        worker = ResampleWorker(self.resample_generation, self.functions, self.tile_cache, x_min, x_max, samples)
+        worker.signals.finished.connect(self.on_resampled)
+        worker.signals.failed.connect(self.on_resample_failed)
+        self.resample_workers[self.resample_generation] = worker
+        self.resample_pool.start(worker)
+
+    # Drops a pending or running re-sampling; its samples will not be shown.
+    def cancel_resample(self):
+        self.resample_timer.stop()
+        self.resample_generation += 1
+
+    # Whether re-sampling is scheduled or still running in the background.
+    def is_resampling(self):
+        return self.resample_timer.isActive() or bool(self.resample_workers)
+
+    # Shows the samples of the latest re-sampling, and redraws the curves over the cached background if possible.
+    def on_resampled(self, generation, samples):
+        self.resample_workers.pop(generation, None)
+        if generation != self.resample_generation:
+            return
+        xs, ys = samples
+        for line, y in zip(self.lines, ys):
+            self.set_line_data(line, xs, y)
+        self.set_samples(xs, ys)
+        if self.background_limits == (self.ax.get_xlim(), self.ax.get_ylim()):
+            self.blit()
+        else:
+            self.canvas.draw_idle()
+
+    # Forgets a failed re-sampling; the current curves stay on screen.
+    def on_resample_failed(self, generation, message):
+        self.resample_workers.pop(generation, None)
+
+    # Waits for a running re-sampling, e.g. before the widget is destroyed.
+    def wait_for_resample(self):
+        self.cancel_resample()
+        self.resample_pool.waitForDone()
 
     # Clears the current plot from the axes and refreshes the canvas.
     def clear(self):
-        self.ax.clear()
+        self.functions = None
+        self.set_samples([], None)
+        self.cancel_resample()
+        if self.canvas is None:
+            return
+        for line in self.lines:
+            line.set_data([], [])
+        self.set_roots(None)
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        self.legend_labels = None
         self.canvas.draw_idle()
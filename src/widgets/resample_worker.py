@@ -0,0 +1,46 @@
+from PySide2.QtCore import QObject, QRunnable, Signal
+
+"""
+ResampleSignals carries the signals of a ResampleWorker. Every signal starts with the generation number
+of the request, so PlotterWidget can ignore results for a view that has changed since.
+It is created on the GUI thread, so signals emitted by the worker are delivered there (queued).
+"""
+class ResampleSignals(QObject):
+    # generation, samples (xs, (y1, y2))
+    finished = Signal(int, object)
+    # generation, error message
+    failed = Signal(int, str)
+
+
+"""
+ResampleWorker samples the plotted functions for a visible x range through a TileCache on a QThreadPool
+thread, so panning and zooming over expensive functions or wide ranges does not stall the GUI thread.
+The TileCache is not thread-safe: PlotterWidget runs these workers on a pool of a single thread,
+so they use it one at a time, and the GUI thread does not touch it.
+Exactly one of the finished or failed signals is emitted when the worker is done.
+"""
+class ResampleWorker(QRunnable):
+    # Initialize the worker with the functions, the cache to sample them through and the requested range
+    def __init__(self, generation, functions, tile_cache, x_min, x_max, samples):
+        super().__init__()
+        self.generation = generation
+        self.functions = functions
+        self.tile_cache = tile_cache
+        self.x_min = x_min
+        self.x_max = x_max
+        self.samples = samples
+        self.signals = ResampleSignals()
+        # PlotterWidget keeps the worker until it reports back, so Qt must not delete it after run()
+        self.setAutoDelete(False)
+
+    # Runs on a pool thread: samples every function on the same grid and reports it through the signals.
+    def run(self):
+        try:
+            ys = []
+            for f in self.functions:
+                xs, y = self.tile_cache.sample(f, self.x_min, self.x_max, self.samples)
+                ys.append(y)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, (xs, tuple(ys)))
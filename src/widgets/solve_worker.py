@@ -0,0 +1,113 @@
+import threading
+from collections import namedtuple
+
+from PySide2.QtCore import QObject, QRunnable, Signal
+
+from src.fxsolver.solver import FxSolver, SolveCancelled
+from src.fxsolver.stats import SolveStats
+from src.widgets.plotter_widget import PlotterWidget
+
+# Everything SolverUI needs to show a finished solve: the functions, their expressions, the roots,
+# the sampled plot data and the SolveStats of the solve (None unless requested)
+SolveResult = namedtuple("SolveResult", ["f1", "f2", "f1_expr", "f2_expr", "roots", "xs", "y1", "y2", "stats"],
+                         defaults=(None,))
+
+"""
+SolveSignals carries the signals of a SolveWorker. Every signal starts with the generation number
+of the solve, so the receiver can ignore signals of solves that have been superseded.
+It is created on the GUI thread, so signals emitted by the worker are delivered there (queued).
+"""
+class SolveSignals(QObject):
+    # generation, completed fraction (0 to 1)
+    progress = Signal(int, float)
+    # generation, SolveResult
+    finished = Signal(int, object)
+    # generation, error message
+    failed = Signal(int, str)
+    # generation
+    cancelled = Signal(int)
+
+
+"""
+SolveWorker finds the roots of f1 = f2 and samples both functions for plotting on a QThreadPool thread,
+so the GUI thread stays responsive during long solves.
+Cancellation is cooperative: cancel() sets a token that FxSolver.find_roots checks between chunks of work.
+Exactly one of the finished, failed or cancelled signals is emitted when the worker is done.
+With an IncrementalSampler, f1 and f2 are sampled through it, so only the part of the range
+(or the function) that changed since an earlier solve is evaluated again.
+The samples of f1 and f2 taken for solving are reused for the plot data, so each function
+is evaluated on the grid only once.
+With a SolveStats, the solve and the plot sampling are recorded into it (see FxSolver.find_roots).
+With a ResultCache, the roots are looked up in it before anything is sampled, and stored in it after
+a solve. Solves through an IncrementalSampler find their roots on its grid, so they are keyed by it
+and never share entries with solves on the solver's own grid (the CLI and find_roots_batch).
+"""
+class SolveWorker(QRunnable):
+    # Initialize the worker with the parsed functions, the solve range and the plotting span
+    def __init__(self, generation, f1, f2, x_min, x_max, span=5.0, f1_expr=None, f2_expr=None,
+                 sampler=None, live=False, stats=None, cache=None):
+        super().__init__()
+        self.generation = generation
+        self.f1 = f1
+        self.f2 = f2
+        self.f1_expr = f1_expr
+        self.f2_expr = f2_expr
+        self.x_min = x_min
+        self.x_max = x_max
+        self.span = span
+        self.sampler = sampler
+        self.live = live
+        self.stats = stats
+        self.cache = cache
+        self.signals = SolveSignals()
+        self._cancel = threading.Event()
+        # SolverUI keeps the worker until it reports back, so Qt must not delete it after run()
+        self.setAutoDelete(False)
+
+    # Asks the running solve to stop at its next cancellation point (safe to call from any thread).
+    def cancel(self):
+        self._cancel.set()
+
+    # Whether cancel() has been called.
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    # Runs on a pool thread: solves, samples the plot data and reports the outcome through the signals.
+    def run(self):
+        with SolveStats.recording(self.stats):
+            self.solve()
+
+    # The body of run: solves and reports the outcome through the signals.
+    def solve(self):
+        try:
+            samples = None
+            key = None
+            if self.cache is not None:
+                grid = self.sampler.grid_key() if self.sampler is not None else None
+                key = FxSolver.cache_key(self.f1, self.f2, self.x_min, self.x_max, grid=grid)
+            roots = FxSolver.cached_roots(self.cache, key)
+            if roots is None:
+                if self.sampler is not None:
+                    x_vals, y1 = self.sampler.sample(self.f1, self.x_min, self.x_max)
+                    _, y2 = self.sampler.sample(self.f2, self.x_min, self.x_max)
+                    samples = (x_vals, y1, y2)
+                roots, samples = FxSolver.find_roots(self.f1, self.f2, self.x_min, self.x_max, cancel=self._cancel,
+                                                     progress=lambda fraction: self.signals.progress.emit(
+                                                         self.generation, fraction),
+                                                     samples=samples, return_samples=True)
+                FxSolver.cache_roots(self.cache, key, roots)
+            if self._cancel.is_set():
+                raise SolveCancelled("Solve was cancelled.")
+            # Without roots the functions are shown on the default range, as before
+            if roots:
+                xs, y1, y2 = PlotterWidget.sample_functions(self.f1, self.f2, span=self.span,
+                                                            default_range=(self.x_min, self.x_max), samples=samples)
+            else:
+                xs, y1, y2 = PlotterWidget.sample_functions(self.f1, self.f2, samples=samples)
+        except SolveCancelled:
+            self.signals.cancelled.emit(self.generation)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, SolveResult(self.f1, self.f2, self.f1_expr, self.f2_expr,
+                                                                       roots, xs, y1, y2, self.stats))
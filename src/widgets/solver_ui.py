@@ -1,15 +1,29 @@
-import numpy as np
+import os
+
+from PySide2.QtCore import QThreadPool
 from PySide2.QtGui import Qt
 from PySide2.QtWidgets import QWidget, QVBoxLayout, QMessageBox
 
+from src.fxsolver.incremental import IncrementalSampler
 from src.fxsolver.parser import ExpressionParser
-from src.fxsolver.solver import FxSolver
+from src.fxsolver.result_cache import ResultCache
+from src.fxsolver.stats import SolveStats
 from src.widgets.input_widget import InputPanelWidget
 from src.widgets.plotter_widget import PlotterWidget
+from src.widgets.solve_worker import SolveWorker
 
 """
 SolverUI is the main application window that integrates the PlotterWidget and InputPanelWidget.
 It handles user interactions, including solving functions and clearing inputs, and manages the layout and styling of the UI.
+Solves run on a SolveWorker in a thread pool; every solve gets a new generation number, and results of
+solves that were superseded or cancelled in the meantime are dropped.
+In live mode, edits trigger a solve after a short debounce; live solves share an IncrementalSampler, so
+changing the range or one expression only evaluates what changed, and they report in the status label
+instead of message boxes.
+With show_stats (set FXSOLVER_STATS=1 in the environment), every solve records a SolveStats and the status
+label shows its timings and counters, from parsing to plotting.
+With FXSOLVER_CACHE set to a file path, solves share a persistent ResultCache with the command line
+and batch solving, so repeating a solve (also across sessions) skips the solver.
 """
 class SolverUI(QWidget):
     # Initialize the SolverUI with optional parent
@@ -18,6 +32,15 @@ class SolverUI(QWidget):
         self.plotter = None
         self.layout = None
         self.input_panel = None
+        self.thread_pool = QThreadPool(self)
+        # Generation number of the latest solve, and the workers that have not reported back yet
+        self.generation = 0
+        self.workers = {}
+        self.sampler = IncrementalSampler()
+        # Whether solves are instrumented and their stats shown in the status label
+        self.show_stats = bool(os.environ.get("FXSOLVER_STATS"))
+        # Persistent cache of solve results, or None (opt-in through FXSOLVER_CACHE)
+        self.result_cache = ResultCache.from_environment()
         self.init_ui()
         self.setup_connections()
 
@@ -48,9 +71,19 @@ class SolverUI(QWidget):
     def setup_connections(self):
         self.input_panel.solve_btn.clicked.connect(self.on_solve)
         self.input_panel.clear_btn.clicked.connect(self.on_clear)
+        self.input_panel.live_update_requested.connect(self.on_live_solve)
 
-    # Event handler for the "Solve" button; processes input functions and plots results.
+    # Event handler for the "Solve" button; parses the input functions and starts a background solve.
     def on_solve(self):
+        self.start_solve(live=False)
+
+    # Event handler for debounced edits in live mode; like on_solve, but errors go to the status label.
+    def on_live_solve(self):
+        self.start_solve(live=True)
+
+    # Parses the input functions and starts a background solve, superseding any running solve.
+    def start_solve(self, live):
+        stats = SolveStats() if self.show_stats else None
         try:
             f1_str = self.input_panel.f1_input.text()
             f2_str = self.input_panel.f2_input.text()
@@ -62,32 +95,119 @@ class SolverUI(QWidget):
                 raise ValueError("Both function inputs must be provided.")
 
             # Convert input strings to callable functions
-            f1 = ExpressionParser.convert_expr_to_function(f1_str)
-            f2 = ExpressionParser.convert_expr_to_function(f2_str)
-            # Find roots of the equations
-            roots = FxSolver.find_roots(f1, f2, x_min, x_max)
-            # Handle case where no roots are found
-            if not roots or roots[0] is None:
+            with SolveStats.recording(stats):
+                f1 = ExpressionParser.convert_expr_to_function(f1_str)
+                f2 = ExpressionParser.convert_expr_to_function(f2_str)
+        except Exception as e:
+            if live:
+                # Half-typed expressions are expected while typing
+                self.cancel_solve()
+                self.input_panel.set_status(str(e))
+            else:
+                QMessageBox.critical(self, "Error", str(e))
+            return
+
+        # Find the roots and sample the plot on a worker thread, superseding any running solve
+        self.cancel_solve()
+        self.generation += 1
+        worker = SolveWorker(self.generation, f1, f2, x_min, x_max, float(span), f1_str, f2_str,
+                             sampler=self.sampler if live else None, live=live, stats=stats,
+                             cache=self.result_cache)
+        worker.signals.progress.connect(self.on_solve_progress)
+        worker.signals.finished.connect(self.on_solve_finished)
+        worker.signals.failed.connect(self.on_solve_failed)
+        worker.signals.cancelled.connect(self.on_solve_cancelled)
+        self.workers[self.generation] = worker
+        self.input_panel.set_progress(0.0)
+        self.thread_pool.start(worker)
+
+    # Cancels the running solve, if any; its result will not be shown.
+    def cancel_solve(self):
+        for worker in self.workers.values():
+            worker.cancel()
+        self.input_panel.set_progress(None)
+
+    # Whether a solve is still running in the background.
+    def is_solving(self):
+        return bool(self.workers)
+
+    # Updates the progress bar while the latest solve runs.
+    def on_solve_progress(self, generation, fraction):
+        worker = self.workers.get(generation)
+        if generation == self.generation and worker is not None and not worker.is_cancelled():
+            self.input_panel.set_progress(fraction)
+
+    # Shows the result of a finished solve, unless a newer solve superseded it.
+    def on_solve_finished(self, generation, result):
+        worker = self.workers.pop(generation)
+        if generation != self.generation or worker.is_cancelled():
+            return
+        self.input_panel.set_progress(None)
+        status = self.describe_roots(result.roots) if worker.live else ""
+        self.input_panel.set_status(status)
+        # Handle case where no roots are found
+        if not result.roots or result.roots[0] is None:
+            if not worker.live:
                 QMessageBox.information(self, "No solution found", "No solution found")
-                self.plotter.clear()
-                self.plotter.plot_functions(f1, f2, f1_expr=f1_str, f2_expr=f2_str)
-                return
-
-            self.plotter.clear()
-            self.plotter.plot_functions(
-                f1, f2,
-                f1_expr=f1_str,
-                f2_expr=f2_str,
-                span=float(span),
-                default_range=(x_min, x_max),
-                annotate=roots
+            with SolveStats.recording(result.stats):
+                self.plotter.plot_samples(result.xs, result.y1, result.y2,
+                                          f1_expr=result.f1_expr, f2_expr=result.f2_expr,
+                                          functions=(result.f1, result.f2))
+            self.show_stats_status(status, result.stats)
+            return
+
+        with SolveStats.recording(result.stats):
+            self.plotter.plot_samples(
+                result.xs, result.y1, result.y2,
+                f1_expr=result.f1_expr,
+                f2_expr=result.f2_expr,
+                annotate=result.roots,
+                functions=(result.f1, result.f2)
             )
+        self.show_stats_status(status, result.stats)
 
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+    # Appends the timings and counters of an instrumented solve to the status label.
+    def show_stats_status(self, status, stats):
+        if stats is not None:
+            self.input_panel.set_status(" | ".join(part for part in (status, stats.summary()) if part))
+
+    # Reports an error raised by the latest solve.
+    def on_solve_failed(self, generation, message):
+        worker = self.workers.pop(generation)
+        if generation != self.generation or worker.is_cancelled():
+            return
+        self.input_panel.set_progress(None)
+        if worker.live:
+            self.input_panel.set_status(message)
+        else:
+            QMessageBox.critical(self, "Error", message)
 
-    # Event handler for the "Clear" button; resets input fields and clears the plot.
+    # Short summary of a live solve for the status label.
+    @staticmethod
+    def describe_roots(roots):
+        if not roots:
+            return "No solution found"
+        return "1 solution" if len(roots) == 1 else f"{len(roots)} solutions"
+
+    # Forgets a worker that stopped after being cancelled.
+    def on_solve_cancelled(self, generation):
+        self.workers.pop(generation)
+
+    # Event handler for the "Clear" button; cancels a running solve, resets input fields and clears the plot.
     def on_clear(self):
+        self.cancel_solve()
         self.input_panel.f1_input.clear()
         self.input_panel.f2_input.clear()
+        # Clearing the inputs schedules a live update, which has nothing to solve
+        self.input_panel.debounce_timer.stop()
+        self.input_panel.set_status("")
         self.plotter.clear()
+
+    # Cancels a running solve and waits for the worker threads before the window closes.
+    def closeEvent(self, event):
+        self.cancel_solve()
+        self.thread_pool.waitForDone()
+        self.plotter.wait_for_resample()
+        if self.result_cache is not None:
+            self.result_cache.close()
+        super().closeEvent(event)
@@ -0,0 +1,139 @@
+import sys
+import threading
+import time
+
+"""
+StartupTimer measures how long the application takes to start, for the --startup-report option.
+It records named phases (e.g. window created, first paint, plot canvas ready) as times since the timer
+was created, and a breakdown of the modules imported while it records imports, in the style of
+`python -X importtime`: self and cumulative time per module, nested imports indented below their importer.
+Imports are timed by a finder at the front of sys.meta_path (see _TimedLoader), so every module loaded
+for the first time is included however it is imported: import statements, relative imports and
+importlib.import_module (e.g. the Matplotlib backend). Only imports on the thread that started
+recording are timed.
+"""
+class StartupTimer:
+    # Imports with a smaller cumulative time (in seconds) are left out of the report
+    MIN_IMPORT_TIME = 0.001
+
+    # Initialize the timer; clock returns the current time in seconds
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        # (name, seconds since start) per phase, and (depth, self, cumulative, name) per import
+        self.phases = []
+        self.imports = []
+        self._recording = False
+        self._stack = []
+        self._thread = None
+
+    # Records that a phase of the startup has been reached.
+    def mark(self, name):
+        self.phases.append((name, self.clock() - self.start))
+
+    # Whether a phase has been marked.
+    def has_mark(self, name):
+        return any(phase == name for phase, _ in self.phases)
+
+    # Starts timing the modules imported from now on (until stop_imports).
+    def record_imports(self):
+        if self._recording:
+            return
+        self._recording = True
+        self._thread = threading.get_ident()
+        sys.meta_path.insert(0, self)
+
+    # Stops timing imports.
+    def stop_imports(self):
+        if not self._recording:
+            return
+        self._recording = False
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    """
+    The sys.meta_path finder hook: finds the spec of a module that is imported for the first time with the
+    other finders and wraps its loader in a _TimedLoader, which times the import.
+    Returns:
+    - The wrapped spec, or None to leave the module to the other finders (other threads, or loaders
+      without exec_module)
+    """
+    def find_spec(self, name, path=None, target=None):
+        if not self._recording or threading.get_ident() != self._thread:
+            return None
+        start = self.clock()
+        spec = None
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                break
+        if spec is None or not hasattr(spec.loader, "exec_module"):
+            return None
+        spec.loader = _TimedLoader(self, spec, self.clock() - start)
+        return spec
+
+    # Records the import of name, which took elapsed seconds, and runs it; called by _TimedLoader.
+    def _time_import(self, name, elapsed, run):
+        depth = len(self._stack)
+        self._stack.append(0.0)
+        start = self.clock()
+        try:
+            run()
+        finally:
+            elapsed += self.clock() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.imports.append((depth, elapsed - nested, elapsed, name))
+
+    """
+    Formats the recorded phases and imports.
+    Returns:
+    - Multi-line string: the phases in the order they were reached, with the time since start and
+      since the previous phase, followed by the imports (in completion order, as -X importtime)
+      taking at least MIN_IMPORT_TIME
+    """
+    def report(self):
+        lines = ["Startup time (ms since start | since previous phase):"]
+        previous = 0.0
+        for name, elapsed in self.phases:
+            lines.append(f"{elapsed * 1000:10.1f} | {(elapsed - previous) * 1000:8.1f} | {name}")
+            previous = elapsed
+        imports = [entry for entry in self.imports if entry[2] >= self.MIN_IMPORT_TIME]
+        if imports:
+            lines.append("Imports (self ms | cumulative ms | module):")
+            for depth, own, cumulative, name in imports:
+                lines.append(f"{own * 1000:10.1f} | {cumulative * 1000:8.1f} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+
+"""
+_TimedLoader stands in for the loader of a module found by a recording StartupTimer. It puts the original
+loader back on the module before running it, so the loaded module does not keep a reference to the
+timer, and reports the time of finding and running the module to the timer.
+"""
+class _TimedLoader:
+    # Initialize the loader with the timer, the spec it replaces the loader of and the time spent finding it
+    def __init__(self, timer, spec, find_time):
+        self.timer = timer
+        self.spec = spec
+        self.loader = spec.loader
+        self.find_time = find_time
+
+    # Lets the original loader create the module.
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    # Restores the original loader and runs the module with it, timed by the timer.
+    def exec_module(self, module):
+        self.spec.loader = self.loader
+        if getattr(module, "__loader__", None) is self:
+            module.__loader__ = self.loader
+        self.timer._time_import(self.spec.name, self.find_time, lambda: self.loader.exec_module(module))
+
+    # Any other loader method (e.g. get_source) is answered by the original loader.
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
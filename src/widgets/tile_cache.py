@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+import numpy as np
+
+"""
+TileCache keeps samples of plotted functions in fixed-size tiles, so the curves can be re-sampled
+for every pan or zoom step at the resolution of the screen, while parts of the x axis that were
+already shown at the same zoom level are not evaluated again.
+Tiles of a zoom level cover intervals [i * w, (i + 1) * w) of width w = 2^level, each with
+TILE_SAMPLES samples at x = (i * TILE_SAMPLES + j + 1/2) * w / TILE_SAMPLES.
+Powers of two keep these x values exact, so a tile always holds the same points.
+"""
+class TileCache:
+    TILE_SAMPLES = 256
+    MAX_TILES = 1024
+
+    # Initialize an empty cache holding at most max_tiles tiles (least recently used are dropped first)
+    def __init__(self, max_tiles=MAX_TILES):
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    """
+    Samples f over [x_min, x_max] with at least the requested number of samples.
+    Parameters:
+    - f: Function to sample (callable); tiles are keyed by the function object
+    - x_min, x_max: Visible range
+    - samples: Minimum number of samples over the range (e.g. pixels times samples per pixel)
+    Returns:
+    - xs: Sorted array of sample points, from the last one before x_min to the first one after x_max
+    - ys: Array of corresponding f(x) values
+    How it works:
+    1. Pick the zoom level whose sample spacing is between half and all of (x_max - x_min) / samples.
+    2. Evaluate the tiles of that level covering the range (plus one sample on each side)
+       that are not cached yet in a single call.
+    3. Join the tiles and cut them to the range plus one sample on each side.
+    """
+    def sample(self, f, x_min, x_max, samples):
+        x_min, x_max = min(x_min, x_max), max(x_min, x_max)
+        # Ranges narrower than the float resolution at x are widened to it
+        width = max(x_max - x_min, samples * np.spacing(max(abs(x_min), abs(x_max), 1.0)))
+        level = int(np.floor(np.log2(width / samples * self.TILE_SAMPLES)))
+        tile_width = 2.0 ** level
+        spacing = tile_width / self.TILE_SAMPLES
+        first = int(np.floor((x_min - spacing) / tile_width))
+        last = int(np.floor((x_max + spacing) / tile_width))
+
+        missing = [i for i in range(first, last + 1) if (f, level, i) not in self.tiles]
+        self.hits += last - first + 1 - len(missing)
+        self.misses += len(missing)
+        if missing:
+            x_missing = np.concatenate([self.tile_points(level, i) for i in missing])
+            y_missing = np.broadcast_to(np.asarray(f(x_missing), dtype=float), x_missing.shape)
+            for i, ys in zip(missing, np.split(y_missing, len(missing))):
+                self.tiles[(f, level, i)] = ys.copy()
+
+        ys = []
+        for i in range(first, last + 1):
+            self.tiles.move_to_end((f, level, i))
+            ys.append(self.tiles[(f, level, i)])
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+        xs = (np.arange(first * self.TILE_SAMPLES, (last + 1) * self.TILE_SAMPLES) + 0.5) * spacing
+        ys = np.concatenate(ys)
+        # Keep one sample beyond each end so the curve reaches the edges of the view
+        start = max(np.searchsorted(xs, x_min) - 1, 0)
+        stop = min(np.searchsorted(xs, x_max, side="right") + 1, xs.size)
+        return xs[start:stop], ys[start:stop]
+
+    # Returns the sample points of tile i of a zoom level.
+    def tile_points(self, level, i):
+        spacing = 2.0 ** level / self.TILE_SAMPLES
+        return (np.arange(i * self.TILE_SAMPLES, (i + 1) * self.TILE_SAMPLES) + 0.5) * spacing
+
+    # Drops all tiles.
+    def clear(self):
+        self.tiles.clear()
@@ -1,8 +1,21 @@
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
 from PySide2 import QtWidgets
 from PySide2.QtGui import Qt
 
+from src.fxsolver.parser import ExpressionParser
+from src.fxsolver.result_cache import ResultCache
+from src.fxsolver.solver import FxSolver
+from src.widgets.plotter_widget import PlotterWidget
 from src.widgets.solver_ui import SolverUI
 
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 def test_app_launch(qtbot):
     app = SolverUI()
@@ -19,6 +32,10 @@ def test_initial_state(qtbot):
     assert app.input_panel.x_min.value() == -10
     assert app.input_panel.x_max.value() == 10
     assert app.input_panel.span.value() == 5.0
+    # The Matplotlib canvas is created after the window has been painted
+    assert app.plotter.canvas is None
+    app.show()
+    qtbot.waitUntil(app.plotter.is_canvas_ready)
     assert app.plotter.figure is not None
     assert app.plotter.ax is not None
     assert app.plotter.canvas is not None
@@ -48,6 +65,7 @@ def test_on_solve_valid_input(qtbot):
     app.input_panel.x_max.setValue(10)
     app.input_panel.span.setValue(5.0)
     app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
     assert len(app.plotter.ax.lines) > 0  # Check if functions are plotted
     assert any('f_1' in line.get_label() for line in app.plotter.ax.lines)
 
@@ -69,6 +87,7 @@ def test_on_solve_no_solution(qtbot, monkeypatch):
     app.input_panel.f1_input.setText('x^2')
     app.input_panel.f2_input.setText('x^2 + 1')  # No intersection
     qtbot.mouseClick(app.input_panel.solve_btn, Qt.LeftButton)
+    qtbot.waitUntil(lambda: "text" in called)
 
     assert "No solution" in called["text"]
 
@@ -109,3 +128,232 @@ def test_on_solve_empty_input(qtbot, monkeypatch):
     assert "Error" in called["title"]
     assert "Both function inputs must be provided." in called["text"]
 
+
+
+def test_on_solve_keeps_ui_responsive(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.f1_input.setText('x^3')
+    app.input_panel.f2_input.setText('x')
+    app.on_solve()
+    assert app.is_solving()
+    assert app.input_panel.progress_bar.isVisibleTo(app.input_panel)
+    qtbot.waitUntil(lambda: not app.is_solving())
+    assert not app.input_panel.progress_bar.isVisibleTo(app.input_panel)
+    assert len(app.plotter.roots.get_offsets()) == 3  # One marker per root
+
+
+def test_newer_solve_supersedes_running_one(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.f1_input.setText('x^3')
+    app.input_panel.f2_input.setText('x')
+    app.on_solve()
+    app.input_panel.f2_input.setText('8')
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    assert any('f_2(x) = 8' in line.get_label() for line in app.plotter.ax.lines)
+    assert len(app.plotter.roots.get_offsets()) == 1
+
+
+def test_clear_cancels_running_solve(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.f1_input.setText('x^3')
+    app.input_panel.f2_input.setText('x')
+    app.on_solve()
+    app.on_clear()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    assert app.plotter.functions is None  # Nothing plotted
+
+
+def test_live_mode_solves_after_debounce(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.live_checkbox.setChecked(True)
+    app.input_panel.f1_input.setText('x^3')
+    app.input_panel.f2_input.setText('x + 1')
+    assert not app.is_solving()  # Debounced, nothing started yet
+    qtbot.waitUntil(lambda: app.input_panel.status_label.text() == "1 solution")
+    assert any('f_2(x) = x + 1' in line.get_label() for line in app.plotter.ax.lines)
+
+
+def test_live_mode_reports_errors_in_status(qtbot, monkeypatch):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    monkeypatch.setattr(QtWidgets.QMessageBox, "critical", lambda *args, **kwargs: pytest.fail("No dialog in live mode"))
+    app.input_panel.live_checkbox.setChecked(True)
+    app.input_panel.f1_input.setText('x^')
+    app.input_panel.f2_input.setText('1')
+    qtbot.waitUntil(lambda: "Invalid expression" in app.input_panel.status_label.text())
+
+
+def test_live_mode_off_does_not_solve(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.f1_input.setText('x^3')
+    app.input_panel.f2_input.setText('x + 1')
+    qtbot.wait(3 * app.input_panel.DEBOUNCE_MS)
+    assert not app.is_solving()
+    assert app.plotter.functions is None  # Nothing plotted
+
+
+def test_zoom_resamples_visible_range(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.show()
+    app.input_panel.f1_input.setText('sqrt(x) * x^2')
+    app.input_panel.f2_input.setText('1')
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    line = app.plotter.ax.lines[0]
+    app.plotter.ax.set_xlim(1, 1.01)
+    # The curves are re-sampled in the background
+    assert app.plotter.is_resampling()
+    qtbot.waitUntil(lambda: not app.plotter.is_resampling())
+    xs = line.get_xdata()
+    assert xs[0] <= 1 and xs[-1] >= 1.01
+    assert np.diff(xs).max() <= 0.01 / app.plotter.ax.get_window_extent().width
+
+
+def test_resampling_runs_off_the_gui_thread(qtbot):
+    plotter = PlotterWidget()
+    qtbot.addWidget(plotter)
+    threads = set()
+
+    def f1(x):
+        threads.add(threading.current_thread())
+        return np.asarray(x) ** 2
+
+    plotter.plot_functions(f1, lambda x: np.ones_like(x), annotate=[(1.0, 1.0)])
+    threads.clear()
+    plotter.ax.set_xlim(100, 200)
+    plotter.ax.set_xlim(300, 400)  # Debounced: only the last range is sampled
+    assert not threads
+    qtbot.waitUntil(lambda: not plotter.is_resampling())
+    assert threads and threading.main_thread() not in threads
+    xs = plotter.lines[0].get_xdata()
+    assert xs[0] <= 300 and xs[-1] >= 400
+    # Results for a view that was replaced by a new plot are dropped
+    plotter.ax.set_xlim(500, 600)
+    plotter.plot_functions(f1, lambda x: np.ones_like(x))
+    qtbot.wait(2 * PlotterWidget.RESAMPLE_DELAY_MS)
+    qtbot.waitUntil(lambda: not plotter.is_resampling())
+    assert plotter.lines[0].get_xdata()[-1] <= 10
+
+
+def test_replot_reuses_artists(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    f1 = ExpressionParser.convert_expr_to_function('x^2')
+    f2 = ExpressionParser.convert_expr_to_function('x + 2')
+    app.plotter.plot_functions(f1, f2, 'x^2', 'x + 2', annotate=[(-1.0, 1.0), (2.0, 4.0)])
+    lines, legend = list(app.plotter.ax.lines), app.plotter.ax.get_legend()
+    app.plotter.plot_functions(f1, f2, 'x^2', 'x + 2', annotate=[(2.0, 4.0)])
+    assert app.plotter.ax.lines == lines
+    assert app.plotter.ax.get_legend() is legend  # Same expressions, legend not rebuilt
+    assert len(app.plotter.roots.get_offsets()) == 1
+    assert len(app.plotter.annotations) == 1
+
+
+def test_plot_reuses_solve_samples():
+    f1 = ExpressionParser.convert_expr_to_function('sqrt(x^2 + 1)')
+    f2 = ExpressionParser.convert_expr_to_function('2')
+    xs = np.linspace(-10, 10, 5000)
+    samples = (xs, f1(xs), f2(xs))
+    plotted = PlotterWidget.sample_functions(f1, f2, default_range=(-10, 10), samples=samples)
+    assert all(np.shares_memory(a, b) for a, b in zip(plotted, samples))
+    # Samples that do not cover the plotted range are not used
+    plotted = PlotterWidget.sample_functions(f1, f2, default_range=(-20, 20), samples=samples)
+    assert len(plotted[0]) == PlotterWidget.PLOT_SAMPLES and plotted[0][0] == -20
+
+
+def test_solve_and_plot_evaluate_functions_once(qtbot, monkeypatch):
+    # Counts the points every parsed function is evaluated at, over a whole solve and plot
+    evaluations = []
+    convert = ExpressionParser.convert_expr_to_function
+
+    def counted(expression, *args):
+        f = convert(expression, *args)
+        index = len(evaluations)
+        evaluations.append(0)
+
+        def g(x):
+            evaluations[index] += np.size(x)
+            return f(x)
+        return g
+
+    monkeypatch.setattr(ExpressionParser, "convert_expr_to_function", counted)
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.show()
+    qtbot.waitExposed(app)
+    app.input_panel.f1_input.setText('sqrt(x^2 + 1)')
+    app.input_panel.f2_input.setText('2')
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    qtbot.wait(200)  # Resizes and redraws after the plot
+    assert any('f_1' in line.get_label() for line in app.plotter.ax.lines)
+    # The solve grid (plus refinement) only: the plot reuses its samples instead of sampling again
+    assert len(evaluations) == 2
+    assert all(count < FxSolver.DEFAULT_STEPS + PlotterWidget.PLOT_SAMPLES for count in evaluations)
+    assert app.plotter.tile_cache.misses == 0
+
+
+def test_widgets_do_not_import_matplotlib():
+    code = "import sys, src.widgets.solver_ui; print('matplotlib' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_first_plot_creates_canvas(qtbot):
+    plotter = PlotterWidget()
+    qtbot.addWidget(plotter)
+    plotter.clear()  # Nothing to clear yet
+    with qtbot.waitSignal(plotter.canvas_ready):
+        plotter.plot_functions(ExpressionParser.convert_expr_to_function('x'),
+                               ExpressionParser.convert_expr_to_function('1'), annotate=[(1.0, 1.0)])
+    assert len(plotter.roots.get_offsets()) == 1
+
+
+def test_stats_in_status_label(qtbot):
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.show_stats = True
+    app.input_panel.f1_input.setText('sqrt(x^2 + 1)')
+    app.input_panel.f2_input.setText('2')
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    status = app.input_panel.status_label.text()
+    for part in ("parse", "sampling", "refine", "plot", "evals"):
+        assert part in status
+
+def test_solves_share_result_cache(qtbot, tmp_path, monkeypatch):
+    monkeypatch.setenv(ResultCache.ENVIRONMENT_VARIABLE, str(tmp_path / "results.sqlite3"))
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.f1_input.setText('sqrt(x^2 + 1)')
+    app.input_panel.f2_input.setText('2')
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    assert (app.result_cache.misses, app.result_cache.hits) == (1, 1)
+    assert any('f_1' in line.get_label() for line in app.plotter.ax.lines)
+
+
+def test_live_solves_do_not_share_result_cache_with_uniform_solves(qtbot, tmp_path, monkeypatch):
+    monkeypatch.setenv(ResultCache.ENVIRONMENT_VARIABLE, str(tmp_path / "results.sqlite3"))
+    app = SolverUI()
+    qtbot.addWidget(app)
+    app.input_panel.f1_input.setText('sqrt(x^2 + 1)')
+    app.input_panel.f2_input.setText('2')
+    app.on_live_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    app.on_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    # Found on different grids, so neither solve is answered from the other one's entry
+    assert (app.result_cache.misses, app.result_cache.hits, len(app.result_cache)) == (2, 0, 2)
+    app.on_live_solve()
+    qtbot.waitUntil(lambda: not app.is_solving())
+    assert app.result_cache.hits == 1
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from src.widgets.decimator import Decimator
+
+
+def count_runs(ys):
+    finite = np.isfinite(ys)
+    return int(finite[0]) + int(np.sum(finite[1:] & ~finite[:-1]))
+
+
+class DecimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.xs = np.linspace(-10, 10, 200001)
+        with np.errstate(invalid="ignore"):
+            self.ys = np.sqrt(self.xs ** 2 - 1) * np.sin(40 * self.xs)
+        self.ys[150000] = 1e6  # spike
+
+    def test_bounded_by_columns(self):
+        for method in Decimator.METHODS:
+            xs, ys = Decimator.decimate(self.xs, self.ys, 500, method)
+            self.assertLessEqual(xs.size, 4 * 500 + 2)
+            self.assertTrue(np.all(np.diff(xs) >= 0))
+
+    def test_keeps_spikes_and_extremes(self):
+        xs, ys = Decimator.decimate(self.xs, self.ys, 500, "minmax")
+        self.assertIn(1e6, ys)
+        self.assertEqual(np.nanmin(ys), np.nanmin(self.ys))
+        _, ys = Decimator.decimate(self.xs, self.ys, 500, "lttb")
+        self.assertIn(1e6, ys)
+
+    def test_keeps_nan_gaps(self):
+        for method in Decimator.METHODS:
+            _, ys = Decimator.decimate(self.xs, self.ys, 500, method)
+            self.assertEqual(count_runs(ys), count_runs(self.ys))
+
+    def test_keeps_roots(self):
+        for method in Decimator.METHODS:
+            xs, ys = Decimator.decimate(self.xs, self.ys, 500, method, keep=[(2.5, 0.0), (20.0, 0.0)])
+            self.assertIn(2.5, xs)
+            self.assertNotIn(20.0, xs)
+            self.assertEqual(ys[np.searchsorted(xs, 2.5)], 0.0)
+
+    def test_small_arrays_unchanged(self):
+        xs = np.linspace(0, 1, 100)
+        result_x, result_y = Decimator.decimate(xs, xs ** 2, 500)
+        np.testing.assert_array_equal(result_x, xs)
+        np.testing.assert_array_equal(result_y, xs ** 2)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            Decimator.decimate(self.xs, self.ys, 500, "every_other")
@@ -0,0 +1,69 @@
+import sys
+import unittest
+
+from src.widgets.startup import StartupTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StartupTimerTest(unittest.TestCase):
+    def test_phases_in_order(self):
+        clock = FakeClock()
+        timer = StartupTimer(clock)
+        clock.now = 0.05
+        timer.mark("window created")
+        clock.now = 0.08
+        timer.mark("first paint")
+        self.assertEqual(timer.phases, [("window created", 0.05), ("first paint", 0.08)])
+        self.assertTrue(timer.has_mark("first paint"))
+        self.assertFalse(timer.has_mark("plot canvas ready"))
+        report = timer.report().splitlines()
+        self.assertIn("first paint", report[2])
+        self.assertIn("30.0", report[2])  # Time since the previous phase
+
+    def test_records_first_imports_only(self):
+        sys.modules.pop("colorsys", None)
+        timer = StartupTimer()
+        timer.record_imports()
+        try:
+            import colorsys  # noqa: F401
+            import json  # noqa: F401  (already imported)
+        finally:
+            timer.stop_imports()
+        names = [name for _, _, _, name in timer.imports]
+        self.assertIn("colorsys", names)
+        self.assertNotIn("json", names)
+        for depth, own, cumulative, _ in timer.imports:
+            self.assertLessEqual(own, cumulative)
+
+    def test_records_import_module(self):
+        import importlib
+        sys.modules.pop("graphlib", None)
+        timer = StartupTimer()
+        timer.record_imports()
+        try:
+            module = importlib.import_module("graphlib")
+        finally:
+            timer.stop_imports()
+        self.assertIn("graphlib", [name for _, _, _, name in timer.imports])
+        # The module keeps its own loader, not the timer's
+        self.assertIs(module.__loader__, module.__spec__.loader)
+        self.assertEqual(type(module.__loader__).__name__, "SourceFileLoader")
+
+    def test_stop_restores_meta_path(self):
+        original = list(sys.meta_path)
+        timer = StartupTimer()
+        timer.record_imports()
+        self.assertIs(sys.meta_path[0], timer)
+        timer.stop_imports()
+        self.assertEqual(sys.meta_path, original)
+
+
+if __name__ == "__main__":
+    unittest.main()
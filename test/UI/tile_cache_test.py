@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from src.fxsolver.parser import ExpressionParser
+from src.widgets.tile_cache import TileCache
+
+
+class TileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = TileCache()
+        self.f = ExpressionParser.convert_expr_to_function("sqrt(x) * x^2")
+
+    def test_samples_cover_range_at_requested_resolution(self):
+        for x_min, x_max in [(-10, 10), (0.5, 0.6), (1e5, 1e5 + 1e-3)]:
+            xs, ys = self.cache.sample(self.f, x_min, x_max, 1600)
+            self.assertLessEqual(xs[0], x_min)
+            self.assertGreaterEqual(xs[-1], x_max)
+            spacing = (x_max - x_min) / 1600
+            self.assertTrue(np.all(np.diff(xs) <= spacing))
+            self.assertTrue(np.all(np.diff(xs) > spacing / 2))
+            np.testing.assert_array_equal(ys, self.f(xs))
+
+    def test_panning_back_is_free(self):
+        self.cache.sample(self.f, -10, 10, 1600)
+        misses = self.cache.misses
+        self.cache.sample(self.f, 20, 40, 1600)
+        self.assertGreater(self.cache.misses, misses)
+        misses = self.cache.misses
+        xs, ys = self.cache.sample(self.f, -9, 9, 1600)
+        self.assertEqual(self.cache.misses, misses)
+        np.testing.assert_array_equal(ys, self.f(xs))
+
+    def test_zoom_levels_are_cached_separately(self):
+        self.cache.sample(self.f, 0, 16, 1000)
+        misses = self.cache.misses
+        xs, _ = self.cache.sample(self.f, 0, 1, 1000)
+        self.assertGreater(self.cache.misses, misses)
+        self.assertLess(np.diff(xs).max(), 1 / 1000)
+
+    def test_bounded_size(self):
+        cache = TileCache(max_tiles=8)
+        for start in range(0, 100, 10):
+            cache.sample(self.f, start, start + 10, 1000)
+        self.assertLessEqual(len(cache.tiles), 8)
@@ -0,0 +1,63 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from benchmarks import runner
+
+
+def results(**times):
+    return {"benchmarks": {name: {"min": best, "counters": {}} for name, best in times.items()}}
+
+
+class MeasureTest(unittest.TestCase):
+    def test_calibrates_loops(self):
+        now = [0.0]
+        calls = []
+
+        def run():
+            calls.append(1)
+            now[0] += 0.001
+
+        timing = runner.measure(run, repeat=3, min_time=0.01, clock=lambda: now[0])
+        self.assertEqual(timing["loops"], 16)
+        self.assertAlmostEqual(timing["median"], 0.001)
+        self.assertEqual(len(calls), 1 + 2 + 4 + 8 + 16 + 2 * 16)
+
+
+class CompareTest(unittest.TestCase):
+    def test_slowdown_above_threshold(self):
+        baseline = results(a=1.0, b=1.0, c=1.0)
+        current = results(a=1.1, b=1.5, c=0.5, d=9.0)
+        regressions = runner.compare(current, baseline, threshold=0.2)
+        self.assertEqual([name for name, _ in regressions], ["b"])
+
+    def test_counters_must_not_grow(self):
+        baseline = results(a=1.0)
+        current = results(a=1.0)
+        baseline["benchmarks"]["a"]["counters"] = {"iterations": 10}
+        current["benchmarks"]["a"]["counters"] = {"iterations": 11}
+        self.assertEqual(len(runner.compare(current, baseline)), 1)
+        current["benchmarks"]["a"]["counters"] = {"iterations": 9}
+        self.assertEqual(runner.compare(current, baseline), [])
+
+    def test_skipped_benchmarks_are_ignored(self):
+        baseline = results(a=1.0)
+        current = {"benchmarks": {"a": {"skipped": "no Qt"}}}
+        self.assertEqual(runner.compare(current, baseline), [])
+
+
+class MainTest(unittest.TestCase):
+    def test_json_output_and_baseline(self):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            status = runner.main(["--filter", r"parser\.compile\[cached\]", "--repeat", "1", "--min-time", "0"])
+        self.assertEqual(status, 0)
+        output = json.loads(stdout.getvalue())
+        self.assertEqual(output["version"], runner.FORMAT_VERSION)
+        self.assertEqual(list(output["benchmarks"]), ["parser.compile[cached]"])
+        self.assertIn("min", output["benchmarks"]["parser.compile[cached]"])
+
+
+if __name__ == "__main__":
+    unittest.main()
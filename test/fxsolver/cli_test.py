@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.fxsolver import cli
+from src.fxsolver.result_cache import ResultCache
+from src.fxsolver.solver import FxSolver
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class CliTest(unittest.TestCase):
+    def run_cli(self, argv, text=""):
+        stdout = io.StringIO()
+        status = cli.main(argv, stdin=io.StringIO(text), stdout=stdout)
+        return status, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_expressions_from_arguments(self):
+        status, records = self.run_cli(["x^2", "1"])
+        self.assertEqual(status, 0)
+        self.assertEqual(len(records), 1)
+        self.assertEqual([root["x"] for root in records[0]["roots"]], [-1.0, 1.0])
+        self.assertEqual(records[0]["f1"], "x^2")
+
+    def test_range_and_steps(self):
+        _, records = self.run_cli(["x^2", "1", "--range", "0", "5", "--steps", "100"])
+        self.assertEqual([root["x"] for root in records[0]["roots"]], [1.0])
+
+    def test_csv_and_jsonl_from_stdin(self):
+        text = ("f1,f2\n"
+                "x^2,4\n"
+                "\n"
+                "sqrt(x),1,0,5\n"
+                '{"f1": "x", "f2": "3", "x_min": 0, "x_max": 1}\n'
+                '{"f1": "x^3", "f2": "x"}\n')
+        status, records = self.run_cli([], text)
+        self.assertEqual(status, 0)
+        self.assertEqual([record["index"] for record in records], [0, 1, 2, 3])
+        self.assertEqual([len(record["roots"]) for record in records], [2, 1, 0, 3])
+
+    def test_errors_are_reported_per_job(self):
+        text = 'bad(,1\nnot json {\n{"f1": 1, "f2": "x"}\nx,2\n'
+        status, records = self.run_cli(["--format", "auto"], text)
+        self.assertEqual(status, 1)
+        self.assertEqual(["error" in record for record in records], [True, True, True, False])
+
+    def test_output_in_input_order_across_chunks(self):
+        text = "".join(f"x,{i % 7}\n" for i in range(50))
+        _, serial = self.run_cli(["--chunk-size", "8"], text)
+        _, parallel = self.run_cli(["--chunk-size", "16", "--workers", "2", "--executor", "thread"], text)
+        self.assertEqual([record["index"] for record in serial], list(range(50)))
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial[9]["roots"][0]["x"], 2.0)
+
+    def test_reads_input_lazily(self):
+        def lines():
+            yield "x,1\n"
+            yield "x,2\n"
+            raise AssertionError("input ended early")
+
+        stdout = io.StringIO()
+        with self.assertRaises(AssertionError):
+            cli.solve_jobs(cli.read_jobs(lines(), "csv", (-10, 10, 100)),
+                           cli.build_parser().parse_args(["--chunk-size", "1"]), stdout)
+        # Results were written as soon as each chunk was solved, before the input ended
+        self.assertEqual(len(stdout.getvalue().splitlines()), 2)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.sqlite3")
+            _, first = self.run_cli(["x^2", "1", "--cache", path])
+            with mock.patch.dict(os.environ, {ResultCache.ENVIRONMENT_VARIABLE: path}):
+                with mock.patch.object(FxSolver, "_solve_group") as solve:
+                    _, second = self.run_cli(["x^2", "1"])
+            solve.assert_not_called()
+            self.assertEqual(second, first)
+
+    def test_stream(self):
+        status, records = self.run_cli(["x^3", "x", "--stream"])
+        self.assertEqual(status, 0)
+        self.assertEqual(records, [{"x": -1.0, "y": -1.0, "multiplicity": 1}, {"x": 0.0, "y": 0.0, "multiplicity": 1},
+                                   {"x": 1.0, "y": 1.0, "multiplicity": 1}])
+        status, records = self.run_cli(["x^", "1", "--stream"])
+        self.assertEqual(status, 1)
+        self.assertIn("error", records[0])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(SystemExit):
+            cli.main(["x"], stdin=io.StringIO(), stdout=io.StringIO())
+
+    def test_runs_headless(self):
+        # The command line must not pull in Qt, matplotlib or the widgets
+        code = ("import runpy, sys; sys.argv = ['fxsolver', 'x', '1']\n"
+                "try:\n    runpy.run_module('src.fxsolver', run_name='__main__')\n"
+                "except SystemExit:\n    pass\n"
+                "print(sorted(m for m in sys.modules if m.split('.')[0] in "
+                "('PySide2', 'matplotlib', 'widgets') or m.startswith('src.widgets')))")
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout.splitlines()
+        self.assertEqual(json.loads(output[0])["roots"][0]["x"], 1.0)
+        self.assertEqual(output[-1], "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
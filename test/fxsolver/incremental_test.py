@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+from src.fxsolver.incremental import IncrementalSampler
+from src.fxsolver.parser import ExpressionParser
+from src.fxsolver.solver import FxSolver
+
+
+class IncrementalSamplerTest(unittest.TestCase):
+    def setUp(self):
+        self.sampler = IncrementalSampler()
+        self.f = ExpressionParser.convert_expr_to_function("x^3 - 2*x")
+
+    def test_covers_range(self):
+        x_vals, values = self.sampler.sample(self.f, -10, 10)
+        self.assertLessEqual(x_vals[0], -10)
+        self.assertGreaterEqual(x_vals[-1], 10)
+        self.assertTrue(self.sampler.steps <= x_vals.size <= 2 * self.sampler.steps + 1)
+        np.testing.assert_array_equal(values, self.f(x_vals))
+        self.assertNotIn(0.0, x_vals)
+
+    def test_reuses_overlapping_range(self):
+        self.sampler.sample(self.f, -10, 10)
+        evaluations = self.sampler.evaluations
+        x_vals, values = self.sampler.sample(self.f, -9, 11)
+        self.assertLess(self.sampler.evaluations - evaluations, x_vals.size / 10)
+        np.testing.assert_array_equal(values, self.f(x_vals))
+        evaluations = self.sampler.evaluations
+        self.sampler.sample(self.f, -10, 10)
+        self.assertEqual(self.sampler.evaluations, evaluations)
+
+    def test_resamples_on_new_scale_or_function(self):
+        self.sampler.sample(self.f, -10, 10)
+        evaluations = self.sampler.evaluations
+        x_vals, values = self.sampler.sample(self.f, -1000, 1000)
+        self.assertEqual(self.sampler.evaluations - evaluations, x_vals.size)
+        np.testing.assert_array_equal(values, self.f(x_vals))
+        g = ExpressionParser.convert_expr_to_function("x + 1")
+        x_vals, values = self.sampler.sample(g, -1000, 1000)
+        np.testing.assert_array_equal(values, g(x_vals))
+
+    def test_keeps_a_bounded_number_of_functions(self):
+        sampler = IncrementalSampler(max_functions=2)
+        for expression in ("x", "x + 1", "x + 2"):
+            sampler.sample(ExpressionParser.convert_expr_to_function(expression), 0, 1)
+        evaluations = sampler.evaluations
+        sampler.sample(ExpressionParser.convert_expr_to_function("x"), 0, 1)
+        self.assertGreater(sampler.evaluations, evaluations)
+
+    def test_find_roots_on_samples(self):
+        f2 = ExpressionParser.convert_expr_to_function("0")
+        for x_min, x_max in [(-10, 10), (-10, 12), (-1, 1.2)]:
+            x_vals, y1 = self.sampler.sample(self.f, x_min, x_max)
+            _, y2 = self.sampler.sample(f2, x_min, x_max)
+            roots = FxSolver.find_roots(self.f, f2, x_min, x_max, samples=(x_vals, y1 - y2), polynomial=False)
+            expected = FxSolver.find_roots(self.f, f2, x_min, x_max)
+            self.assertEqual(len(roots), len(expected))
+            for (x, _), (x_ref, _) in zip(roots, expected):
+                self.assertAlmostEqual(x, x_ref)
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from src.fxsolver.interval import Interval
+from src.fxsolver.parser import ExpressionParser
+
+
+class IntervalTest(unittest.TestCase):
+    EXPRESSIONS = ["x^2 - 2*x + 1", "-x^3 + 5", "x^-2 + x^0.5", "1/(x - 1)", "x/(x^2 + 1)", "2^x - x^3", "x^x",
+                   "sqrt(x)*log10(x + 3)", "sqrt(x^2 - 4)/(x + 1)", "log10(x^2) - x^3/7", "(x - 1)^2*(x + 3)"]
+
+    def bounds(self, expression, lower, upper):
+        return ExpressionParser.convert_expr_to_function(expression).interval(np.asarray(lower, dtype=float),
+                                                                             np.asarray(upper, dtype=float))
+
+    def test_bounds_contain_all_values(self):
+        rng = np.random.default_rng(0)
+        lowers = rng.uniform(-10, 10, 300)
+        uppers = lowers + rng.exponential(1.0, 300)
+        for expression in self.EXPRESSIONS:
+            f = ExpressionParser.convert_expr_to_function(expression)
+            lower, upper = f.interval(lowers, uppers)
+            for i in range(lowers.size):
+                values = f(np.linspace(lowers[i], uppers[i], 64))
+                values = values[~np.isnan(values)]
+                if values.size:
+                    self.assertTrue(lower[i] <= values.min() and values.max() <= upper[i],
+                                    f"{expression} on [{lowers[i]}, {uppers[i]}]")
+
+    def test_tight_for_monotonic_expressions(self):
+        lower, upper = self.bounds("2*x + 1", [0.0, -3.0], [1.0, -2.0])
+        np.testing.assert_allclose(lower, [1.0, -5.0])
+        np.testing.assert_allclose(upper, [3.0, -3.0])
+        lower, upper = self.bounds("x^2", [-1.0], [2.0])
+        self.assertLessEqual(lower[0], 0.0)
+        self.assertAlmostEqual(lower[0], 0.0)
+        self.assertAlmostEqual(upper[0], 4.0)
+
+    def test_domain_clipping_and_empty_boxes(self):
+        lower, upper = self.bounds("sqrt(x)", [-2.0, -1.0], [-1.0, 4.0])
+        self.assertTrue(np.isnan(lower[0]) and np.isnan(upper[0]))
+        self.assertAlmostEqual(lower[1], 0.0)
+        self.assertAlmostEqual(upper[1], 2.0)
+        lower, upper = self.bounds("log10(x)", [-1.0, -1.0], [0.0, 100.0])
+        self.assertTrue(np.isnan(lower[0]))
+        self.assertEqual(lower[1], -np.inf)
+        self.assertAlmostEqual(upper[1], 2.0)
+        # The constant part never evaluates, so the expression is undefined everywhere
+        self.assertTrue(np.isnan(self.bounds("x + 1/0", [0.0], [1.0])[0][0]))
+
+    def test_division_by_interval_containing_zero(self):
+        lower, upper = self.bounds("1/x", [-1.0, 1.0], [1.0, 2.0])
+        self.assertEqual((lower[0], upper[0]), (-np.inf, np.inf))
+        self.assertAlmostEqual(lower[1], 0.5)
+        self.assertAlmostEqual(upper[1], 1.0)
+
+    def test_rounds_outwards(self):
+        lower, upper = Interval.add((np.array([0.1]), np.array([0.1])), (np.array([0.2]), np.array([0.2])))
+        self.assertLess(lower[0], 0.1 + 0.2)
+        self.assertGreater(upper[0], 0.1 + 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,9 @@
+import pickle
 import unittest
 
+import numpy as np
+
+from src.fxsolver.expression_cache import ExpressionCache
 from src.fxsolver.parser import ExpressionParser
 
 class ExpressionParserEvaluateTest(unittest.TestCase):
@@ -64,6 +68,134 @@ class ExpressionParserEvaluateTest(unittest.TestCase):
         self.assertTrue(f(-10) != f(-10))
 
 
+class ExpressionParserVectorizedTest(unittest.TestCase):
+    def test_array_input_returns_array(self):
+        f = ExpressionParser.convert_expr_to_function("x^2 - 4*x + 4")
+        xs = np.linspace(-5, 5, 101)
+        ys = f(xs)
+        self.assertIsInstance(ys, np.ndarray)
+        self.assertEqual(ys.shape, xs.shape)
+        np.testing.assert_allclose(ys, xs ** 2 - 4 * xs + 4)
+
+    def test_constant_broadcasts_to_input_shape(self):
+        f = ExpressionParser.convert_expr_to_function("5")
+        np.testing.assert_array_equal(f(np.zeros(4)), [5, 5, 5, 5])
+
+    def test_domain_errors_are_nan_per_element(self):
+        f = ExpressionParser.convert_expr_to_function("1/x + sqrt(x) + log10(x)")
+        ys = f(np.array([-1.0, 0.0, 1.0]))
+        self.assertTrue(np.isnan(ys[0]))
+        self.assertTrue(np.isnan(ys[1]))
+        self.assertEqual(ys[2], 2)
+
+    def test_input_array_is_not_modified(self):
+        f = ExpressionParser.convert_expr_to_function("x")
+        xs = np.array([1.0, 2.0])
+        ys = f(xs)
+        ys[0] = 10
+        self.assertEqual(xs[0], 1)
+
+    def test_unsupported_syntax(self):
+        for expression in ("x[0]", "x % 2", "sqrt", "sqrt(x, 2)", "(x, x)", "x < 2"):
+            with self.assertRaises(ValueError):
+                ExpressionParser.convert_expr_to_function(expression)
+
+    def test_pickle_round_trip(self):
+        f = ExpressionParser.convert_expr_to_function("x^3 - sqrt(x)")
+        g = pickle.loads(pickle.dumps(f))
+        self.assertEqual(g(4), f(4))
+
+
+class ExpressionParserPolynomialTest(unittest.TestCase):
+    def coefficients(self, expression):
+        return ExpressionParser.convert_expr_to_function(expression).polynomial()
+
+    def test_polynomials(self):
+        np.testing.assert_array_equal(self.coefficients("x^2 - 4"), [-4, 0, 1])
+        np.testing.assert_array_equal(self.coefficients("(x - 1)^3 / 2"), [-0.5, 1.5, -1.5, 0.5])
+        np.testing.assert_array_equal(self.coefficients("sqrt(4)*x - log10(100)"), [-2, 2])
+        np.testing.assert_array_equal(self.coefficients("5"), [5])
+
+    def test_not_polynomials(self):
+        for expression in ("1/x", "x^0.5", "sqrt(x)", "2^x", "x^-1", "x^100", "x/(1 - 1)"):
+            self.assertIsNone(self.coefficients(expression), expression)
+
+
+class ExpressionParserParameterTest(unittest.TestCase):
+    def test_named_parameters(self):
+        f = ExpressionParser.convert_expr_to_function("a*x^2 + b", ("a", "b"))
+        self.assertEqual(f.parameters, ("a", "b"))
+        self.assertEqual(f(2, a=3, b=1), 13)
+        np.testing.assert_array_equal(f(np.array([[1.0, 2.0]]), a=np.array([[1.0], [2.0]]), b=0),
+                                      [[1, 4], [2, 8]])
+        self.assertEqual(ExpressionParser.convert_expr_to_function("a*x", "a")(3, a=2), 6)
+
+    def test_missing_and_unknown_values(self):
+        f = ExpressionParser.convert_expr_to_function("a*x + b", ("a", "b"))
+        with self.assertRaises(ValueError):
+            f(1, a=1)
+        with self.assertRaises(ValueError):
+            f(1, a=1, b=2, c=3)
+
+    def test_invalid_parameter_names(self):
+        for parameters in (("x",), ("sqrt",), ("lambda",), ("a_b",), ("a", "a")):
+            with self.assertRaises(ValueError):
+                ExpressionParser.convert_expr_to_function("x", parameters)
+        with self.assertRaises(ValueError):
+            ExpressionParser.convert_expr_to_function("a*x + c", ("a",))
+
+    def test_parameters_are_part_of_the_cache_key(self):
+        f = ExpressionParser.convert_expr_to_function("a*x", ("a",))
+        self.assertIs(ExpressionParser.convert_expr_to_function("a * x", ("a",)), f)
+        with self.assertRaises(ValueError):
+            ExpressionParser.convert_expr_to_function("a*x")
+
+    def test_derivative_and_pickle(self):
+        f = ExpressionParser.convert_expr_to_function("x^a + b", ("a", "b"))
+        self.assertEqual(f.derivative().parameters, ("a", "b"))
+        self.assertEqual(f.derivative()(2, a=3, b=5), 12)
+        self.assertEqual(f.with_derivative(2, a=3, b=5), (13, 12))
+        self.assertEqual(pickle.loads(pickle.dumps(f))(2, a=3, b=5), 13)
+        self.assertIsNone(f.polynomial())
+
+
+class ExpressionParserCacheTest(unittest.TestCase):
+    def setUp(self):
+        ExpressionParser.cache.clear()
+
+    def test_whitespace_variants_share_cache_entry(self):
+        f = ExpressionParser.convert_expr_to_function("x^2 + 3*x")
+        g = ExpressionParser.convert_expr_to_function("  x ^ 2 +   3 * x ")
+        self.assertIs(f, g)
+        self.assertEqual(ExpressionParser.cache.hits, 1)
+        self.assertEqual(ExpressionParser.cache.misses, 1)
+
+    def test_significant_whitespace_is_kept(self):
+        self.assertEqual(ExpressionParser.normalize_expression("x ^ 2 + 1"), "x**2+1")
+        with self.assertRaises(ValueError):
+            ExpressionParser.convert_expr_to_function("1 0")
+        with self.assertRaises(ValueError):
+            ExpressionParser.convert_expr_to_function("2 * * x")
+
+    def test_invalid_expressions_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                ExpressionParser.convert_expr_to_function("2*y")
+        self.assertEqual(len(ExpressionParser.cache), 0)
+
+    def test_eviction(self):
+        cache = ExpressionCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.info(), {"hits": 1, "misses": 1, "evictions": 1, "size": 2, "max_size": 2})
+        cache.max_size = 1
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(cache.get("c"), 3)
+
+
 class ExpressionParserValidateTest(unittest.TestCase):
     def test_valid_expression(self):
         try:
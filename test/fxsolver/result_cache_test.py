@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.fxsolver.result_cache import ResultCache
+
+
+# Stores count entries from another process (module level, so the spawn start method can pickle it).
+def store_entries(path, worker, count):
+    cache = ResultCache(path)
+    for i in range(count):
+        cache.put(f"{worker}-{i}", [worker, i])
+    cache.close()
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, max_entries=ResultCache.DEFAULT_MAX_ENTRIES):
+        cache = ResultCache(self.path, max_entries)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_put_and_get(self):
+        cache = self.open()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", [[1.0, float("nan"), 2]])
+        value = cache.get("a")
+        self.assertEqual(value[0][0], 1.0)
+        self.assertNotEqual(value[0][1], value[0][1])
+        self.assertEqual(value[0][2], 2)
+        info = cache.info()
+        self.assertEqual((info["hits"], info["misses"], info["size"]), (1, 1, 1))
+
+    def test_persists_across_instances(self):
+        self.open().put("a", [1])
+        self.assertEqual(self.open().get("a"), [1])
+
+    def test_evicts_least_recently_used(self):
+        cache = self.open(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual(cache.evictions, 1)
+        cache.max_entries = 1
+        self.assertEqual(len(cache), 1)
+
+    def test_rejects_negative_size(self):
+        with self.assertRaises(ValueError):
+            ResultCache(self.path, max_entries=-1)
+        with self.assertRaises(ValueError):
+            self.open().max_entries = -1
+
+    def test_clear(self):
+        cache = self.open()
+        cache.put("a", 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.info()["hits"], 0)
+
+    def test_key_depends_on_every_part(self):
+        self.assertEqual(ResultCache.key("x", 1.0, None), ResultCache.key("x", 1.0, None))
+        self.assertNotEqual(ResultCache.key("x", 1.0), ResultCache.key("x", 1.0 + 1e-15))
+        self.assertNotEqual(ResultCache.key("x", "y"), ResultCache.key("xy"))
+
+    def test_from_environment(self):
+        self.assertIsNone(ResultCache.from_environment({}))
+        cache = ResultCache.from_environment({ResultCache.ENVIRONMENT_VARIABLE: self.path})
+        self.assertEqual(cache.path, self.path)
+
+    def test_other_format_version_is_cleared(self):
+        self.open().put("a", 1)
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA user_version = 0")
+        connection.close()
+        self.assertIsNone(self.open().get("a"))
+
+    def test_unusable_file_counts_errors(self):
+        cache = self.open()
+        cache.path = self.directory.name  # a directory cannot be opened as a database
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.errors, 2)
+        cache.max_entries = 1
+        cache.clear()
+        self.assertEqual(cache.info()["size"], 0)
+        self.assertEqual(cache.errors, 5)
+
+    def test_hits_are_written_in_batches(self):
+        cache = self.open()
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        def used():
+            connection = sqlite3.connect(self.path)
+            try:
+                return dict(connection.execute("SELECT key, used FROM results"))
+            finally:
+                connection.close()
+
+        before = used()
+        cache.get("a")
+        self.assertEqual(used(), before)
+        cache.close()
+        after = used()
+        self.assertGreater(after["a"], before["a"])
+        self.assertEqual(after["b"], before["b"])
+
+    def test_concurrent_processes(self):
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=store_entries, args=(self.path, worker, 25)) for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual([process.exitcode for process in processes], [0] * 4)
+        cache = self.open()
+        self.assertEqual(len(cache), 100)
+        self.assertEqual(cache.get("3-24"), [3, 24])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,16 @@
+import os
+import pickle
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
-from src.fxsolver.solver import FxSolver
+import numpy as np
+
+from src.fxsolver.solver import Difference, FxSolver, SolveCancelled
 from src.fxsolver.parser import ExpressionParser
+from src.fxsolver.result_cache import ResultCache
+from src.fxsolver.stats import SolveStats
 
 
 class FxSolverTest(unittest.TestCase):
@@ -32,7 +41,654 @@ class FxSolverTest(unittest.TestCase):
         roots = FxSolver.find_roots(f1, f2)
         self.assertEqual(len(roots), 0)
 
+    def test_solve_many_roots(self):
+        f1 = ExpressionParser.convert_expr_to_function("x^5 - 5*x^3 + 4*x")
+        f2 = ExpressionParser.convert_expr_to_function("0")
+        for polynomial in (True, False):
+            roots = FxSolver.find_roots(f1, f2, -3, 3.5, steps=1000, polynomial=polynomial)
+            self.assertEqual(len(roots), 5)
+            for (x, _), expected in zip(roots, [-2, -1, 0, 1, 2]):
+                self.assertAlmostEqual(x, expected, places=12 if polynomial else 7)
+
+    def test_exact_root_on_sample(self):
+        f1 = ExpressionParser.convert_expr_to_function("x")
+        f2 = ExpressionParser.convert_expr_to_function("0")
+        roots = FxSolver.find_roots(f1, f2, -1, 1, steps=3, polynomial=False)
+        # The exact zero is shared by two sample pairs but reported once
+        self.assertEqual(roots, [(0, 0)])
+
+    def test_skips_undefined_samples(self):
+        f1 = ExpressionParser.convert_expr_to_function("sqrt(x) - 1")
+        f2 = ExpressionParser.convert_expr_to_function("0")
+        roots = FxSolver.find_roots(f1, f2)
+        self.assertEqual(len(roots), 1)
+        self.assertAlmostEqual(roots[0][0], 1)
+
+
+
+class FxSolverPolynomialTest(unittest.TestCase):
+    def solve(self, f1, f2, *args, **kwargs):
+        return FxSolver.find_roots(ExpressionParser.convert_expr_to_function(f1),
+                                   ExpressionParser.convert_expr_to_function(f2), *args, **kwargs)
+
+    def test_matches_sampling(self):
+        sampled = self.solve("x^5 - 5*x^3 + 4*x", "x", -3, 3.5, polynomial=False)
+        direct = self.solve("x^5 - 5*x^3 + 4*x", "x", -3, 3.5)
+        self.assertEqual(len(direct), len(sampled))
+        for (x, y), (x_ref, y_ref) in zip(direct, sampled):
+            self.assertAlmostEqual(x, x_ref)
+            self.assertAlmostEqual(y, y_ref)
+
+    def test_finds_double_roots(self):
+        roots = self.solve("(x - 1)^2 * (x + 3)", "0")
+        self.assertEqual(len(roots), 2)
+        self.assertAlmostEqual(roots[0][0], -3)
+        self.assertAlmostEqual(roots[1][0], 1, places=12)
+        self.assertEqual(self.solve("x^2", "0", polynomial=False, tangents=False), [])
+        self.assertEqual(len(self.solve("x^2", "0")), 1)
+        self.assertEqual([root.multiplicity for root in roots], [1, 2])
+
+    def test_finds_higher_multiplicities(self):
+        for m in (3, 4, 5):
+            roots = self.solve(f"(x - 1)^{m}", "0")
+            self.assertEqual(len(roots), 1, m)
+            self.assertAlmostEqual(roots[0].x, 1, places=12)
+            self.assertEqual(roots[0].multiplicity, m)
+        roots = self.solve("(x - 2)^3 * (x + 1)", "0")
+        self.assertEqual([root.multiplicity for root in roots], [1, 3])
+        np.testing.assert_allclose([root.x for root in roots], [-1, 2], rtol=0, atol=1e-12)
+        roots = self.solve("3*(x - 2.5)^4 * (x + 7) * (x - 0.1)^2", "0")
+        self.assertEqual([root.multiplicity for root in roots], [1, 2, 4])
+        np.testing.assert_allclose([root.x for root in roots], [-7, 0.1, 2.5], rtol=0, atol=1e-12)
+
+    def test_close_simple_roots_stay_apart(self):
+        roots = self.solve("x^2", "0.000001")
+        np.testing.assert_allclose([root.x for root in roots], [-0.001, 0.001], rtol=1e-12)
+        self.assertEqual([root.multiplicity for root in roots], [1, 1])
+
+    def test_reversed_range(self):
+        for f1, f2 in (("x^2", "1"), ("(x - 2)^3 * (x + 1)", "0")):
+            direct = self.solve(f1, f2, 5, -5)
+            sampled = self.solve(f1, f2, 5, -5, polynomial=False)
+            self.assertEqual(len(direct), len(sampled))
+            for root, expected in zip(direct, sampled):
+                self.assertAlmostEqual(root.x, expected.x, places=6)
+        roots = self.solve("x^2", "1", 5, -5)
+        np.testing.assert_allclose([root.x for root in roots], [1, -1], rtol=0, atol=1e-12)
+        self.assertEqual(self.solve("x^2", "1", 0.5, -0.5), [])
+
+    def test_only_roots_in_range(self):
+        roots = self.solve("x^3 - 7*x + 6", "0", 0, 1.5)
+        self.assertEqual([round(x, 9) for x, _ in roots], [1])
+
+    def test_no_real_roots(self):
+        self.assertEqual(self.solve("x^2 + 0.000000000001", "0"), [])
+        self.assertEqual(self.solve("x^4 + 1", "0.5"), [])
+
+    def test_identical_functions_use_sampling(self):
+        # Every sample is an exact root of g = 0, one run of zeros reported once at its start
+        roots = self.solve("x + 1", "1 + x", -1, 1, 3)
+        self.assertEqual([x for x, _ in roots], [-1])
+
+
+class FxSolverTangentTest(unittest.TestCase):
+    def solve(self, f1, f2, *args, **kwargs):
+        return FxSolver.find_roots(ExpressionParser.convert_expr_to_function(f1),
+                                   ExpressionParser.convert_expr_to_function(f2),
+                                   *args, polynomial=False, **kwargs)
+
+    def test_finds_tangent_root(self):
+        roots = self.solve("x^2", "0")
+        self.assertEqual(len(roots), 1)
+        self.assertAlmostEqual(roots[0].x, 0, places=6)
+        self.assertEqual(roots[0].multiplicity, 2)
+
+    def test_non_polynomial_tangent(self):
+        roots = self.solve("(sqrt(x) - 2)^2", "0")
+        self.assertEqual([(round(root.x, 6), root.multiplicity) for root in roots], [(4, 2)])
+
+    def test_mixed_crossing_and_tangent(self):
+        roots = self.solve("(x - 1)^2 * (x + 3)", "0")
+        self.assertEqual([(round(root.x, 6), root.multiplicity) for root in roots], [(-3, 1), (1, 2)])
+
+    def test_near_miss_is_not_a_root(self):
+        self.assertEqual(self.solve("x^2 + 0.1", "0"), [])
+        self.assertEqual(self.solve("x^2", "-0.001"), [])
+        # Misses far below 1 are not roots either, with or without a symbolic derivative
+        self.assertEqual(self.solve("x^2 + 0.0000000001", "0"), [])
+        self.assertEqual(self.solve("sqrt(x^4) + 0.0000000001", "0"), [])
+        self.assertEqual(self.solve("x^2 + 1000.0000000001", "2*x + 999"), [])
+        # Tangents found up to the rounding error of large terms
+        self.assertEqual([(round(root.x, 6), root.multiplicity) for root in self.solve("x^2 + 1000", "2*x + 999")],
+                         [(1, 2)])
+
+    def test_splits_close_pair_of_roots(self):
+        roots = self.solve("x^2", "0.000001")
+        self.assertEqual([(round(root.x, 6), root.multiplicity) for root in roots], [(-0.001, 1), (0.001, 1)])
+
+    def test_can_be_disabled(self):
+        self.assertEqual(self.solve("x^2", "0", tangents=False), [])
+
+    def test_symbolic_derivative_locates_tangent(self):
+        f1 = ExpressionParser.convert_expr_to_function("(x - 1)^2 * (x + 3) + sqrt(x + 5)")
+        f2 = ExpressionParser.convert_expr_to_function("sqrt(x + 5)")
+        symbolic = FxSolver.find_roots(f1, f2, polynomial=False)
+        opaque = FxSolver.find_roots(lambda x: f1(x), f2, polynomial=False)
+        self.assertEqual([root.multiplicity for root in symbolic], [1, 2])
+        self.assertLess(abs(symbolic[1].x - 1), abs(opaque[1].x - 1) + 1e-12)
+        self.assertAlmostEqual(symbolic[1].x, 1, places=8)
+
+    def test_parallel_matches_serial(self):
+        serial = self.solve("(x - 0.5)^2", "0", -1, 1, 40000)
+        parallel = self.solve("(x - 0.5)^2", "0", -1, 1, 40000, workers=3, executor="thread")
+        self.assertEqual(parallel, serial)
+        self.assertEqual([root.multiplicity for root in parallel], [2])
+
+    def test_root_behaves_like_a_tuple(self):
+        root = self.solve("x^2", "0")[0]
+        x, y = root
+        self.assertEqual((x, y), (root.x, root.y))
+        copy = pickle.loads(pickle.dumps(root))
+        self.assertEqual((copy, copy.multiplicity), (root, 2))
+
+
+class FxSolverMethodTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("x^5 - 5*x^3 + 4*x")
+        self.f2 = ExpressionParser.convert_expr_to_function("0.5")
+
+    def test_methods_agree(self):
+        expected = FxSolver.find_roots(self.f1, self.f2, polynomial=False)
+        for method in ("brent", "illinois", "newton"):
+            roots = FxSolver.find_roots(self.f1, self.f2, method=method, polynomial=False)
+            self.assertEqual(len(roots), len(expected))
+            for (x, y), (x_ref, _) in zip(roots, expected):
+                self.assertAlmostEqual(x, x_ref, places=8)
+                self.assertAlmostEqual(y, 0.5, places=6)
+
+    def test_superlinear_methods_use_fewer_evaluations(self):
+        counts = {}
+        for method in ("bisect", "brent", "illinois"):
+            calls = []
+
+            def g(x):
+                calls.append(np.size(x))
+                return self.f1(x) - 0.5
+
+            refine = getattr(FxSolver, FxSolver.METHODS[method])
+            lefts, rights = np.array([-2.1, 0.0]), np.array([-1.9, 0.2])
+            refine(lefts, rights, g(lefts), g(rights), g)
+            counts[method] = len(calls)
+        self.assertLess(counts["brent"], counts["bisect"])
+        self.assertLess(counts["illinois"], counts["bisect"])
+
+    def test_tolerance_controls_accuracy(self):
+        coarse = FxSolver.find_roots(self.f1, self.f2, method="brent", xtol=1e-3, polynomial=False)
+        fine = FxSolver.find_roots(self.f1, self.f2, method="brent", xtol=1e-12, polynomial=False)
+        self.assertLess(abs(fine[0][1] - 0.5), 1e-9)
+        self.assertEqual(len(coarse), len(fine))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            FxSolver.find_roots(self.f1, self.f2, method="secant")
+
+    def test_newton_uses_symbolic_derivative(self):
+        g = Difference(self.f1, self.f2)
+        self.assertTrue(g.differentiable)
+        opaque_calls, symbolic_calls = [], []
+
+        def opaque(x):
+            opaque_calls.append(np.size(x))
+            return g(x)
+
+        with mock.patch.object(Difference, "with_derivative", autospec=True,
+                               side_effect=lambda self, x: (symbolic_calls.append(np.size(x)),
+                                                            (g(x), g.derivative()(x)))[1]):
+            lefts, rights = np.array([-2.1, 0.0]), np.array([-1.9, 0.2])
+            symbolic = FxSolver._newton(lefts, rights, g(lefts), g(rights), g)
+            finite = FxSolver._newton(lefts, rights, g(lefts), g(rights), opaque)
+        np.testing.assert_allclose(symbolic, finite, atol=1e-8)
+        self.assertLess(len(symbolic_calls), len(opaque_calls))
+        self.assertFalse(Difference(self.f1, lambda x: 0.5).differentiable)
+
+
+class FxSolverAdaptiveSamplingTest(unittest.TestCase):
+    def test_same_roots_as_uniform_with_fewer_evaluations(self):
+        f1 = ExpressionParser.convert_expr_to_function("x^5 - 5*x^3 + 4*x")
+        f2 = ExpressionParser.convert_expr_to_function("0")
+        calls = []
+
+        def counted(x):
+            calls.append(np.size(x))
+            return f1(x)
+
+        expected = FxSolver.find_roots(f1, f2, -3, 3.5, polynomial=False)
+        roots = FxSolver.find_roots(counted, f2, -3, 3.5, sampling="adaptive", polynomial=False)
+        self.assertEqual(len(roots), len(expected))
+        for (x, _), (x_ref, _) in zip(roots, expected):
+            self.assertAlmostEqual(x, x_ref)
+        self.assertLess(sum(calls), 1000)
+
+    def test_finds_close_pair_missed_by_uniform(self):
+        f1 = ExpressionParser.convert_expr_to_function("x^2")
+        f2 = ExpressionParser.convert_expr_to_function("0.000001")
+        self.assertEqual(FxSolver.find_roots(f1, f2, polynomial=False, tangents=False), [])
+        roots = FxSolver.find_roots(f1, f2, -1e6, 1e6, sampling="adaptive", polynomial=False, tangents=False)
+        self.assertEqual(len(roots), 2)
+        self.assertAlmostEqual(roots[0][0], -0.001)
+        self.assertAlmostEqual(roots[1][0], 0.001)
+
+    def test_slopes_guide_refinement(self):
+        x_vals = np.array([-1.0, 1.0, 3.0])
+        scores = FxSolver._slope_scores(x_vals, x_vals ** 2 + 0.5, 2 * x_vals)
+        # The tangent lines at -1 and 1 meet at (0, -0.5): the dip may reach zero; [1, 3] does not dip
+        self.assertLessEqual(scores[0], 1.0)
+        self.assertEqual(scores[1], np.inf)
+        # Cells with a sign change are found by the scan already
+        self.assertEqual(FxSolver._slope_scores(x_vals, x_vals - 0.5, np.ones(3))[0], np.inf)
+
+    def test_respects_budget(self):
+        f1 = ExpressionParser.convert_expr_to_function("x^2")
+        f2 = ExpressionParser.convert_expr_to_function("0.000001")
+        x_vals, _ = FxSolver._sample_adaptive(lambda x: f1(x) - f2(x), -10, 10, budget=300)
+        self.assertLessEqual(x_vals.size, 300)
+        self.assertTrue(np.all(np.diff(x_vals) > 0))
+
+    def test_unknown_sampling(self):
+        f = ExpressionParser.convert_expr_to_function("x")
+        with self.assertRaises(ValueError):
+            FxSolver.find_roots(f, f, sampling="random")
+
+
+class FxSolverIntervalSamplingTest(unittest.TestCase):
+    def solve(self, f1, f2, *args, **kwargs):
+        return FxSolver.find_roots(ExpressionParser.convert_expr_to_function(f1),
+                                   ExpressionParser.convert_expr_to_function(f2),
+                                   *args, sampling="interval", polynomial=False, **kwargs)
+
+    def test_finds_roots_on_wide_range(self):
+        roots = self.solve("x^2", "0.000001", -1e6, 1e6, tangents=False)
+        self.assertEqual([round(root.x, 6) for root in roots], [-0.001, 0.001])
+        roots = self.solve("(x - 1)^2 * (x + 3)", "0", -1e6, 1e6)
+        self.assertEqual([(round(root.x, 6), root.multiplicity) for root in roots], [(-3, 1), (1, 2)])
+
+    def test_discards_root_free_ranges(self):
+        f1 = ExpressionParser.convert_expr_to_function("sqrt(x) * log10(x + 3)")
+        f2 = ExpressionParser.convert_expr_to_function("1")
+        with SolveStats() as stats:
+            roots = FxSolver.find_roots(f1, f2, -1e6, 1e6, sampling="interval")
+        self.assertEqual(len(roots), 1)
+        self.assertAlmostEqual(roots[0].x, FxSolver.find_roots(f1, f2, 0, 10)[0].x)
+        self.assertLess(stats.counters["interval_evaluations"], 200)
+        self.assertLess(stats.counters["evaluations"], 100)
+        self.assertEqual(self.solve("x^2 + 1", "0", -1e6, 1e6), [])
+
+    def test_matches_uniform_sampling(self):
+        for f1, f2 in (("2^x", "x^2"), ("1/(x - 1)", "2"), ("sqrt(x^2 - 4)", "1"), ("x^3", "x")):
+            expected = FxSolver.find_roots(ExpressionParser.convert_expr_to_function(f1),
+                                           ExpressionParser.convert_expr_to_function(f2), -10, 10, 4999,
+                                           polynomial=False)
+            roots = self.solve(f1, f2, -10, 10)
+            self.assertEqual(sorted({round(root.x, 6) for root in roots}),
+                             sorted({round(root.x, 6) for root in expected}), f"{f1} = {f2}")
 
+    def test_flat_difference_matches_uniform_sampling(self):
+        # g underflows to exactly zero around 0; the zeros are one root and the samples stay within steps
+        f1 = ExpressionParser.convert_expr_to_function("sqrt(x^4 + 1)")
+        f2 = ExpressionParser.convert_expr_to_function("1")
+        for steps in (50, 5000):
+            expected = FxSolver.find_roots(f1, f2, -2, 2, steps)
+            with SolveStats() as stats:
+                roots = self.solve("sqrt(x^4 + 1)", "1", -2, 2, steps)
+            self.assertEqual([round(root.x, 3) for root in roots], [round(root.x, 3) for root in expected])
+            self.assertEqual(len(roots), 1)
+            self.assertLessEqual(stats.counters["evaluations"] - len(roots), steps)
+
+    def test_budget_limits_interval_evaluations(self):
+        # f1 - f2 is zero everywhere, so no box can be discarded
+        with SolveStats() as stats:
+            self.solve("x", "x", budget=100)
+        self.assertLessEqual(stats.counters["interval_evaluations"], 100)
+
+    def test_requires_parsed_functions(self):
+        f = ExpressionParser.convert_expr_to_function("x")
+        with self.assertRaises(ValueError):
+            FxSolver.find_roots(lambda x: x, f, sampling="interval", polynomial=False)
+
+
+class FxSolverParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("x^5 - 5*x^3 + 4*x")
+        self.f2 = ExpressionParser.convert_expr_to_function("x")
+
+    def test_thread_pool_matches_serial(self):
+        expected = FxSolver.find_roots(self.f1, self.f2, -3, 3.5, steps=50000, polynomial=False)
+        roots = FxSolver.find_roots(self.f1, self.f2, -3, 3.5, steps=50000, workers=4, executor="thread",
+                                    polynomial=False)
+        self.assertEqual(roots, expected)
+
+    def test_process_pool_matches_serial(self):
+        expected = FxSolver.find_roots(self.f1, self.f2, -3, 3.5, steps=50000, polynomial=False)
+        roots = FxSolver.find_roots(self.f1, self.f2, -3, 3.5, steps=50000, workers=2, polynomial=False)
+        self.assertEqual(roots, expected)
+
+    def test_root_on_chunk_boundary(self):
+        f1 = ExpressionParser.convert_expr_to_function("x")
+        f2 = ExpressionParser.convert_expr_to_function("0")
+        # With 40001 samples over [-1, 1] the root x = 0 is the boundary sample of two chunks
+        expected = FxSolver.find_roots(f1, f2, -1, 1, steps=40001, polynomial=False)
+        roots = FxSolver.find_roots(f1, f2, -1, 1, steps=40001, workers=2, executor="thread", polynomial=False)
+        self.assertEqual(roots, expected)
+
+    def test_grid_matches_linspace(self):
+        full = np.linspace(-7.3, 11.1, 1001)
+        np.testing.assert_array_equal(FxSolver._grid(-7.3, 11.1, 1001, 250, 1001), full[250:])
+
+    def test_requires_uniform_sampling(self):
+        with self.assertRaises(ValueError):
+            FxSolver.find_roots(self.f1, self.f2, sampling="adaptive", workers=2, polynomial=False)
+
+
+class FxSolverBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.jobs = [
+            ("x^2 - 4", "3*x - 6"),
+            ("2*x + 3", "5*x - 3", -10, 10),
+            ("x^2 - 4", "0", -5, 5, 2000),
+            {"f1": "x^2 - 4", "f2": "3*x - 6", "x_min": 0, "x_max": 1.5},
+        ]
+
+    def expected(self, f1, f2, x_min=-10, x_max=10, steps=5000):
+        return FxSolver.find_roots(ExpressionParser.convert_expr_to_function(f1),
+                                   ExpressionParser.convert_expr_to_function(f2), x_min, x_max, steps)
+
+    def test_matches_find_roots(self):
+        results = sorted(FxSolver.find_roots_batch(self.jobs))
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[0].roots, self.expected("x^2 - 4", "3*x - 6"))
+        self.assertEqual(results[1].roots, self.expected("2*x + 3", "5*x - 3"))
+        self.assertEqual(results[2].roots, self.expected("x^2 - 4", "0", -5, 5, 2000))
+        self.assertEqual(results[3].roots, self.expected("x^2 - 4", "3*x - 6", 0, 1.5))
+        self.assertTrue(all(result.error is None for result in results))
+
+    def test_thread_pool(self):
+        serial = sorted(FxSolver.find_roots_batch(self.jobs))
+        parallel = sorted(FxSolver.find_roots_batch(self.jobs, workers=2, executor="thread"))
+        self.assertEqual(parallel, serial)
+
+    def test_invalid_jobs_report_errors(self):
+        results = sorted(FxSolver.find_roots_batch([("x", "y"), ("x",), ("x", "1")]))
+        self.assertIsInstance(results[0].error, ValueError)
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertIsNone(results[2].error)
+        self.assertAlmostEqual(results[2].roots[0][0], 1)
+
+    def test_compiles_each_expression_once(self):
+        with mock.patch.object(ExpressionParser, "convert_expr_to_function",
+                               wraps=ExpressionParser.convert_expr_to_function) as convert:
+            list(FxSolver.find_roots_batch([("x^2", "x")] * 10 + [("x^2", "1")]))
+        self.assertEqual(sorted(call.args[0] for call in convert.call_args_list), ["1", "x", "x^2"])
 
 if __name__ == '__main__':
     unittest.main()
+
+
+class FxSolverCancellationTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("sqrt(x^2 + 1)")
+        self.f2 = ExpressionParser.convert_expr_to_function("2")
+
+    def test_progress_reaches_one(self):
+        fractions = []
+        roots = FxSolver.find_roots(self.f1, self.f2, steps=200000, progress=fractions.append)
+        self.assertEqual(roots, FxSolver.find_roots(self.f1, self.f2, steps=200000))
+        self.assertGreater(len(fractions), 3)
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertEqual((fractions[0], fractions[-1]), (0.0, 1.0))
+
+    def test_cancel_before_start(self):
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(SolveCancelled):
+            FxSolver.find_roots(self.f1, self.f2, cancel=cancel)
+
+    def test_cancel_between_chunks(self):
+        cancel = threading.Event()
+
+        def progress(fraction):
+            if fraction > 0.2:
+                cancel.set()
+
+        with mock.patch.object(FxSolver, "_scan_for_roots") as scan:
+            with self.assertRaises(SolveCancelled):
+                FxSolver.find_roots(self.f1, self.f2, steps=500000, cancel=cancel, progress=progress)
+        scan.assert_not_called()
+
+    def test_cancel_parallel_and_adaptive(self):
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(SolveCancelled):
+            FxSolver.find_roots(self.f1, self.f2, steps=200000, workers=2, executor="thread", cancel=cancel)
+        with self.assertRaises(SolveCancelled):
+            FxSolver.find_roots(self.f1, self.f2, sampling="adaptive", cancel=cancel)
+
+
+class FxSolverSharedSamplesTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("sqrt(x^2 + 1)")
+        self.f2 = ExpressionParser.convert_expr_to_function("log10(x + 20)")
+
+    def test_return_samples(self):
+        roots, (x_vals, y1, y2) = FxSolver.find_roots(self.f1, self.f2, steps=2000, return_samples=True)
+        self.assertEqual(roots, FxSolver.find_roots(self.f1, self.f2, steps=2000))
+        np.testing.assert_array_equal(x_vals, np.linspace(-10, 10, 2000))
+        np.testing.assert_array_equal(y1, self.f1(x_vals))
+        np.testing.assert_array_equal(y2, self.f2(x_vals))
+
+    def test_functions_are_sampled_once(self):
+        calls = []
+        f1 = lambda x: (calls.append(np.size(x)), self.f1(x))[1]
+        FxSolver.find_roots(f1, self.f2, steps=2000, tangents=False, return_samples=True)
+        # One evaluation on the grid; the rest are the batched refiners working on the two brackets
+        self.assertEqual(calls[0], 2000)
+        self.assertTrue(all(size <= 2 for size in calls[1:]))
+
+    def test_samples_of_both_functions(self):
+        _, samples = FxSolver.find_roots(self.f1, self.f2, steps=2000, return_samples=True)
+        roots, returned = FxSolver.find_roots(self.f1, self.f2, samples=samples, return_samples=True)
+        self.assertEqual(roots, FxSolver.find_roots(self.f1, self.f2, steps=2000))
+        self.assertIs(returned[0], samples[0])
+        x_vals, y1, y2 = samples
+        self.assertEqual(roots, FxSolver.find_roots(self.f1, self.f2, samples=(x_vals, y1 - y2)))
+
+    def test_no_samples_without_sampling(self):
+        f1 = ExpressionParser.convert_expr_to_function("x^2")
+        f2 = ExpressionParser.convert_expr_to_function("1")
+        self.assertEqual(FxSolver.find_roots(f1, f2, return_samples=True)[1], None)
+        self.assertEqual(FxSolver.find_roots(self.f1, self.f2, sampling="adaptive", return_samples=True)[1], None)
+
+    def test_invalid_samples(self):
+        with self.assertRaises(ValueError):
+            FxSolver.find_roots(self.f1, self.f2, samples=(np.arange(3.0),))
+        with self.assertRaises(ValueError):
+            FxSolver.find_roots(self.f1, self.f2, samples=(np.arange(3.0), np.arange(3.0), np.arange(2.0)))
+
+
+
+class FxSolverStreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("sqrt(x^2 + 1) * log10(x + 20)")
+        self.f2 = ExpressionParser.convert_expr_to_function("2")
+
+    def test_matches_find_roots(self):
+        tangent = ExpressionParser.convert_expr_to_function("(x - 1)^2 * sqrt(x + 5)")
+        zero = ExpressionParser.convert_expr_to_function("0")
+        for f1, f2 in ((self.f1, self.f2), (tangent, zero), (self.f2, self.f2)):
+            expected = FxSolver.find_roots(f1, f2, polynomial=False)
+            for chunk_size in (1, 3, 1000, 4999, 10000):
+                self.assertEqual(list(FxSolver.iter_roots(f1, f2, polynomial=False, chunk_size=chunk_size)),
+                                 expected)
+
+    def test_polynomial_roots(self):
+        f1 = ExpressionParser.convert_expr_to_function("x^3")
+        f2 = ExpressionParser.convert_expr_to_function("x")
+        self.assertEqual(list(FxSolver.iter_roots(f1, f2)), FxSolver.find_roots(f1, f2))
+
+    def test_yields_before_sampling_the_rest(self):
+        sizes = []
+
+        def f1(x):
+            sizes.append(np.size(x))
+            return np.sin(x)
+
+        zero = lambda x: np.zeros_like(x)
+        roots = FxSolver.iter_roots(f1, zero, -10, 10, 100001, chunk_size=1000)
+        first = next(roots)
+        self.assertAlmostEqual(first[0], -3 * np.pi)
+        # Only the chunks up to the first root (the third of 100) were sampled, in arrays of at most one chunk
+        self.assertLess(sum(sizes), 4000)
+        self.assertEqual([first] + list(roots), FxSolver.find_roots(np.sin, zero, -10, 10, 100001))
+        self.assertLessEqual(max(sizes), 1002)
+
+    def test_progress_and_cancel(self):
+        fractions = []
+        list(FxSolver.iter_roots(self.f1, self.f2, chunk_size=1000, progress=fractions.append))
+        self.assertEqual(fractions[0], 0.0)
+        self.assertEqual(fractions[-1], 1.0)
+        self.assertEqual(len(fractions), 6)
+        cancel = threading.Event()
+        roots = FxSolver.iter_roots(self.f1, self.f2, chunk_size=1000, cancel=cancel)
+        cancel.set()
+        with self.assertRaises(SolveCancelled):
+            next(roots)
+
+    def test_invalid_arguments_raise_immediately(self):
+        with self.assertRaises(ValueError):
+            FxSolver.iter_roots(self.f1, self.f2, method="secant")
+        with self.assertRaises(ValueError):
+            FxSolver.iter_roots(self.f1, self.f2, chunk_size=0)
+
+
+class FxSolverResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = ResultCache(os.path.join(directory.name, "results.sqlite3"))
+        self.addCleanup(self.cache.close)
+        self.f1 = ExpressionParser.convert_expr_to_function("sqrt(x + 3)")
+        self.f2 = ExpressionParser.convert_expr_to_function("x")
+
+    def test_repeated_solve_uses_cache(self):
+        roots = FxSolver.find_roots(self.f1, self.f2, cache=self.cache)
+        stats = SolveStats()
+        with mock.patch.object(FxSolver, "_find_roots") as solve:
+            cached = FxSolver.find_roots(self.f1, self.f2, cache=self.cache, stats=stats)
+        solve.assert_not_called()
+        self.assertEqual(cached, roots)
+        self.assertEqual(cached[0].multiplicity, 1)
+        self.assertEqual(stats.counters["result_cache_hits"], 1)
+        self.assertEqual(FxSolver.find_roots(self.f1, self.f2, cache=self.cache, return_samples=True), (roots, None))
+
+    def test_settings_are_part_of_the_key(self):
+        FxSolver.find_roots(self.f1, self.f2, cache=self.cache)
+        FxSolver.find_roots(self.f1, self.f2, x_max=5, cache=self.cache)
+        FxSolver.find_roots(self.f1, self.f2, method="brent", cache=self.cache)
+        self.assertEqual((self.cache.hits, len(self.cache)), (0, 3))
+        key = FxSolver.cache_key(self.f1, self.f2)
+        self.assertEqual(FxSolver.cache_key(self.f1, self.f2, budget=10), key)
+        self.assertNotEqual(FxSolver.cache_key(self.f1, self.f2, sampling="adaptive"), key)
+        self.assertEqual(FxSolver.cache_key(ExpressionParser.convert_expr_to_function("sqrt( x+3 )"), self.f2), key)
+        self.assertNotEqual(FxSolver.cache_key(self.f1, self.f2, grid=["incremental", 5000]), key)
+
+    def test_only_parsed_functions_are_cached(self):
+        self.assertIsNone(FxSolver.cache_key(lambda x: x, self.f2))
+        FxSolver.find_roots(lambda x: x ** 2, lambda x: 1, cache=self.cache)
+        samples = FxSolver._sample_functions(self.f1, self.f2, -10, 10, 5000)
+        FxSolver.find_roots(self.f1, self.f2, samples=samples, cache=self.cache)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_batch_shares_cache_with_find_roots(self):
+        roots = FxSolver.find_roots(self.f1, self.f2, cache=self.cache)
+        results = sorted(FxSolver.find_roots_batch([("sqrt(x + 3)", "x"), ("x^2", "2", 0, 5)], cache=self.cache))
+        self.assertEqual(results[0].roots, roots)
+        self.assertEqual(self.cache.hits, 1)
+        again = sorted(FxSolver.find_roots_batch([("x^2", "2", 0, 5)], cache=self.cache))
+        self.assertEqual(again[0].roots, results[1].roots)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_streaming_shares_cache(self):
+        roots = list(FxSolver.iter_roots(self.f1, self.f2, cache=self.cache))
+        self.assertEqual(FxSolver.find_roots(self.f1, self.f2, cache=self.cache), roots)
+        self.assertEqual(list(FxSolver.iter_roots(self.f1, self.f2, cache=self.cache)), roots)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_parametric_functions_are_not_cached(self):
+        f = ExpressionParser.convert_expr_to_function("a*x", ("a",))
+        self.assertIsNone(FxSolver.cache_key(f, self.f2))
+
+
+class FxSolverSweepTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("x^3 - a*x + b", ("a", "b"))
+        self.f2 = ExpressionParser.convert_expr_to_function("sqrt(x^2 + 1)")
+        self.a = np.linspace(0.5, 12, 40)
+
+    # The roots of find_roots for every value of a (with b fixed)
+    def expected(self, b, **kwargs):
+        for a in self.a:
+            f1 = ExpressionParser.convert_expr_to_function(f"x^3 - {a!r}*x + {b!r}")
+            yield FxSolver.find_roots(f1, self.f2, polynomial=False, tangents=False, **kwargs)
+
+    def assertMatches(self, result, expected):
+        self.assertEqual(len(result.offsets), len(expected) + 1)
+        for i, roots in enumerate(expected):
+            part = slice(result.offsets[i], result.offsets[i + 1])
+            np.testing.assert_array_equal(result.rows[part], i)
+            np.testing.assert_allclose(result.x[part], [root[0] for root in roots], atol=1e-8)
+            np.testing.assert_allclose(result.y[part], [root[1] for root in roots], atol=1e-7)
+
+    def test_matches_find_roots(self):
+        expected = list(self.expected(0.5))
+        for continuation in (False, True):
+            result = FxSolver.sweep(self.f1, self.f2, {"a": self.a, "b": 0.5}, continuation=continuation)
+            self.assertMatches(result, expected)
+            np.testing.assert_array_equal(result.multiplicity, 1)
+
+    def test_blocks_and_coarse_grids(self):
+        expected = list(self.expected(0.5, steps=30))
+        with mock.patch.object(FxSolver, "SWEEP_BLOCK", 100):
+            for continuation in (False, True):
+                result = FxSolver.sweep(self.f1, self.f2, {"a": self.a, "b": 0.5}, steps=30,
+                                        continuation=continuation)
+                self.assertMatches(result, expected)
+
+    def test_grid_of_parameters(self):
+        b = np.array([0.0, 2.0])
+        a, b = np.meshgrid(self.a, b, indexing="ij")
+        result = FxSolver.sweep(self.f1, self.f2, {"a": a, "b": b})
+        self.assertEqual(len(result.offsets), a.size + 1)
+        roots = result.x[result.offsets[3]:result.offsets[4]]
+        np.testing.assert_allclose(roots, [root[0] for root in list(self.expected(2.0))[1]], atol=1e-8)
+
+    def test_callables_receive_all_parameters(self):
+        result = FxSolver.sweep(lambda x, a, b: a * x - b, lambda x, **parameters: 0 * x,
+                                {"a": [1.0, 2.0, 4.0], "b": 1.0}, x_min=-3, x_max=3, steps=101)
+        np.testing.assert_allclose(result.x, [1.0, 0.5, 0.25])
+        np.testing.assert_array_equal(result.offsets, [0, 1, 2, 3])
+
+    def test_progress_and_cancel(self):
+        updates = []
+        with mock.patch.object(FxSolver, "SWEEP_BLOCK", 5000 * 10):
+            FxSolver.sweep(self.f1, self.f2, {"a": self.a, "b": 0.5}, progress=updates.append)
+        self.assertEqual(updates, [0.0, 0.25, 0.5, 0.75, 1.0])
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(SolveCancelled):
+            FxSolver.sweep(self.f1, self.f2, {"a": self.a, "b": 0.5}, cancel=cancel)
+
+    def test_invalid_sweeps(self):
+        for parameters in ({}, {"a": [1, 2], "b": [1, 2, 3]}, {"a": []}, {"b": [1]}):
+            with self.assertRaises(ValueError):
+                FxSolver.sweep(self.f1, self.f2, parameters)
+        with self.assertRaises(ValueError):
+            FxSolver.sweep(self.f1, self.f2, {"a": 1, "b": 1}, steps=1)
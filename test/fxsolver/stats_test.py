@@ -0,0 +1,86 @@
+import threading
+import unittest
+
+from src.fxsolver.incremental import IncrementalSampler
+from src.fxsolver.parser import ExpressionParser
+from src.fxsolver.solver import FxSolver
+from src.fxsolver.stats import SolveStats
+
+
+class SolveStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.f1 = ExpressionParser.convert_expr_to_function("sqrt(x^2 + 1)")
+        self.f2 = ExpressionParser.convert_expr_to_function("2")
+
+    def test_off_by_default(self):
+        self.assertIsNone(SolveStats.current())
+        SolveStats.count("brackets")
+        SolveStats.evaluated(10)
+        with SolveStats.phase("solve"):
+            pass
+        self.assertIsNone(SolveStats.current())
+
+    def test_find_roots_phases_and_counters(self):
+        stats = SolveStats()
+        roots = FxSolver.find_roots(self.f1, self.f2, steps=1000, stats=stats)
+        self.assertEqual(len(roots), 2)
+        for phase in ("solve", "sampling", "scan", "refine"):
+            self.assertGreater(stats.phases[phase].ns, 0)
+        self.assertGreaterEqual(stats.phases["solve"].ns, stats.phases["scan"].ns)
+        self.assertGreaterEqual(stats.phases["scan"].ns, stats.phases["refine"].ns)
+        self.assertEqual(stats.counters["brackets"], 2)
+        # All samples in one call, then one batched evaluation per bisection iteration
+        self.assertEqual(stats.phases["sampling"].evaluations, 1000)
+        self.assertEqual(stats.counters["evaluation_calls"] - 2, stats.counters["refine_iterations"])
+        self.assertEqual(stats.counters["evaluations"], sum(phase.evaluations for phase in stats.phases.values()))
+        self.assertIsNone(SolveStats.current())
+
+    def test_faster_methods_need_fewer_iterations(self):
+        iterations = {}
+        for method in ("bisect", "brent"):
+            stats = SolveStats()
+            FxSolver.find_roots(self.f1, self.f2, method=method, stats=stats)
+            iterations[method] = stats.counters["refine_iterations"]
+        self.assertLess(iterations["brent"], iterations["bisect"])
+
+    def test_records_parsing_and_nested_calls(self):
+        ExpressionParser.cache.clear()
+        with SolveStats() as stats:
+            f1 = ExpressionParser.convert_expr_to_function("x^3 - x")
+            ExpressionParser.convert_expr_to_function("x^3 - x")
+            FxSolver.find_roots(f1, self.f2)
+            FxSolver.find_roots(f1, self.f2, polynomial=False, sampling="adaptive")
+        self.assertEqual(stats.counters["expressions_compiled"], 1)
+        self.assertEqual(stats.counters["parse_cache_hits"], 1)
+        self.assertEqual(stats.phases["parse"].count, 2)
+        self.assertEqual(stats.phases["polynomial"].count, 1)
+        self.assertEqual(stats.phases["solve"].count, 2)
+        # Adaptive sampling starts with a uniform grid, but the phase is only timed once
+        self.assertEqual(stats.phases["sampling"].count, 1)
+        self.assertIn("solve", stats.summary())
+        self.assertIn("iterations", stats.summary())
+
+    def test_incremental_sampler_and_threads(self):
+        sampler = IncrementalSampler(steps=100)
+        other = []
+        with SolveStats() as stats:
+            sampler.sample(self.f1, -1, 1)
+            # Recording is per thread
+            thread = threading.Thread(target=lambda: other.append(SolveStats.current()))
+            thread.start()
+            thread.join()
+        self.assertEqual(other, [None])
+        self.assertEqual(stats.phases["sampling"].evaluations, sampler.evaluations)
+
+    def test_as_dict(self):
+        stats = SolveStats()
+        FxSolver.find_roots(self.f1, self.f2, stats=stats)
+        data = stats.as_dict()
+        self.assertEqual(set(data), {"phases", "counters"})
+        self.assertEqual(data["phases"]["solve"]["count"], 1)
+        self.assertEqual(data["counters"]["brackets"], 2)
+        self.assertIsInstance(data["phases"]["solve"]["ns"], int)
+
+
+if __name__ == "__main__":
+    unittest.main()
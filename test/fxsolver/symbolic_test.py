@@ -0,0 +1,87 @@
+import ast
+import pickle
+import unittest
+
+import numpy as np
+
+from src.fxsolver.parser import ExpressionParser
+from src.fxsolver.symbolic import Symbolic
+
+
+class SymbolicDerivativeTest(unittest.TestCase):
+    EXPRESSIONS = ["5", "x", "-x^2", "x^3 - 2*x", "1/(x + 1)", "x/sqrt(4)", "sqrt(x^2 + 1)", "log10(x)*x",
+                   "2^x", "x^x", "x**-1.5", "(x - 1)^2*(x + 3)", "sqrt(log10(x + 2))/(x^2 + 1)"]
+
+    def test_matches_central_differences(self):
+        x = np.linspace(0.3, 4.0, 25)
+        h = 1e-6
+        for expression in self.EXPRESSIONS:
+            f = ExpressionParser.convert_expr_to_function(expression)
+            estimate = (f(x + h) - f(x - h)) / (2 * h)
+            np.testing.assert_allclose(f.derivative()(x), estimate, rtol=1e-5, atol=1e-6, err_msg=expression)
+
+    def test_simplifies_while_building(self):
+        derivatives = {"x^3": "3 * x ** 2", "x - 2*x^2": "1 - 4 * x", "-x^2": "-2 * x", "7": "0",
+                       "x/sqrt(4)": "0.5"}
+        for expression, expected in derivatives.items():
+            self.assertEqual(ExpressionParser.convert_expr_to_function(expression).derivative().expression, expected)
+
+    def test_constants(self):
+        tree = ExpressionParser.parse_expression("a*x**2 + a", ("a",))
+        self.assertEqual(ast.unparse(Symbolic.differentiate(tree.body, constants=("a",))), "a * (2.0 * x)")
+        with self.assertRaises(ValueError):
+            Symbolic.differentiate(tree.body)
+
+    def test_higher_derivatives(self):
+        f = ExpressionParser.convert_expr_to_function("x^4")
+        self.assertEqual(f.derivative().derivative().expression, "12 * x ** 2")
+        self.assertEqual(f.derivative().derivative().derivative()(2.0), 48.0)
+
+    def test_with_derivative_evaluates_both(self):
+        f = ExpressionParser.convert_expr_to_function("sqrt(x - 1)")
+        x = np.array([0.0, 2.0, 5.0])
+        values, slopes = f.with_derivative(x)
+        np.testing.assert_array_equal(values, f(x))
+        np.testing.assert_array_equal(slopes, f.derivative()(x))
+        self.assertTrue(np.isnan(values[0]) and np.isnan(slopes[0]))
+        self.assertEqual(f.with_derivative(5.0), (2.0, 0.25))
+
+    def test_derivative_pickles(self):
+        derivative = ExpressionParser.convert_expr_to_function("x^2 + sqrt(x)").derivative()
+        copy = pickle.loads(pickle.dumps(derivative))
+        self.assertEqual(copy.expression, derivative.expression)
+        self.assertEqual(copy(4.0), derivative(4.0))
+
+
+class SymbolicCompileTest(unittest.TestCase):
+    def parse(self, expression):
+        return ExpressionParser.parse_expression(ExpressionParser.normalize_expression(expression)).body
+
+    def test_folds_constants(self):
+        folded = Symbolic.fold_constants(self.parse("x * (2^3 + sqrt(16))"), ExpressionParser.ALLOWED_FUNCTIONS)
+        self.assertEqual(Symbolic.to_source(folded), "x * 12")
+
+    def test_keeps_constants_without_a_finite_value(self):
+        for expression, expected in (("x + 1/0", "x + 1 / 0"), ("x * sqrt(-1)", "x * sqrt(-1)"),
+                                     ("x + 10^400", "x + 10 ** 400")):
+            folded = Symbolic.fold_constants(self.parse(expression), ExpressionParser.ALLOWED_FUNCTIONS)
+            self.assertEqual(Symbolic.to_source(folded), expected)
+            self.assertTrue(np.isnan(ExpressionParser.convert_expr_to_function(expression)(1.0)))
+
+    def test_eliminates_common_subexpressions(self):
+        first, second = self.parse("sqrt(x + 1) * x"), self.parse("1 / sqrt(x + 1)")
+        assignments, (first, second) = Symbolic.eliminate_common_subexpressions([first, second])
+        self.assertEqual([(name, Symbolic.to_source(node)) for name, node in assignments],
+                         [("_t0", "sqrt(x + 1)")])
+        self.assertEqual((Symbolic.to_source(first), Symbolic.to_source(second)), ("_t0 * x", "1 / _t0"))
+
+    def test_source_round_trips(self):
+        for expression in ("(x - 1) - (x - 2)", "x / (2 / x)", "(-x) ** 2", "-x ** 2", "2 ** -x", "(x ** 2) ** 3",
+                           "x ** 2 ** 3", "-(x + 1) * 3"):
+            source = Symbolic.to_source(self.parse(expression))
+            f, g = (ExpressionParser.convert_expr_to_function(text) for text in (expression, source))
+            np.testing.assert_allclose(f(np.linspace(0.5, 2, 7)), g(np.linspace(0.5, 2, 7)), err_msg=source)
+
+
+if __name__ == '__main__':
+    unittest.main()